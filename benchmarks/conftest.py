@@ -0,0 +1,34 @@
+"""
+Fixtures for the kvadratnet benchmarks.
+
+The benchmarks use pytest-benchmark and are run separately from the test
+suite. Save a baseline and compare later runs against it with
+
+    pytest benchmarks --benchmark-save=baseline
+    pytest benchmarks --benchmark-compare=0001 --benchmark-compare-fail=mean:10%
+
+Inputs of 1e3 to 1e5 names or points are used by default. Set the
+environment variable KVADRATNET_BENCHMARK_MAX_SIZE, e.g. to 10000000, to
+include larger inputs.
+"""
+
+import pytest
+
+import kvadratnet as kn
+from synthetic import SIZES
+
+
+@pytest.fixture(params=SIZES, ids=lambda size: "n={:.0e}".format(size))
+def size(request):
+    """
+    Number of names or points in the input.
+    """
+    return request.param
+
+
+@pytest.fixture(params=kn.UNITS)
+def unit(request):
+    """
+    Tile unit.
+    """
+    return request.param
@@ -0,0 +1,60 @@
+"""
+Synthetic inputs for the kvadratnet benchmarks.
+"""
+
+import os
+
+import numpy as np
+import pytest
+
+import kvadratnet as kn
+from kvadratnet import batch
+
+# bounding box of Denmark in UTM zone 32, (min_easting, min_northing,
+# max_easting, max_northing)
+EXTENT = (440000, 6040000, 900000, 6410000)
+
+MAX_SIZE = int(os.environ.get("KVADRATNET_BENCHMARK_MAX_SIZE", 100000))
+SIZES = [size for size in (10**n for n in range(3, 8)) if size <= MAX_SIZE]
+
+# inputs of this size and larger are only run once, a single call takes seconds
+_SINGLE_ROUND_SIZE = 1000000
+
+
+def random_points(size, seed=42):
+    """
+    Return arrays of random northings and eastings within EXTENT.
+    """
+    rng = np.random.RandomState(seed)
+    northings = rng.uniform(EXTENT[1], EXTENT[3], size)
+    eastings = rng.uniform(EXTENT[0], EXTENT[2], size)
+    return northings, eastings
+
+
+def random_names(size, unit, prefix="", postfix=""):
+    """
+    Return a list of random tile names of unit within EXTENT.
+    """
+    names = batch.names_from_points(*random_points(size), unit).tolist()
+    if prefix or postfix:
+        names = [prefix + name + postfix for name in names]
+    return names
+
+
+def parent_unit(unit):
+    """
+    Return the next larger unit, skipping the benchmark for the largest unit.
+    """
+    if unit == kn.UNITS[-1]:
+        pytest.skip("{} tiles have no parent".format(unit))
+    return kn.UNITS[kn.UNITS.index(unit) + 1]
+
+
+def run(benchmark, size, function, *args):
+    """
+    Benchmark function called with args. Inputs of a million elements or
+    more are only run once.
+    """
+    if size >= _SINGLE_ROUND_SIZE:
+        return benchmark.pedantic(function, args, rounds=1, iterations=1)
+    return benchmark(function, *args)
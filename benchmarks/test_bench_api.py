@@ -0,0 +1,69 @@
+"""
+Benchmarks of the scalar kvadratnet API.
+
+Each benchmark calls a function once for every name or point in the input.
+"""
+
+import kvadratnet as kn
+from synthetic import parent_unit, random_names, random_points, run
+
+
+def test_tile_name(benchmark, size, unit):
+    """kvadratnet.tile_name on filenames with a prefix and postfix"""
+    names = random_names(size, unit, "dtm_", ".tif")
+    run(benchmark, size, lambda: [kn.tile_name(name) for name in names])
+
+
+def test_validate_name(benchmark, size, unit):
+    """kvadratnet.validate_name"""
+    names = random_names(size, unit)
+    run(benchmark, size, lambda: [kn.validate_name(name) for name in names])
+
+
+def test_validate_names(benchmark, size, unit):
+    """kvadratnet.validate_names with a list of units"""
+    names = random_names(size, unit)
+    run(benchmark, size, kn.validate_names, names, [unit])
+
+
+def test_parent_tile(benchmark, size, unit):
+    """kvadratnet.parent_tile"""
+    parent = parent_unit(unit)
+    names = random_names(size, unit)
+    run(benchmark, size, lambda: [kn.parent_tile(name, parent) for name in names])
+
+
+def test_name_from_point(benchmark, size, unit):
+    """kvadratnet.name_from_point"""
+    northings, eastings = random_points(size)
+    points = list(zip(northings.tolist(), eastings.tolist()))
+    run(
+        benchmark,
+        size,
+        lambda: [kn.name_from_point(north, east, unit) for north, east in points],
+    )
+
+
+def test_extent_from_name(benchmark, size, unit):
+    """kvadratnet.extent_from_name"""
+    names = random_names(size, unit)
+    run(benchmark, size, lambda: [kn.extent_from_name(name) for name in names])
+
+
+def test_key_from_name(benchmark, size, unit):
+    """kvadratnet.key_from_name"""
+    names = random_names(size, unit)
+    run(benchmark, size, lambda: [kn.key_from_name(name) for name in names])
+
+
+def test_name_from_key(benchmark, size, unit):
+    """kvadratnet.name_from_key"""
+    keys = [kn.key_from_name(name) for name in random_names(size, unit)]
+    run(benchmark, size, lambda: [kn.name_from_key(key) for key in keys])
+
+
+def test_parent_key(benchmark, size, unit):
+    """kvadratnet.parent_key"""
+    parent = parent_unit(unit)
+    keys = [kn.key_from_name(name) for name in random_names(size, unit)]
+    run(benchmark, size, lambda: [kn.parent_key(key, parent) for key in keys])
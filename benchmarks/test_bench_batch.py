@@ -0,0 +1,43 @@
+"""
+Benchmarks of the vectorized functions in kvadratnet.batch.
+"""
+
+from kvadratnet import batch
+from synthetic import EXTENT, parent_unit, random_names, random_points, run
+
+
+def test_names_from_points(benchmark, size, unit):
+    """kvadratnet.batch.names_from_points"""
+    northings, eastings = random_points(size)
+    run(benchmark, size, batch.names_from_points, northings, eastings, unit)
+
+
+def test_encode(benchmark, size, unit):
+    """kvadratnet.batch.encode"""
+    northings, eastings = random_points(size)
+    run(benchmark, size, batch.encode, northings, eastings, unit)
+
+
+def test_keys_from_names(benchmark, size, unit):
+    """kvadratnet.batch.keys_from_names"""
+    names = random_names(size, unit, "dtm_", ".tif")
+    run(benchmark, size, batch.keys_from_names, names)
+
+
+def test_names_from_keys(benchmark, size, unit):
+    """kvadratnet.batch.names_from_keys"""
+    keys = batch.encode(*random_points(size), unit=unit)
+    run(benchmark, size, batch.names_from_keys, keys)
+
+
+def test_count_by_parent(benchmark, size, unit):
+    """kvadratnet.batch.count_by_parent on tile keys"""
+    parent = parent_unit(unit)
+    keys = batch.encode(*random_points(size), unit=unit)
+    run(benchmark, size, batch.count_by_parent, keys, parent, True)
+
+
+def test_coverage(benchmark, size):
+    """kvadratnet.batch.coverage of 1km tiles against EXTENT"""
+    keys = batch.encode(*random_points(size), unit="1km")
+    run(benchmark, size, lambda: batch.coverage(keys, extent=EXTENT, keys=True))
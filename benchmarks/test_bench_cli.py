@@ -0,0 +1,84 @@
+"""
+Benchmarks of knet commands on temporary directories with many files.
+
+File lists are passed with --from-file, so the number of files is not
+limited by the command line.
+"""
+
+import itertools
+import os
+
+import pytest
+
+from kvadratnet import knet
+from synthetic import SIZES, random_names, run
+
+# creating files dominates the time spent above this number of files
+FILE_SIZES = [size for size in SIZES if size <= 100000]
+ROUNDS = 3
+
+
+@pytest.fixture(params=FILE_SIZES, ids=lambda size: "n={:.0e}".format(size))
+def file_count(request):
+    """
+    Number of files in the directory.
+    """
+    return request.param
+
+
+def _invoke(command, args):
+    """
+    Run a knet command without exiting the interpreter.
+    """
+    command.main(args, standalone_mode=False)
+
+
+def _directory_setup(tmp_path, monkeypatch, filenames, command, args):
+    """
+    Return a pedantic setup function that changes to a new directory with
+    filenames and a file list, and returns the arguments for _invoke.
+    """
+    rounds = itertools.count()
+
+    def setup():
+        directory = tmp_path / "round{}".format(next(rounds))
+        directory.mkdir()
+        monkeypatch.chdir(str(directory))
+        for filename in filenames:
+            open(filename, "w").close()
+        with open("files.txt", "w") as file_list:
+            file_list.write("\n".join(filenames))
+        return (command, args + ["--from-file", "files.txt"]), {}
+
+    return setup
+
+
+def _unique(names):
+    """
+    Return names with duplicates removed, keeping the order.
+    """
+    return list(dict.fromkeys(names))
+
+
+@pytest.mark.parametrize("jobs", [1, 8])
+def test_organize(benchmark, tmp_path, monkeypatch, file_count, jobs):
+    """knet organize 100km 10km"""
+    filenames = _unique(random_names(file_count, "100m", "dtm_", ".tif"))
+    args = ["--jobs", str(jobs), "100km 10km"]
+    setup = _directory_setup(tmp_path, monkeypatch, filenames, knet.organize, args)
+    benchmark.pedantic(_invoke, setup=setup, rounds=ROUNDS)
+
+
+def test_rename(benchmark, tmp_path, monkeypatch, file_count):
+    """knet rename, stripping a prefix"""
+    filenames = _unique(random_names(file_count, "100m", "dtm_", ".tif"))
+    setup = _directory_setup(tmp_path, monkeypatch, filenames, knet.rename, [])
+    benchmark.pedantic(_invoke, setup=setup, rounds=ROUNDS)
+
+
+def test_parents(benchmark, tmp_path, size):
+    """knet parents --unique --count on a file list"""
+    file_list = tmp_path / "files.txt"
+    file_list.write_text("\n".join(random_names(size, "1km", "dtm_", ".tif")))
+    args = ["--unique", "--count", "--from-file", str(file_list)]
+    run(benchmark, size, _invoke, knet.parents, args)
@@ -38,41 +38,58 @@ Glossary:
 """
 
 import math
+import bisect
+import functools
+import weakref
 from collections import namedtuple
-import re
 
 __version__ = "0.3.0"
 
-UNITS = ["100m", "250m", "1km", "10km", "50km", "100km"]
+# Units are added with register_unit, which keeps the tables below up to date.
+# UNITS is ordered by tile size.
+UNITS = []
 
 # actual size of tiles. In meters.
-TILE_SIZES = {
-    "100m": 100,
-    "250m": 250,
-    "1km": 1000,
-    "10km": 10000,
-    "50km": 50000,
-    "100km": 100000,
-}
+TILE_SIZES = {}
 
 # zeros needed to convert N/E in tile name to full coordinate values.
-TILE_FACTORS = {
-    "100m": 100,
-    "250m": 10,
-    "1km": 1000,
-    "10km": 10000,
-    "50km": 10000,
-    "100km": 100000,
-}
-
-REGEX = {
-    "100m": "100m_[0-9]{5}_[0-9]{4}",
-    "250m": "250m_[0-9]{6}_[0-9]{5}",
-    "1km": "1km_[0-9]{4}_[0-9]{3}",
-    "10km": "10km_[0-9]{3}_[0-9]{2}",
-    "50km": "50km_[0-9]{3}_[0-9]{2}",
-    "100km": "100km_[0-9]{2}_[0-9]",
-}
+TILE_FACTORS = {}
+
+REGEX = {}
+
+# number of digits in the northing and easting parts of a tile name.
+NAME_WIDTHS = {}
+
+# Tile keys are 64 bit unsigned integers with the unit index in the upper
+# 8 bits followed by the northing and easting grid indices of the tile.
+KEY_ORDINATE_BITS = 28
+_KEY_ORDINATE_MASK = (1 << KEY_ORDINATE_BITS) - 1
+_KEY_UNIT_SHIFT = 2 * KEY_ORDINATE_BITS
+_MAX_UNITS = 1 << (64 - _KEY_UNIT_SHIFT)
+
+# Precomputed properties of each unit. ratio is the tile size divided by the
+# tile factor, i.e. the step between tile ordinates of neighbouring tiles.
+UnitInfo = namedtuple("UnitInfo", "name, size, factor, ratio, widths, index")
+_UNIT_INFO = {}
+
+# units in the order they were registered. The position of a unit is used as
+# the unit identifier in tile keys, so existing keys stay valid when units
+# are added.
+_KEY_UNITS = []
+_UNIT_INDEX = {}
+_MIN_UNIT_LENGTH = 0
+_MAX_UNIT_LENGTH = 0
+_DIGITS = frozenset("0123456789")
+
+# number of digits in the largest UTM northing and easting.
+_UTM_WIDTHS = (7, 6)
+_MAX_FACTOR = 10 ** (_UTM_WIDTHS[1] - 1)
+
+# WKT polygon of a tile extent, corners are listed clockwise from the lower left.
+_WKT_TEMPLATE = (
+    "POLYGON(({0:.2f} {1:.2f},{0:.2f} {3:.2f},{2:.2f} {3:.2f},"
+    "{2:.2f} {1:.2f},{0:.2f} {1:.2f}))"
+)
 
 TileInfo = namedtuple("TileInfo", "northing, easting, size, unit")
 TileExtent = namedtuple(
@@ -80,6 +97,65 @@ TileExtent = namedtuple(
 )
 
 
+def _add_unit(name, size, factor=None):
+    """
+    Add a unit to the unit tables. See register_unit.
+    """
+    global _MIN_UNIT_LENGTH, _MAX_UNIT_LENGTH
+
+    if not isinstance(name, str) or not name.endswith("m") or "_" in name:
+        raise ValueError("Unit names must end with 'm' and contain no underscores")
+    if name in _UNIT_INFO:
+        raise ValueError("Unit {0} already exists".format(name))
+    for unit in _UNIT_INFO:
+        if unit.endswith(name) or name.endswith(unit):
+            raise ValueError("Unit {0} is ambiguous with {1}".format(name, unit))
+    if int(size) != size or size < 1:
+        raise ValueError("Tile size must be a positive integer")
+    size = int(size)
+    if size in TILE_SIZES.values():
+        raise ValueError("A unit with tile size {0} already exists".format(size))
+    if len(_KEY_UNITS) >= _MAX_UNITS:
+        raise ValueError("No more units can be added")
+
+    if factor is None:
+        # largest power of ten that the tile size is a multiple of
+        factor = 1
+        while size % (factor * 10) == 0 and factor < _MAX_FACTOR:
+            factor *= 10
+    digits = len(str(factor)) - 1
+    if factor != 10 ** digits or factor > _MAX_FACTOR or size % factor != 0:
+        raise ValueError("Tile factor must be a power of ten dividing the tile size")
+
+    widths = (_UTM_WIDTHS[0] - digits, _UTM_WIDTHS[1] - digits)
+    info = UnitInfo(name, size, factor, size // factor, widths, len(_KEY_UNITS))
+
+    _UNIT_INFO[name] = info
+    _UNIT_INDEX[name] = info.index
+    _KEY_UNITS.append(name)
+    TILE_SIZES[name] = size
+    TILE_FACTORS[name] = factor
+    NAME_WIDTHS[name] = widths
+    REGEX[name] = "{0}_[0-9]{{{1}}}_[0-9]{{{2}}}".format(name, *widths)
+    UNITS[:] = sorted(TILE_SIZES, key=TILE_SIZES.get)
+    _MIN_UNIT_LENGTH = min(len(unit) for unit in UNITS)
+    _MAX_UNIT_LENGTH = max(len(unit) for unit in UNITS)
+
+    return info
+
+
+for _name, _size in [
+    ("100m", 100),
+    ("250m", 250),
+    ("1km", 1000),
+    ("10km", 10000),
+    ("50km", 50000),
+    ("100km", 100000),
+]:
+    _add_unit(_name, _size)
+del _name, _size
+
+
 def _reduce_ordinate(ordinate, unit="1km"):
     """
     Reduces UTM ordinate to tile-ordinate.
@@ -94,25 +170,12 @@ def _reduce_ordinate(ordinate, unit="1km"):
     Returns:
         Reduced tile ordinate.
     """
-    reduced = None
     try:
-        tile_res = TILE_SIZES[unit]
-    except:
+        info = _UNIT_INFO[unit]
+    except KeyError:
         raise ValueError("Tile unit not recognised!")
 
-    if math.log10(tile_res) % 1 == 0.0:
-        # resolution is a power of 10. Use integer division.
-        reduced = math.floor(ordinate / tile_res)
-    else:
-        # resolution is not a power of 10. Find ratio between current resolution
-        # and resolution of the parent tile.
-        if tile_res == 50000:
-            reduced = math.floor(ordinate / tile_res) * 5
-
-        if tile_res == 250:
-            reduced = math.floor(ordinate / tile_res) * 25
-
-    return int(reduced)
+    return int(ordinate // info.size) * info.ratio
 
 
 def _enlarge_ordinate(ordinate, unit="1km"):
@@ -130,13 +193,108 @@ def _enlarge_ordinate(ordinate, unit="1km"):
         Enlarged UTM ordinate.
     """
     try:
-        factor = TILE_FACTORS[unit]
-    except:
+        factor = _UNIT_INFO[unit].factor
+    except KeyError:
         raise ValueError("Tile unit not recognised!")
 
     return factor * int(ordinate)
 
 
+def _is_digits(string, width):
+    """
+    Check that string consists of exactly width ASCII digits.
+    """
+    return len(string) == width and _DIGITS.issuperset(string)
+
+
+def _match_ordinates(string, unit, sep):
+    """
+    Match the ordinate part of a tile name.
+
+    Arguments:
+        string:         String containing a tile name.
+        unit:           Unit of the tile name.
+        sep:            Position of the underscore following the unit.
+
+    Returns:
+        End position of the tile name in string, -1 if no match.
+    """
+    n_width, e_width = NAME_WIDTHS[unit]
+    n_end = sep + 1 + n_width
+    end = n_end + 1 + e_width
+
+    if string[n_end : n_end + 1] != "_":
+        return -1
+    if not _is_digits(string[sep + 1 : n_end], n_width):
+        return -1
+    if not _is_digits(string[n_end + 1 : end], e_width):
+        return -1
+
+    return end
+
+
+def _match_name(string):
+    """
+    Match a tile name at the beginning of a string.
+
+    Returns:
+        Tuple with unit and end position of tile name, None if the string
+        does not start with a tile name.
+    """
+    sep = string.find("_", 0, _MAX_UNIT_LENGTH + 1)
+    unit = string[:sep]
+    if sep < 0 or unit not in NAME_WIDTHS:
+        return None
+
+    end = _match_ordinates(string, unit, sep)
+    if end < 0:
+        return None
+
+    return unit, end
+
+
+def _scan_name(string):
+    """
+    Find a tile name in a string.
+
+    The string is scanned once for underscores preceded by a unit
+    descriptor. If tile names of several units are present in the string,
+    the one with the smallest unit is returned.
+
+    Returns:
+        Tuple with start position, end position and unit of the tile name,
+        None if no tile name is found.
+    """
+    best = None
+    sep = string.find("m_", _MIN_UNIT_LENGTH - 1)
+    while sep >= 0:
+        sep += 1
+        for length in range(_MIN_UNIT_LENGTH, min(sep, _MAX_UNIT_LENGTH) + 1):
+            unit = string[sep - length : sep]
+            if unit not in NAME_WIDTHS:
+                continue
+            end = _match_ordinates(string, unit, sep)
+            if end >= 0 and (best is None or TILE_SIZES[unit] < TILE_SIZES[best[2]]):
+                best = (sep - length, end, unit)
+                if unit == UNITS[0]:
+                    return best
+            break
+        sep = string.find("m_", sep)
+
+    return best
+
+
+def _tile_info(name, unit):
+    """
+    Create TileInfo from a tile name known to be valid.
+    """
+    (northing, easting) = name[len(unit) + 1 :].split("_")
+    info = _UNIT_INFO[unit]
+    return TileInfo(
+        info.factor * int(northing), info.factor * int(easting), info.size, unit
+    )
+
+
 def _parse_name(string):
     """
     Converts tile name to northing, easting, tile unit and tile size in meters.
@@ -147,18 +305,33 @@ def _parse_name(string):
     Returns:
       namedtuple with members northing, easting, size and unit
     """
+    match = _scan_name(string)
+    if match is None:
+        raise ValueError("Not a valid tile name!")
 
-    name = tile_name(string)
+    (start, end, unit) = match
+    return _tile_info(string[start:end], unit)
 
-    if not validate_name(name):
-        raise ValueError("Not a valid tile name!")
 
-    (unit, northing, easting) = name.split("_")
-    northing = _enlarge_ordinate(northing, unit)
-    easting = _enlarge_ordinate(easting, unit)
-    size = TILE_SIZES[unit]
+def parse_names(strings):
+    """
+    Parse tile names from an iterable of strings, e.g. filenames.
+
+    Arguments:
+        strings:        Iterable of strings containing tile names.
+
+    Returns:
+        Generator of namedtuples with members northing, easting, size and
+        unit. None is generated for strings without a tile name.
+    """
+    for string in strings:
+        match = _scan_name(string)
+        if match is None:
+            yield None
+            continue
 
-    return TileInfo(northing, easting, size, unit)
+        (start, end, unit) = match
+        yield _tile_info(string[start:end], unit)
 
 
 def name_from_point(northing, easting, unit="1km"):
@@ -184,6 +357,38 @@ def name_from_point(northing, easting, unit="1km"):
     return "{0}_{1}_{2}".format(unit, reduced_northing, reduced_easting)
 
 
+def _check_units(units):
+    """
+    Return units as a set of unit descriptors. All units if units is empty.
+    """
+    if not units:
+        return set(UNITS)
+
+    if isinstance(units, str):
+        units = [units]
+
+    for unit in units:
+        if unit not in TILE_SIZES.keys():
+            raise ValueError("{0} is not a valid kvadratnet unit.".format(unit))
+
+    return set(units)
+
+
+def _valid(name, units, strict):
+    """
+    Check if name is a valid tile name of one of units.
+    """
+    match = _match_name(name)
+    if match is None:
+        return False
+
+    (unit, end) = match
+    if strict and end != len(name):
+        return False
+
+    return unit in units
+
+
 def validate_name(name, units=None, strict=False):
     """
     Check if a tile name is valid.
@@ -197,28 +402,24 @@ def validate_name(name, units=None, strict=False):
     Returns:
         Boolean
     """
+    return _valid(name, _check_units(units), strict)
 
-    if not units:
-        units = TILE_SIZES.keys()
-    else:
-        if isinstance(units, str):
-            units = [units]
-
-    for unit in units:
-        if unit not in TILE_SIZES.keys():
-            raise ValueError("{0} is not a valid kvadratnet unit.".format(unit))
 
-    if strict:
-        begin, end = "^", "$"
-    else:
-        begin, end = "", ""
+def validate_names(names, units=None, strict=False):
+    """
+    Check if tile names are valid.
 
-    for unit in units:
-        expr = "{begin}{expr}{end}".format(begin=begin, expr=REGEX[unit], end=end)
-        if re.match(expr, name):
-            return True
+    Arguments:
+        names:      Iterable of kvadratnet cell identifiers
+        units:      Unit descriptor or list of unit descriptors to validate against
+        strict:     When True names are only valid if the are an exact match,
+                    i.e. '1km_6234_423' and not 'DTM_1km_6234_423.tif'
 
-    return False
+    Returns:
+        List of booleans, one for each name.
+    """
+    units = _check_units(units)
+    return [_valid(name, units, strict) for name in names]
 
 
 def tile_name(string):
@@ -235,12 +436,12 @@ def tile_name(string):
         ValueError:     If a tile name identifier was not detected
                         a ValueError exception is raised.
     """
-    for expr in REGEX.values():
-        match = re.search(expr, string)
-        if match:
-            return match.group()
+    match = _scan_name(string)
+    if match is None:
+        raise ValueError("Tile name identier not detected in string")
 
-    raise ValueError("Tile name identier not detected in string")
+    (start, end, _) = match
+    return string[start:end]
 
 
 def extent_from_name(name):
@@ -253,10 +454,12 @@ def extent_from_name(name):
     Returns:
         namedtuple with members min_easting, min_northing, max_easting, max_northing
     """
-    if not validate_name(name):
+    match = _match_name(name)
+    if match is None:
         raise ValueError("Not a valid tile name: {name}".format(name=name))
 
-    tile = _parse_name(name)
+    (unit, end) = match
+    tile = _tile_info(name[:end], unit)
 
     return TileExtent(
         tile.easting, tile.northing, tile.easting + tile.size, tile.northing + tile.size
@@ -273,17 +476,14 @@ def wkt_from_name(name):
     Returns:
         WKT polygon with the extent of the input tile.
     """
-    # pylint: disable=invalid-name
-    # dx and dy seems quite sensible here...
-
-    extent = extent_from_name(name)
+    return _wkt_from_extent(extent_from_name(name))
 
-    wkt = "POLYGON(("
-    for dx, dy in ((0, 0), (0, 1), (1, 1), (1, 0)):
-        wkt += "{0:.2f} {1:.2f},".format(extent[2 * dx], extent[2 * dy + 1])
-    wkt += "{0:.2f} {1:.2f}))".format(extent[0], extent[1])
 
-    return wkt
+def _wkt_from_extent(extent):
+    """
+    Create a wkt-polygon from a tile extent.
+    """
+    return _WKT_TEMPLATE.format(*extent)
 
 
 def parent_tile(name, parent_unit=""):
@@ -344,10 +544,12 @@ def tile_to_index(name, northing_origin, easting_origin):
     Returns:
         2D-index (northing, easting)
     """
-    if not validate_name(name):
+    match = _match_name(name)
+    if match is None:
         raise ValueError("Invalid tile name")
 
-    tile = _parse_name(name)
+    (unit, end) = match
+    tile = _tile_info(name[:end], unit)
 
     # round origin to nearest multiple of tile unit
     easting_rounded = round(easting_origin / tile.size) * tile.size
@@ -357,3 +559,910 @@ def tile_to_index(name, northing_origin, easting_origin):
     idy = (northing_rounded - tile.northing) / tile.size
 
     return idy, idx
+
+
+def _pack_key(unit, row, column):
+    """
+    Pack unit and grid indices of a tile into a tile key.
+    """
+    if not 0 <= row <= _KEY_ORDINATE_MASK or not 0 <= column <= _KEY_ORDINATE_MASK:
+        raise ValueError("Tile ordinates out of range for tile key")
+
+    return (_UNIT_INDEX[unit] << _KEY_UNIT_SHIFT) | (row << KEY_ORDINATE_BITS) | column
+
+
+def _unpack_key(key):
+    """
+    Unpack tile key into unit and grid indices of the tile.
+    """
+    key = int(key)
+    if key < 0 or key >= 1 << 64:
+        raise ValueError("Not a valid tile key: {key}".format(key=key))
+    try:
+        unit = _KEY_UNITS[key >> _KEY_UNIT_SHIFT]
+    except IndexError:
+        raise ValueError("Not a valid tile key: {key}".format(key=key))
+
+    row = (key >> KEY_ORDINATE_BITS) & _KEY_ORDINATE_MASK
+    column = key & _KEY_ORDINATE_MASK
+
+    return unit, row, column
+
+
+def encode(northing, easting, unit="1km"):
+    """
+    Return key of the tile that contains (northing, easting).
+
+    A tile key is an unsigned 64 bit integer that packs the unit and
+    position of a tile. Keys sort by unit first, then by northing and
+    easting.
+
+    Arguments:
+        northing:       y-coordinate of point
+        easting:        x-coordinate of point
+        unit:           Unit of tile. Defaults to 1km.
+
+    Returns:
+        Tile key.
+    """
+    if unit not in TILE_SIZES:
+        raise ValueError("Tile size not regocnized")
+
+    if northing < 0 or easting < 0:
+        raise ValueError("Only positive Northing or Easting accepted")
+
+    size = TILE_SIZES[unit]
+    return _pack_key(unit, int(northing // size), int(easting // size))
+
+
+def decode(key):
+    """
+    Converts tile key to northing, easting, tile unit and tile size in meters.
+
+    Arguments:
+        key:            Tile key.
+
+    Returns:
+        namedtuple with members northing, easting, size and unit
+    """
+    unit, row, column = _unpack_key(key)
+    size = TILE_SIZES[unit]
+
+    return TileInfo(row * size, column * size, size, unit)
+
+
+def key_from_name(name):
+    """
+    Convert tile name to tile key.
+
+    Arguments:
+        name:           String containing a tile name.
+
+    Returns:
+        Tile key.
+    """
+    tile = _parse_name(name)
+    return encode(tile.northing, tile.easting, tile.unit)
+
+
+def name_from_key(key):
+    """
+    Convert tile key to tile name.
+
+    Arguments:
+        key:            Tile key.
+
+    Returns:
+        Tile name.
+    """
+    tile = decode(key)
+    return name_from_point(tile.northing, tile.easting, tile.unit)
+
+
+def extent_from_key(key):
+    """
+    Return bounding box of tile.
+
+    Arguments:
+        key:        Tile key.
+
+    Returns:
+        namedtuple with members min_easting, min_northing, max_easting, max_northing
+    """
+    tile = decode(key)
+
+    return TileExtent(
+        tile.easting, tile.northing, tile.easting + tile.size, tile.northing + tile.size
+    )
+
+
+def parent_key(key, parent_unit=""):
+    """
+    Return key of parent tile.
+
+    Arguments:
+        key:            Key of child tile.
+        parent_unit:    Unit of the parent tile, must be large than
+                        unit of child tile. Optional.
+
+    Returns:
+       Key of parent tile.
+
+    Raises:
+        ValueError:     When a tile has not parent or when the tile is
+                        larger than the request parent.
+    """
+    tile = decode(key)
+    if parent_unit == "":
+        try:
+            parent_unit = UNITS[UNITS.index(tile.unit) + 1]
+        except IndexError:
+            raise ValueError("{tile} has no parent tile.".format(tile=key))
+
+    if TILE_SIZES[tile.unit] >= TILE_SIZES[parent_unit]:
+        raise ValueError("Child tile unit is larger than or equal to child unit")
+
+    return encode(tile.northing, tile.easting, parent_unit)
+
+
+def key_to_index(key, northing_origin, easting_origin):
+    """
+    Create indices from tile key.
+
+    Same as tile_to_index but returns integer indices.
+
+    Arguments:
+        key:                Tile key
+        northing_origin:    Northing coordinate of index origin.
+        easting_origin:     Easting coordinate of index origin.
+
+    Returns:
+        2D-index (northing, easting)
+    """
+    unit, row, column = _unpack_key(key)
+    size = TILE_SIZES[unit]
+
+    idx = column - round(easting_origin / size)
+    idy = round(northing_origin / size) - row
+
+    return idy, idx
+
+
+def _spread_bits(value):
+    """
+    Spread the lower 32 bits of value to the even bits of a 64 bit integer.
+    """
+    value &= 0xFFFFFFFF
+    value = (value | (value << 16)) & 0x0000FFFF0000FFFF
+    value = (value | (value << 8)) & 0x00FF00FF00FF00FF
+    value = (value | (value << 4)) & 0x0F0F0F0F0F0F0F0F
+    value = (value | (value << 2)) & 0x3333333333333333
+    value = (value | (value << 1)) & 0x5555555555555555
+    return value
+
+
+def morton_key(tile):
+    """
+    Return the Morton (Z-order) key of a tile.
+
+    Sorting tiles by Morton key keeps tiles that are close to each other
+    close together in the sorted order. Tiles are ordered by unit first.
+
+    Arguments:
+        tile:       Tile name, tile key or Tile.
+
+    Returns:
+        Integer with the unit index in the upper 8 bits followed by the
+        interleaved bits of the row and column of the tile.
+    """
+    key = _as_key(tile)
+    unit_index = key >> _KEY_UNIT_SHIFT
+    row = (key >> KEY_ORDINATE_BITS) & _KEY_ORDINATE_MASK
+    column = key & _KEY_ORDINATE_MASK
+
+    return (
+        (unit_index << _KEY_UNIT_SHIFT)
+        | (_spread_bits(row) << 1)
+        | _spread_bits(column)
+    )
+
+
+def hilbert_key(tile):
+    """
+    Return the Hilbert curve key of a tile.
+
+    The Hilbert curve preserves locality better than the Morton order:
+    consecutive tiles along the curve are always neighbours. Tiles are
+    ordered by unit first.
+
+    Arguments:
+        tile:       Tile name, tile key or Tile.
+
+    Returns:
+        Integer with the unit index in the upper 8 bits followed by the
+        distance of the tile along a Hilbert curve covering the tile grid.
+    """
+    key = _as_key(tile)
+    unit_index = key >> _KEY_UNIT_SHIFT
+    y = (key >> KEY_ORDINATE_BITS) & _KEY_ORDINATE_MASK
+    x = key & _KEY_ORDINATE_MASK
+
+    distance = 0
+    s = 1 << (KEY_ORDINATE_BITS - 1)
+    while s > 0:
+        rx = 1 if x & s else 0
+        ry = 1 if y & s else 0
+        distance += s * s * ((3 * rx) ^ ry)
+        # rotate the quadrant so the curve continues in the right direction
+        if ry == 0:
+            if rx == 1:
+                x ^= _KEY_ORDINATE_MASK
+                y ^= _KEY_ORDINATE_MASK
+            x, y = y, x
+        s >>= 1
+
+    return (unit_index << _KEY_UNIT_SHIFT) | distance
+
+
+def _child_range(key, unit):
+    """
+    Return inclusive ranges of grid rows and columns of tiles of unit that
+    have their lower left corner in the tile with key.
+
+    Returns:
+        Tuple (first row, last row, first column, last column)
+    """
+    if unit not in TILE_SIZES:
+        raise ValueError("Tile unit not recognised!")
+
+    parent_unit, row, column = _unpack_key(key)
+    parent_size = TILE_SIZES[parent_unit]
+    size = TILE_SIZES[unit]
+    if size >= parent_size:
+        raise ValueError("Child tile unit is larger than or equal to parent unit")
+
+    # ceiling division of the lower left and upper right corner of the parent
+    return (
+        -(-row * parent_size // size),
+        -(-(row + 1) * parent_size // size) - 1,
+        -(-column * parent_size // size),
+        -(-(column + 1) * parent_size // size) - 1,
+    )
+
+
+def _grid_keys(unit, grid_range):
+    """
+    Generate keys of tiles of unit within an inclusive range of grid rows
+    and columns. Keys are generated in ascending order.
+    """
+    first_row, last_row, first_column, last_column = grid_range
+    for row in range(first_row, last_row + 1):
+        for column in range(first_column, last_column + 1):
+            yield _pack_key(unit, row, column)
+
+
+def _child_keys(key, unit):
+    """
+    Generate keys of tiles of unit that have their lower left corner in
+    the tile with key. Keys are generated in ascending order.
+    """
+    return _grid_keys(unit, _child_range(key, unit))
+
+
+def _child_unit(unit):
+    """
+    Return the unit below unit in UNITS.
+    """
+    index = UNITS.index(unit)
+    if index == 0:
+        raise ValueError("{unit} tiles have no child tiles.".format(unit=unit))
+    return UNITS[index - 1]
+
+
+def children(name, unit=None, keys=False):
+    """
+    Generate child tiles of a tile.
+
+    Child tiles are the tiles of a smaller unit that have their lower left
+    corner within the parent tile, i.e. the tiles for which parent_tile
+    returns the parent tile. Tiles are generated lazily, row by row from
+    south to north.
+
+    Arguments:
+        name:       Name or key of parent tile.
+        unit:       Unit of child tiles, must be smaller than unit of
+                    parent tile. Defaults to the next smaller unit.
+        keys:       Generate tile keys instead of tile names.
+
+    Returns:
+        Generator of child tile names or keys.
+
+    Raises:
+        ValueError:     When unit is larger than or equal to the parent
+                        unit or the parent tile has no children.
+    """
+    key = _as_key(name)
+    if unit is None:
+        unit = _child_unit(_KEY_UNITS[key >> _KEY_UNIT_SHIFT])
+
+    child_keys = _child_keys(key, unit)
+    if keys:
+        return child_keys
+    return (name_from_key(child_key) for child_key in child_keys)
+
+
+def neighbors(tile, ring=1, keys=False):
+    """
+    Return the tiles surrounding a tile.
+
+    Arguments:
+        tile:       Name, key or Tile.
+        ring:       Number of tiles to extend in each direction. 1 returns
+                    the 8 tiles sharing an edge or corner with tile, 2 the
+                    24 tiles within two tiles of it, etc.
+        keys:       Return tile keys instead of tile names.
+
+    Returns:
+        List of tile names or keys of the same unit as tile, row by row from
+        the south west corner. Tiles outside the tile grid are left out.
+
+    Raises:
+        ValueError:     If ring is smaller than 1.
+    """
+    if ring < 1:
+        raise ValueError("ring must be at least 1")
+
+    unit, row, column = _unpack_key(_as_key(tile))
+    neighbor_keys = [
+        _pack_key(unit, neighbor_row, neighbor_column)
+        for neighbor_row in range(
+            max(0, row - ring), min(_KEY_ORDINATE_MASK, row + ring) + 1
+        )
+        for neighbor_column in range(
+            max(0, column - ring), min(_KEY_ORDINATE_MASK, column + ring) + 1
+        )
+        if neighbor_row != row or neighbor_column != column
+    ]
+    if keys:
+        return neighbor_keys
+    return [name_from_key(key) for key in neighbor_keys]
+
+
+def tiles_in_extent(extent, unit="1km", keys=False):
+    """
+    Generate tiles of unit that intersect a bounding box.
+
+    Tiles are generated lazily, row by row from south to north.
+
+    Arguments:
+        extent:     Bounding box (min_easting, min_northing, max_easting, max_northing)
+        unit:       Unit of tiles. Defaults to 1km.
+        keys:       Generate tile keys instead of tile names.
+
+    Returns:
+        Generator of tile names or keys.
+    """
+    if unit not in TILE_SIZES:
+        raise ValueError("Tile unit not recognised!")
+
+    tile_keys = _grid_keys(unit, _grid_range(extent, TILE_SIZES[unit]))
+    if keys:
+        return tile_keys
+    return (name_from_key(key) for key in tile_keys)
+
+
+# functions whose results are cached when the cache is enabled
+CACHED_FUNCTIONS = [
+    "_parse_name",
+    "tile_name",
+    "extent_from_name",
+    "wkt_from_name",
+    "parent_tile",
+    "key_from_name",
+]
+_UNCACHED = {name: globals()[name] for name in CACHED_FUNCTIONS}
+
+
+def enable_cache(maxsize=4096):
+    """
+    Cache results of the functions in CACHED_FUNCTIONS.
+
+    Useful when the same tile names are parsed over and over. Each function
+    gets its own cache, from which the least recently used results are
+    evicted. Enabling the cache again replaces the existing caches.
+
+    Arguments:
+        maxsize:        Maximum number of results cached per function.
+
+    Raises:
+        ValueError:     If maxsize is not positive.
+    """
+    if maxsize is None or maxsize < 1:
+        raise ValueError("maxsize must be positive")
+
+    module = globals()
+    for name in CACHED_FUNCTIONS:
+        module[name] = functools.lru_cache(maxsize=maxsize)(_UNCACHED[name])
+
+
+def disable_cache():
+    """
+    Disable the cache and discard cached results.
+    """
+    globals().update(_UNCACHED)
+
+
+def cache_info():
+    """
+    Return statistics of the caches.
+
+    Returns:
+        dict with a namedtuple with members hits, misses, maxsize and
+        currsize for each cached function. Empty if the cache is disabled.
+    """
+    module = globals()
+    return {
+        name: module[name].cache_info()
+        for name in CACHED_FUNCTIONS
+        if hasattr(module[name], "cache_info")
+    }
+
+
+def clear_cache():
+    """
+    Discard cached results, keeping the cache enabled.
+    """
+    module = globals()
+    for name in CACHED_FUNCTIONS:
+        if hasattr(module[name], "cache_clear"):
+            module[name].cache_clear()
+
+
+def register_unit(name, size, factor=None):
+    """
+    Register a new tile unit, e.g. a 500m or 20km grid.
+
+    The unit can be used with all functions in kvadratnet as soon as it is
+    registered. Tile names of the new unit have the same form as the
+    builtin units: the unit name followed by the northing and easting of
+    the lower left corner divided by the tile factor, e.g. 500m_62237_5755.
+    Tile keys of existing units are not changed by registering a unit.
+
+    Arguments:
+        name:       Name of unit, e.g. "500m". Must end with "m".
+        size:       Side length of tiles. In meters.
+        factor:     Power of ten that ordinates in tile names are multiplied
+                    by. Defaults to the largest power of ten that size is a
+                    multiple of.
+
+    Returns:
+        UnitInfo with the precomputed properties of the unit.
+
+    Raises:
+        ValueError:     If the unit already exists, the name is ambiguous with
+                        an existing unit or factor does not divide size.
+    """
+    info = _add_unit(name, size, factor)
+    # cached results may be stale now that new tile names are recognised
+    clear_cache()
+    return info
+
+
+@functools.total_ordering
+class Tile(object):
+    """
+    A tile in the kvadratnet.
+
+    Tiles are immutable, hashable and sort in the same order as their tile
+    keys. Derived properties are computed when first accessed and cached.
+
+    Tiles can be interned, in which case equal tiles are represented by the
+    same instance as long as a reference to it exists. Parent and child
+    tiles are always interned.
+
+    Example:
+        >>> tile = Tile("dtm_1km_6223_575.tif")
+        >>> tile.parent
+        Tile('10km_622_57')
+    """
+
+    _CACHED = ("_name", "_extent", "_wkt", "_parent", "_children")
+    __slots__ = ("key", "__weakref__") + _CACHED
+
+    _interned = weakref.WeakValueDictionary()
+
+    def __new__(cls, name, intern=False):
+        return cls.from_key(key_from_name(name), intern)
+
+    @classmethod
+    def from_key(cls, key, intern=False):
+        """
+        Create tile from tile key.
+
+        Arguments:
+            key:        Tile key.
+            intern:     Return the existing instance of the tile if there is one.
+
+        Returns:
+            Tile
+        """
+        key = int(key)
+        if intern:
+            tile = cls._interned.get(key)
+            if tile is not None:
+                return tile
+
+        _unpack_key(key)
+        tile = object.__new__(cls)
+        object.__setattr__(tile, "key", key)
+        for attr in cls._CACHED:
+            object.__setattr__(tile, attr, None)
+
+        if intern:
+            tile = cls._interned.setdefault(key, tile)
+
+        return tile
+
+    @classmethod
+    def from_point(cls, northing, easting, unit="1km", intern=False):
+        """
+        Create tile that contains (northing, easting).
+
+        Arguments:
+            northing:       y-coordinate of point
+            easting:        x-coordinate of point
+            unit:           Unit of tile. Defaults to 1km.
+            intern:         Return the existing instance of the tile if there is one.
+
+        Returns:
+            Tile
+        """
+        return cls.from_key(encode(northing, easting, unit), intern)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Tile objects are immutable")
+
+    def __delattr__(self, name):
+        raise AttributeError("Tile objects are immutable")
+
+    def __reduce__(self):
+        return (self.__class__.from_key, (self.key,))
+
+    def __hash__(self):
+        return hash(self.key)
+
+    def __eq__(self, other):
+        if not isinstance(other, Tile):
+            return NotImplemented
+        return self.key == other.key
+
+    def __lt__(self, other):
+        if not isinstance(other, Tile):
+            return NotImplemented
+        return self.key < other.key
+
+    def __repr__(self):
+        return "Tile('{0}')".format(self.name)
+
+    def __str__(self):
+        return self.name
+
+    @property
+    def unit(self):
+        """Unit of tile."""
+        return _KEY_UNITS[self.key >> _KEY_UNIT_SHIFT]
+
+    @property
+    def size(self):
+        """Side length of tile. In meters."""
+        return TILE_SIZES[self.unit]
+
+    @property
+    def northing(self):
+        """Northing of lower left corner of tile."""
+        return ((self.key >> KEY_ORDINATE_BITS) & _KEY_ORDINATE_MASK) * self.size
+
+    @property
+    def easting(self):
+        """Easting of lower left corner of tile."""
+        return (self.key & _KEY_ORDINATE_MASK) * self.size
+
+    @property
+    def name(self):
+        """Name of tile."""
+        if self._name is None:
+            object.__setattr__(self, "_name", name_from_key(self.key))
+        return self._name
+
+    @property
+    def extent(self):
+        """Bounding box of tile as a TileExtent."""
+        if self._extent is None:
+            object.__setattr__(self, "_extent", extent_from_key(self.key))
+        return self._extent
+
+    @property
+    def wkt(self):
+        """WKT polygon with the extent of the tile."""
+        if self._wkt is None:
+            object.__setattr__(self, "_wkt", _wkt_from_extent(self.extent))
+        return self._wkt
+
+    @property
+    def parent(self):
+        """
+        Parent tile in the next larger unit. None if the tile has no parent.
+        """
+        if self._parent is None and self.unit != UNITS[-1]:
+            parent = Tile.from_key(parent_key(self.key), intern=True)
+            object.__setattr__(self, "_parent", parent)
+        return self._parent
+
+    @property
+    def children(self):
+        """
+        Tuple of child tiles in the next smaller unit, i.e. tiles that have
+        their lower left corner within this tile. Empty for the smallest unit.
+        """
+        if self._children is None:
+            index = UNITS.index(self.unit)
+            children = ()
+            if index > 0:
+                children = tuple(
+                    Tile.from_key(key, intern=True)
+                    for key in _child_keys(self.key, UNITS[index - 1])
+                )
+            object.__setattr__(self, "_children", children)
+        return self._children
+
+
+def _as_key(tile):
+    """
+    Return tile key of a tile given as a key, a Tile or a string with a tile name.
+    """
+    if isinstance(tile, Tile):
+        return tile.key
+    if isinstance(tile, str):
+        return key_from_name(tile)
+    return int(tile)
+
+
+def _grid_range(extent, size):
+    """
+    Return inclusive ranges of grid rows and columns of tiles with the given
+    size that intersect extent.
+
+    Arguments:
+        extent:     Bounding box (min_easting, min_northing, max_easting, max_northing)
+        size:       Tile size in meters.
+
+    Returns:
+        Tuple (first row, last row, first column, last column)
+    """
+    min_easting, min_northing, max_easting, max_northing = extent
+    if min_easting > max_easting or min_northing > max_northing:
+        raise ValueError("Invalid extent: {0}".format(extent))
+
+    first_row = max(0, int(math.floor(min_northing / size)))
+    first_column = max(0, int(math.floor(min_easting / size)))
+    last_row = max(first_row, int(math.ceil(max_northing / size)) - 1)
+    last_column = max(first_column, int(math.ceil(max_easting / size)) - 1)
+
+    return first_row, last_row, first_column, last_column
+
+
+# orders supported by sort_tiles. "row" sorts by tile key, i.e. row by row.
+ORDERS = ["hilbert", "morton", "row"]
+_ORDER_KEYS = {"hilbert": hilbert_key, "morton": morton_key, "row": _as_key}
+
+
+def sort_tiles(tiles, order="hilbert"):
+    """
+    Sort tiles so that tiles close to each other are close in the result.
+
+    Useful for scheduling processing of tiles so that neighbouring tiles are
+    handled together, which helps disk and raster caches.
+
+    Arguments:
+        tiles:      Iterable of tile names, tile keys or Tiles.
+        order:      One of ORDERS. Defaults to hilbert.
+
+    Returns:
+        List with the tiles sorted.
+
+    Raises:
+        ValueError:     If order is unknown.
+    """
+    try:
+        sort_key = _ORDER_KEYS[order]
+    except KeyError:
+        raise ValueError("Unknown order: {0}".format(order))
+
+    return sorted(tiles, key=sort_key)
+
+
+class TileSet(object):
+    """
+    A set of tiles, indexed by unit and grid position.
+
+    Tiles can be added as tile names, tile keys or Tile objects and are
+    stored as tile keys. Membership tests are O(1), and bounding box
+    queries only visit the rows and tiles within the bounding box.
+
+    Iteration generates tile keys ordered by unit, northing and easting.
+
+    Example:
+        >>> tiles = TileSet(["1km_6223_575", "1km_6223_576", "10km_622_57"])
+        >>> "1km_6223_575" in tiles
+        True
+        >>> keys = tiles.query((575500, 6223500, 576500, 6223600), "1km")
+        >>> [name_from_key(key) for key in keys]
+        ['1km_6223_575', '1km_6223_576']
+    """
+
+    def __init__(self, tiles=()):
+        self._keys = set()
+        self._grid = {}  # unit -> {row: set of columns}
+        self._sorted = {}  # unit -> (sorted rows, {row: sorted columns})
+        self.update(tiles)
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __contains__(self, tile):
+        try:
+            return _as_key(tile) in self._keys
+        except ValueError:
+            return False
+
+    def __iter__(self):
+        for unit in UNITS:
+            if unit not in self._grid:
+                continue
+            rows, columns = self._sorted_grid(unit)
+            for row in rows:
+                for column in columns[row]:
+                    yield _pack_key(unit, row, column)
+
+    def __repr__(self):
+        return "TileSet({0})".format(self.counts())
+
+    def add(self, tile):
+        """
+        Add tile to set.
+
+        Arguments:
+            tile:       Tile name, tile key or Tile.
+        """
+        key = _as_key(tile)
+        if key in self._keys:
+            return
+
+        unit, row, column = _unpack_key(key)
+        self._keys.add(key)
+        self._grid.setdefault(unit, {}).setdefault(row, set()).add(column)
+        self._sorted.pop(unit, None)
+
+    def update(self, tiles):
+        """
+        Add tiles to set.
+
+        Arrays of tile keys, e.g. from kvadratnet.batch, are added a grid
+        row at a time, which is much faster than adding the tiles one by one.
+
+        Arguments:
+            tiles:      Array of tile keys or iterable of tile names, tile
+                        keys or Tiles.
+        """
+        dtype = getattr(tiles, "dtype", None)
+        if dtype is not None and dtype.kind in "ui":
+            self._update_keys(tiles)
+            return
+
+        for tile in tiles:
+            self.add(tile)
+
+    def _update_keys(self, keys):
+        """
+        Add an array of tile keys to set.
+        """
+        # imported here so numpy is only needed when adding key arrays
+        from kvadratnet import batch
+
+        keys, grid_rows = batch._grid_rows(batch._as_keys(keys))
+        for unit_id, row, columns in grid_rows:
+            unit = _KEY_UNITS[unit_id]
+            self._grid.setdefault(unit, {}).setdefault(row, set()).update(columns)
+            self._sorted.pop(unit, None)
+        self._keys.update(keys.tolist())
+
+    def discard(self, tile):
+        """
+        Remove tile from set if it is present.
+
+        Arguments:
+            tile:       Tile name, tile key or Tile.
+        """
+        key = _as_key(tile)
+        if key not in self._keys:
+            return
+
+        unit, row, column = _unpack_key(key)
+        self._keys.remove(key)
+        rows = self._grid[unit]
+        rows[row].remove(column)
+        if not rows[row]:
+            del rows[row]
+        if not rows:
+            del self._grid[unit]
+        self._sorted.pop(unit, None)
+
+    def units(self):
+        """
+        Return list of units present in set, ordered from small to large.
+        """
+        return [unit for unit in UNITS if unit in self._grid]
+
+    def count(self, unit):
+        """
+        Return number of tiles of unit in set.
+        """
+        return sum(len(columns) for columns in self._grid.get(unit, {}).values())
+
+    def counts(self):
+        """
+        Return dict with the number of tiles of each unit in set.
+        """
+        return {unit: self.count(unit) for unit in self.units()}
+
+    def names(self):
+        """
+        Generate names of the tiles in set, in the same order as iteration.
+        """
+        for key in self:
+            yield name_from_key(key)
+
+    def query(self, extent, unit=None):
+        """
+        Generate keys of tiles in set that intersect a bounding box.
+
+        Arguments:
+            extent:     Bounding box (min_easting, min_northing, max_easting, max_northing)
+            unit:       Only return tiles of this unit. Optional.
+
+        Returns:
+            Generator of tile keys ordered by unit, northing and easting.
+        """
+        if unit is not None and unit not in TILE_SIZES:
+            raise ValueError("Tile unit not recognised!")
+
+        units = self.units() if unit is None else [unit]
+        for query_unit in units:
+            if query_unit not in self._grid:
+                continue
+
+            first_row, last_row, first_column, last_column = _grid_range(
+                extent, TILE_SIZES[query_unit]
+            )
+            rows, columns = self._sorted_grid(query_unit)
+            start = bisect.bisect_left(rows, first_row)
+            stop = bisect.bisect_right(rows, last_row)
+            for row in rows[start:stop]:
+                row_columns = columns[row]
+                first = bisect.bisect_left(row_columns, first_column)
+                last = bisect.bisect_right(row_columns, last_column)
+                for column in row_columns[first:last]:
+                    yield _pack_key(query_unit, row, column)
+
+    def _sorted_grid(self, unit):
+        """
+        Return sorted rows and columns of tiles of unit. Cached until the
+        tiles of unit are changed.
+        """
+        if unit not in self._sorted:
+            grid = self._grid[unit]
+            self._sorted[unit] = (
+                sorted(grid),
+                {row: sorted(columns) for row, columns in grid.items()},
+            )
+        return self._sorted[unit]
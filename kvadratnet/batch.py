@@ -0,0 +1,948 @@
+"""
+Vectorized kvadratnet functions operating on NumPy arrays.
+
+The functions in this module mirror their scalar counterparts in the
+kvadratnet module but work on whole arrays at a time, using exact
+integer arithmetic throughout.
+"""
+
+from collections import namedtuple
+
+import numpy as np
+
+import kvadratnet as kn
+
+CoverageReport = namedtuple("CoverageReport", "missing, extra, duplicates")
+PointBins = namedtuple("PointBins", "keys, counts, offsets, order")
+MosaicLayout = namedtuple(
+    "MosaicLayout", "keys, geotransform, shape, rows, columns, heights, widths"
+)
+
+
+def _check_unit(unit):
+    """
+    Raise a ValueError if unit is not a known tile unit.
+    """
+    if unit not in kn.TILE_SIZES:
+        raise ValueError("Tile unit not recognised!")
+
+
+def _as_integer_ordinates(ordinates):
+    """
+    Convert array-like of UTM ordinates to an int64 array.
+
+    Floating point ordinates are floored before conversion so that the
+    result is identical to reducing the ordinates with true division.
+
+    Raises:
+        ValueError:     If any ordinate is negative.
+    """
+    ordinates = np.asarray(ordinates)
+    if ordinates.dtype.kind == "f":
+        ordinates = np.floor(ordinates)
+    ordinates = ordinates.astype(np.int64)
+
+    if ordinates.size and ordinates.min() < 0:
+        raise ValueError("Only positive Northing or Easting accepted")
+
+    return ordinates
+
+
+def _reduce_ordinates(ordinates, unit):
+    """
+    Reduce an int64 array of UTM ordinates to tile ordinates.
+
+    Tile ordinates are the grid index of the tile multiplied by the ratio
+    between tile size and tile factor, e.g. 1 for 1km and 25 for 250m.
+    """
+    info = kn._UNIT_INFO[unit]
+    return (ordinates // info.size) * info.ratio
+
+
+def reduced_from_points(northings, eastings, unit="1km"):
+    """
+    Reduce arrays of UTM coordinates to tile ordinates.
+
+    Vectorized version of kvadratnet._reduce_ordinate.
+
+    Arguments:
+        northings:      Array-like of y-coordinates.
+        eastings:       Array-like of x-coordinates.
+        unit:           Tile unit. Defaults to 1km.
+
+    Returns:
+        Tuple of int64 arrays (reduced northings, reduced eastings).
+
+    Raises:
+        ValueError:     If the unit is unknown or coordinates are negative.
+    """
+    _check_unit(unit)
+    northings, eastings = np.broadcast_arrays(
+        _as_integer_ordinates(northings), _as_integer_ordinates(eastings)
+    )
+
+    return _reduce_ordinates(northings, unit), _reduce_ordinates(eastings, unit)
+
+
+def names_from_points(northings, eastings, unit="1km"):
+    """
+    Return names of the tiles containing each (northing, easting) pair.
+
+    Vectorized version of kvadratnet.name_from_point.
+
+    Arguments:
+        northings:      Array-like of y-coordinates.
+        eastings:       Array-like of x-coordinates.
+        unit:           Unit of output tile names. Defaults to 1km.
+
+    Returns:
+        NumPy string array of tile names.
+
+    Raises:
+        ValueError:     If the unit is unknown or coordinates are negative.
+    """
+    reduced_northings, reduced_eastings = reduced_from_points(northings, eastings, unit)
+
+    names = np.char.add(unit + "_", reduced_northings.astype(str))
+    names = np.char.add(names, "_")
+    return np.char.add(names, reduced_eastings.astype(str))
+
+
+def _unit_table(table):
+    """
+    Return an int64 array with the values of table indexed by unit id.
+    """
+    return np.array([table[unit] for unit in kn._KEY_UNITS], dtype=np.int64)
+
+
+def _parent_unit_ids():
+    """
+    Return an int64 array with the unit id of the next larger unit indexed
+    by unit id. -1 for the largest unit.
+    """
+    parents = {unit: -1 for unit in kn.UNITS}
+    for unit, parent in zip(kn.UNITS, kn.UNITS[1:]):
+        parents[unit] = kn._UNIT_INDEX[parent]
+    return _unit_table(parents)
+
+
+def _pack_keys(unit_ids, rows, columns):
+    """
+    Pack arrays of unit ids and grid indices into an array of tile keys.
+    """
+    if rows.size and (
+        rows.max() > kn._KEY_ORDINATE_MASK or columns.max() > kn._KEY_ORDINATE_MASK
+    ):
+        raise ValueError("Tile ordinates out of range for tile key")
+
+    keys = np.asarray(unit_ids).astype(np.uint64) << np.uint64(kn._KEY_UNIT_SHIFT)
+    keys |= rows.astype(np.uint64) << np.uint64(kn.KEY_ORDINATE_BITS)
+    keys |= columns.astype(np.uint64)
+
+    return keys
+
+
+def _unpack_keys(keys):
+    """
+    Unpack an array of tile keys into arrays of unit ids and grid indices.
+    """
+    keys = np.asarray(keys, dtype=np.uint64)
+    mask = np.uint64(kn._KEY_ORDINATE_MASK)
+
+    unit_ids = (keys >> np.uint64(kn._KEY_UNIT_SHIFT)).astype(np.int64)
+    if unit_ids.size and unit_ids.max() >= len(kn._KEY_UNITS):
+        raise ValueError("Not a valid tile key")
+
+    rows = ((keys >> np.uint64(kn.KEY_ORDINATE_BITS)) & mask).astype(np.int64)
+    columns = (keys & mask).astype(np.int64)
+
+    return unit_ids, rows, columns
+
+
+def _grid_rows(keys):
+    """
+    Group an array of tile keys by unit and grid row.
+
+    Returns:
+        Tuple with the sorted unique keys and a list of (unit id, row,
+        list of columns) for each grid row with tiles.
+    """
+    keys = np.sort(np.asarray(keys, dtype=np.uint64))
+    if not len(keys):
+        return keys, []
+    keys = keys[np.concatenate(([True], keys[1:] != keys[:-1]))]
+
+    unit_ids, rows, columns = _unpack_keys(keys)
+    starts = np.flatnonzero(np.diff(keys >> np.uint64(kn.KEY_ORDINATE_BITS))) + 1
+    firsts = np.concatenate(([0], starts))
+    row_columns = [part.tolist() for part in np.split(columns, starts)]
+
+    grid_rows = zip(unit_ids[firsts].tolist(), rows[firsts].tolist(), row_columns)
+    return keys, list(grid_rows)
+
+
+def encode(northings, eastings, unit="1km"):
+    """
+    Return keys of the tiles containing each (northing, easting) pair.
+
+    Vectorized version of kvadratnet.encode.
+
+    Arguments:
+        northings:      Array-like of y-coordinates.
+        eastings:       Array-like of x-coordinates.
+        unit:           Unit of tiles. Defaults to 1km.
+
+    Returns:
+        uint64 array of tile keys.
+    """
+    _check_unit(unit)
+    northings, eastings = np.broadcast_arrays(
+        _as_integer_ordinates(northings), _as_integer_ordinates(eastings)
+    )
+    size = kn.TILE_SIZES[unit]
+
+    return _pack_keys(
+        np.full(northings.shape, kn._UNIT_INDEX[unit]),
+        northings // size,
+        eastings // size,
+    )
+
+
+def decode(keys):
+    """
+    Converts tile keys to northings, eastings, tile units and tile sizes.
+
+    Vectorized version of kvadratnet.decode.
+
+    Arguments:
+        keys:           Array-like of tile keys.
+
+    Returns:
+        TileInfo namedtuple of arrays.
+    """
+    unit_ids, rows, columns = _unpack_keys(keys)
+    sizes = _unit_table(kn.TILE_SIZES)[unit_ids]
+
+    return kn.TileInfo(
+        rows * sizes, columns * sizes, sizes, np.array(kn._KEY_UNITS)[unit_ids]
+    )
+
+
+def keys_from_names(names):
+    """
+    Convert tile names to tile keys.
+
+    Arguments:
+        names:          Iterable of strings containing tile names.
+
+    Returns:
+        uint64 array of tile keys.
+
+    Raises:
+        ValueError:     If a string does not contain a tile name.
+    """
+    keys = []
+    for tile in kn.parse_names(names):
+        if tile is None:
+            raise ValueError("Not a valid tile name!")
+        keys.append(kn.encode(tile.northing, tile.easting, tile.unit))
+
+    return np.array(keys, dtype=np.uint64)
+
+
+def names_from_keys(keys):
+    """
+    Convert tile keys to tile names.
+
+    Arguments:
+        keys:           Array-like of tile keys.
+
+    Returns:
+        NumPy string array of tile names.
+    """
+    unit_ids, rows, columns = _unpack_keys(keys)
+    ratios = (_unit_table(kn.TILE_SIZES) // _unit_table(kn.TILE_FACTORS))[unit_ids]
+
+    names = np.char.add(np.array(kn._KEY_UNITS)[unit_ids], "_")
+    names = np.char.add(names, (rows * ratios).astype(str))
+    names = np.char.add(names, "_")
+    return np.char.add(names, (columns * ratios).astype(str))
+
+
+def extents_from_keys(keys):
+    """
+    Return bounding boxes of tiles.
+
+    Vectorized version of kvadratnet.extent_from_key.
+
+    Arguments:
+        keys:           Array-like of tile keys.
+
+    Returns:
+        TileExtent namedtuple of arrays.
+    """
+    tiles = decode(keys)
+
+    return kn.TileExtent(
+        tiles.easting,
+        tiles.northing,
+        tiles.easting + tiles.size,
+        tiles.northing + tiles.size,
+    )
+
+
+def _parent_keys(unit_ids, rows, columns, parent_ids):
+    """
+    Return keys of parent tiles given arrays of unit ids and grid indices
+    of child tiles and unit ids of the parent tiles.
+    """
+    sizes = _unit_table(kn.TILE_SIZES)
+    child_sizes = sizes[unit_ids]
+    parent_sizes = sizes[parent_ids]
+
+    if np.any(child_sizes >= parent_sizes):
+        raise ValueError("Child tile unit is larger than or equal to child unit")
+
+    return _pack_keys(
+        parent_ids,
+        rows * child_sizes // parent_sizes,
+        columns * child_sizes // parent_sizes,
+    )
+
+
+def parent_keys(keys, parent_unit=""):
+    """
+    Return keys of parent tiles.
+
+    Vectorized version of kvadratnet.parent_key.
+
+    Arguments:
+        keys:           Array-like of tile keys.
+        parent_unit:    Unit of the parent tiles, must be larger than unit
+                        of all child tiles. Defaults to the next larger unit
+                        of each tile.
+
+    Returns:
+        uint64 array of parent tile keys.
+
+    Raises:
+        ValueError:     When a tile has no parent or when a tile is larger
+                        than or equal to the parent unit.
+    """
+    unit_ids, rows, columns = _unpack_keys(keys)
+    if parent_unit == "":
+        parent_ids = _parent_unit_ids()[unit_ids]
+        if parent_ids.size and parent_ids.min() < 0:
+            raise ValueError("{0} tiles have no parent tile.".format(kn.UNITS[-1]))
+    else:
+        _check_unit(parent_unit)
+        parent_ids = np.full(unit_ids.shape, kn._UNIT_INDEX[parent_unit])
+
+    return _parent_keys(unit_ids, rows, columns, parent_ids)
+
+
+def _as_keys(tiles):
+    """
+    Return tiles as a uint64 array of tile keys.
+    """
+    if isinstance(tiles, np.ndarray) and tiles.dtype.kind in "ui":
+        return tiles.astype(np.uint64, copy=False)
+    return np.array([kn._as_key(tile) for tile in tiles], dtype=np.uint64)
+
+
+def parents(tiles, parent_unit="", keys=False):
+    """
+    Return parent tiles of tiles.
+
+    Vectorized version of kvadratnet.parent_tile.
+
+    Arguments:
+        tiles:          Array of tile keys or iterable of tile names, tile
+                        keys or Tiles.
+        parent_unit:    Unit of the parent tiles. Defaults to the next
+                        larger unit of each tile.
+        keys:           Return tile keys instead of tile names.
+
+    Returns:
+        Array of parent tile names or keys, one for each tile.
+    """
+    parent = parent_keys(_as_keys(tiles), parent_unit)
+    if keys:
+        return parent
+    return names_from_keys(parent)
+
+
+def count_by_parent(tiles, parent_unit="", keys=False):
+    """
+    Count tiles in each parent tile.
+
+    Arguments:
+        tiles:          Array of tile keys or iterable of tile names, tile
+                        keys or Tiles.
+        parent_unit:    Unit of the parent tiles. Defaults to the next
+                        larger unit of each tile.
+        keys:           Return tile keys instead of tile names.
+
+    Returns:
+        Tuple of arrays (unique parent tiles, number of child tiles). Parents
+        are ordered by tile key, i.e. by unit, northing and easting.
+    """
+    unique, counts = np.unique(
+        parent_keys(_as_keys(tiles), parent_unit), return_counts=True
+    )
+    if keys:
+        return unique, counts
+    return names_from_keys(unique), counts
+
+
+def coverage(tiles, expected=None, extent=None, unit="1km", keys=False):
+    """
+    Compare tiles with the tiles that are expected to be present.
+
+    The expected tiles are given either as a list of tiles or as a bounding
+    box that is covered by tiles of unit. Tiles are compared as integer tile
+    keys, so tile names may have any prefix or postfix.
+
+    Arguments:
+        tiles:      Array of tile keys or iterable of tile names, tile keys
+                    or Tiles.
+        expected:   Array of tile keys or iterable of tile names, tile keys
+                    or Tiles.
+        extent:     Bounding box (min_easting, min_northing, max_easting,
+                    max_northing). Used instead of expected.
+        unit:       Unit of tiles covering extent. Defaults to 1km.
+        keys:       Return tile keys instead of tile names.
+
+    Returns:
+        CoverageReport with sorted arrays of tiles that are missing, tiles
+        that are not expected and tiles that occur more than once.
+
+    Raises:
+        ValueError:     If both or none of expected and extent are given.
+    """
+    if (expected is None) == (extent is None):
+        raise ValueError("Either expected or extent must be given")
+
+    if extent is not None:
+        chunks = list(tiles_in_extent_chunks(extent, unit))
+        expected = np.concatenate(chunks) if chunks else np.empty(0, np.uint64)
+    expected = np.unique(_as_keys(expected))
+
+    unique, counts = np.unique(_as_keys(tiles), return_counts=True)
+    report = CoverageReport(
+        np.setdiff1d(expected, unique, assume_unique=True),
+        np.setdiff1d(unique, expected, assume_unique=True),
+        unique[counts > 1],
+    )
+    if keys:
+        return report
+    return CoverageReport(*(names_from_keys(tile_keys) for tile_keys in report))
+
+
+def _bin_keys(keys, start=0):
+    """
+    Group positions of keys by key. Positions are offset by start.
+    """
+    order = np.argsort(keys, kind="stable")
+    sorted_keys = keys[order]
+    starts = np.flatnonzero(sorted_keys[1:] != sorted_keys[:-1]) + 1
+    offsets = np.concatenate([[0], starts, [len(keys)]]).astype(np.int64)
+    if not len(keys):
+        offsets = offsets[1:]
+
+    return PointBins(
+        sorted_keys[offsets[:-1]], np.diff(offsets), offsets, order + start
+    )
+
+
+def bin_points(northings, eastings, unit="1km"):
+    """
+    Group points by the tile they are in.
+
+    The points are binned by sorting their tile keys, so no Python loop over
+    the points is needed. The result is a CSR style index: the points in
+    tile keys[i] are order[offsets[i]:offsets[i + 1]].
+
+    Arguments:
+        northings:      Array-like of y-coordinates.
+        eastings:       Array-like of x-coordinates.
+        unit:           Unit of tiles. Defaults to 1km.
+
+    Returns:
+        PointBins with arrays of the sorted unique tile keys, the number of
+        points in each tile, the offsets of each tile in order and order,
+        the positions of the points sorted by tile. Points within a tile
+        keep their input order.
+    """
+    return _bin_keys(encode(northings, eastings, unit))
+
+
+def bin_points_chunks(chunks, unit="1km"):
+    """
+    Group points by tile, chunk by chunk.
+
+    Useful for point clouds that are too large to fit in memory.
+
+    Arguments:
+        chunks:         Iterable of (northings, eastings) array pairs.
+        unit:           Unit of tiles. Defaults to 1km.
+
+    Returns:
+        Generator of PointBins, one for each chunk. Positions in order are
+        positions in the whole stream of points, i.e. they are offset by the
+        number of points in earlier chunks.
+    """
+    start = 0
+    for northings, eastings in chunks:
+        keys = encode(northings, eastings, unit)
+        yield _bin_keys(keys, start)
+        start += len(keys)
+
+
+def count_points(chunks, unit="1km"):
+    """
+    Count points in each tile, reading the points chunk by chunk.
+
+    Arguments:
+        chunks:         Iterable of (northings, eastings) array pairs.
+        unit:           Unit of tiles. Defaults to 1km.
+
+    Returns:
+        Tuple of arrays (sorted unique tile keys, number of points).
+    """
+    keys = np.empty(0, dtype=np.uint64)
+    counts = np.empty(0, dtype=np.int64)
+    for bins in bin_points_chunks(chunks, unit):
+        keys, inverse = np.unique(
+            np.concatenate([keys, bins.keys]), return_inverse=True
+        )
+        counts = np.bincount(
+            inverse.ravel(),
+            weights=np.concatenate([counts, bins.counts]),
+            minlength=len(keys),
+        ).astype(np.int64)
+
+    return keys, counts
+
+
+def keys_to_index(keys, northing_origin, easting_origin):
+    """
+    Create indices from tile keys.
+
+    Vectorized version of kvadratnet.key_to_index.
+
+    Arguments:
+        keys:               Array-like of tile keys.
+        northing_origin:    Northing coordinate of index origin.
+        easting_origin:     Easting coordinate of index origin.
+
+    Returns:
+        Tuple of int64 arrays (northing indices, easting indices).
+    """
+    unit_ids, rows, columns = _unpack_keys(keys)
+    sizes = _unit_table(kn.TILE_SIZES)[unit_ids]
+
+    idx = columns - np.round(easting_origin / sizes).astype(np.int64)
+    idy = np.round(northing_origin / sizes).astype(np.int64) - rows
+
+    return idy, idx
+
+
+def tiles_to_index(tiles, northing_origin, easting_origin):
+    """
+    Create integer indices from tiles.
+
+    Vectorized version of kvadratnet.tile_to_index. Unlike tile_to_index
+    the indices are integers.
+
+    Arguments:
+        tiles:              Array of tile keys or iterable of tile names,
+                            tile keys or Tiles.
+        northing_origin:    Northing coordinate of index origin.
+        easting_origin:     Easting coordinate of index origin.
+
+    Returns:
+        Tuple of int64 arrays (northing indices, easting indices).
+    """
+    return keys_to_index(_as_keys(tiles), northing_origin, easting_origin)
+
+
+def _pixels(lengths, resolution):
+    """
+    Convert an int64 array of lengths in meters to whole numbers of pixels.
+    """
+    pixels = np.round(lengths / resolution).astype(np.int64)
+    if not np.allclose(pixels * resolution, lengths, rtol=0, atol=1e-6 * resolution):
+        raise ValueError(
+            "Resolution {0} does not divide tile sizes and offsets".format(resolution)
+        )
+    return pixels
+
+
+def mosaic_layout(tiles, resolution):
+    """
+    Compute the layout of a raster mosaic of tiles.
+
+    The mosaic covers the bounding box of the tiles, with north up and the
+    origin in the top left corner. Each tile is placed in a window of the
+    mosaic given by its pixel offset and size, so a mosaic can be assembled
+    with array slicing:
+
+        >>> layout = mosaic_layout(names, 0.4)
+        >>> mosaic = np.zeros(layout.shape, dtype=np.float32)
+        >>> for i, key in enumerate(layout.keys):
+        ...     row, column = layout.rows[i], layout.columns[i]
+        ...     window = mosaic[row:row + layout.heights[i], column:column + layout.widths[i]]
+
+    Tiles of different units can be mixed.
+
+    Arguments:
+        tiles:          Array of tile keys or iterable of tile names, tile
+                        keys or Tiles.
+        resolution:     Pixel size in meters. Must divide the tile sizes.
+
+    Returns:
+        MosaicLayout with the tile keys in the order given, the GDAL style
+        geotransform of the mosaic, the shape (rows, columns) of the mosaic
+        and int64 arrays with the pixel row and column of the top left
+        corner and the height and width in pixels of each tile.
+
+    Raises:
+        ValueError:     If no tiles are given or resolution does not divide
+                        the tile sizes.
+    """
+    if resolution <= 0:
+        raise ValueError("resolution must be positive")
+
+    keys = _as_keys(tiles)
+    if not len(keys):
+        raise ValueError("No tiles given")
+
+    unit_ids, rows, columns = _unpack_keys(keys)
+    sizes = _unit_table(kn.TILE_SIZES)[unit_ids]
+    eastings = columns * sizes
+    tops = (rows + 1) * sizes
+
+    min_easting = int(eastings.min())
+    max_northing = int(tops.max())
+    height = max_northing - int((rows * sizes).min())
+    width = int((eastings + sizes).max()) - min_easting
+    height, width = _pixels(np.array([height, width]), resolution).tolist()
+
+    pixel_sizes = _pixels(sizes, resolution)
+    return MosaicLayout(
+        keys,
+        (min_easting, resolution, 0.0, max_northing, 0.0, -resolution),
+        (height, width),
+        _pixels(max_northing - tops, resolution),
+        _pixels(eastings - min_easting, resolution),
+        pixel_sizes,
+        pixel_sizes,
+    )
+
+
+def _spread_bits(values):
+    """
+    Spread the lower 32 bits of a uint64 array to the even bits.
+    """
+    values = values & np.uint64(0xFFFFFFFF)
+    for shift, mask in [
+        (16, 0x0000FFFF0000FFFF),
+        (8, 0x00FF00FF00FF00FF),
+        (4, 0x0F0F0F0F0F0F0F0F),
+        (2, 0x3333333333333333),
+        (1, 0x5555555555555555),
+    ]:
+        values = (values | (values << np.uint64(shift))) & np.uint64(mask)
+    return values
+
+
+def morton_keys(tiles):
+    """
+    Return Morton (Z-order) keys of tiles.
+
+    Vectorized version of kvadratnet.morton_key.
+
+    Arguments:
+        tiles:      Array of tile keys or iterable of tile names, tile keys
+                    or Tiles.
+
+    Returns:
+        uint64 array of Morton keys.
+    """
+    unit_ids, rows, columns = _unpack_keys(_as_keys(tiles))
+
+    keys = unit_ids.astype(np.uint64) << np.uint64(kn._KEY_UNIT_SHIFT)
+    keys |= _spread_bits(rows.astype(np.uint64)) << np.uint64(1)
+    keys |= _spread_bits(columns.astype(np.uint64))
+    return keys
+
+
+def hilbert_keys(tiles):
+    """
+    Return Hilbert curve keys of tiles.
+
+    Vectorized version of kvadratnet.hilbert_key.
+
+    Arguments:
+        tiles:      Array of tile keys or iterable of tile names, tile keys
+                    or Tiles.
+
+    Returns:
+        uint64 array of Hilbert keys.
+    """
+    unit_ids, y, x = _unpack_keys(_as_keys(tiles))
+    mask = kn._KEY_ORDINATE_MASK
+
+    distances = np.zeros(x.shape, dtype=np.int64)
+    s = 1 << (kn.KEY_ORDINATE_BITS - 1)
+    while s > 0:
+        rx = (x & s) > 0
+        ry = (y & s) > 0
+        distances += s * s * ((3 * rx) ^ ry)
+        # rotate the quadrant so the curve continues in the right direction
+        flip = rx & ~ry
+        x = np.where(flip, x ^ mask, x)
+        y = np.where(flip, y ^ mask, y)
+        x, y = np.where(ry, x, y), np.where(ry, y, x)
+        s >>= 1
+
+    keys = unit_ids.astype(np.uint64) << np.uint64(kn._KEY_UNIT_SHIFT)
+    return keys | distances.astype(np.uint64)
+
+
+def argsort_tiles(tiles, order="hilbert"):
+    """
+    Return the indices that sort tiles in a locality preserving order.
+
+    Vectorized version of kvadratnet.sort_tiles. The sort is stable, so
+    duplicate tiles keep their relative order.
+
+    Arguments:
+        tiles:      Array of tile keys or iterable of tile names, tile keys
+                    or Tiles.
+        order:      One of kvadratnet.ORDERS. Defaults to hilbert.
+
+    Returns:
+        int64 array of indices into tiles.
+
+    Raises:
+        ValueError:     If order is unknown.
+    """
+    keys = _as_keys(tiles)
+    if order == "hilbert":
+        keys = hilbert_keys(keys)
+    elif order == "morton":
+        keys = morton_keys(keys)
+    elif order != "row":
+        raise ValueError("Unknown order: {0}".format(order))
+
+    return np.argsort(keys, kind="stable")
+
+
+class KeyIndex(object):
+    """
+    Sorted index of tile keys for vectorized membership tests.
+
+    Lookups are binary searches in the sorted keys, so a million keys can be
+    looked up in a single call without a Python loop.
+
+    Example:
+        >>> index = KeyIndex(["1km_6223_575", "1km_6223_576"])
+        >>> index.lookup(keys_from_names(["1km_6223_576", "1km_6223_577"]))
+        array([ 1, -1])
+    """
+
+    def __init__(self, tiles):
+        keys = _as_keys(tiles)
+        self._order = np.argsort(keys, kind="stable")
+        self.keys = keys[self._order]
+
+    def __len__(self):
+        return len(self.keys)
+
+    def lookup(self, keys):
+        """
+        Find keys in the index.
+
+        Arguments:
+            keys:       Array-like of tile keys.
+
+        Returns:
+            int64 array with the position of each key in the tiles the index
+            was created from, -1 for keys that are not in the index. For
+            duplicate tiles the first position is returned.
+        """
+        keys = np.asarray(keys, dtype=np.uint64)
+        if not len(self.keys):
+            return np.full(keys.shape, -1, dtype=np.int64)
+
+        positions = np.minimum(np.searchsorted(self.keys, keys), len(self.keys) - 1)
+        return np.where(self.keys[positions] == keys, self._order[positions], -1)
+
+    def contains(self, keys):
+        """
+        Return a boolean array telling which keys are in the index.
+        """
+        return self.lookup(keys) >= 0
+
+
+def neighbor_offsets(ring=1):
+    """
+    Return offsets of the neighbours of a tile in the order used by
+    kvadratnet.neighbors and halo.
+
+    Arguments:
+        ring:       Number of tiles to extend in each direction.
+
+    Returns:
+        int64 array with a (row, column) offset for each neighbour.
+    """
+    if ring < 1:
+        raise ValueError("ring must be at least 1")
+
+    steps = np.arange(-ring, ring + 1, dtype=np.int64)
+    rows, columns = np.meshgrid(steps, steps, indexing="ij")
+    offsets = np.stack([rows.ravel(), columns.ravel()], axis=1)
+    return offsets[np.any(offsets != 0, axis=1)]
+
+
+def halo(tiles, ring=1, available=None):
+    """
+    Find the neighbours of each tile in a set of available tiles.
+
+    Vectorized version of kvadratnet.neighbors combined with a membership
+    test, useful for planning which tiles to read around each tile.
+
+    Arguments:
+        tiles:      Array of tile keys or iterable of tile names, tile keys
+                    or Tiles.
+        ring:       Number of tiles to extend in each direction.
+        available:  KeyIndex, array of tile keys or iterable of tiles in
+                    which neighbours are looked up. Defaults to tiles.
+
+    Returns:
+        int64 array with a row for each tile and a column for each offset
+        returned by neighbor_offsets(ring). Values are positions of the
+        neighbours in available, or -1 if a neighbour is not available.
+    """
+    keys = _as_keys(tiles)
+    if available is None:
+        index = KeyIndex(keys)
+    elif isinstance(available, KeyIndex):
+        index = available
+    else:
+        index = KeyIndex(available)
+
+    offsets = neighbor_offsets(ring)
+    unit_ids, rows, columns = _unpack_keys(keys)
+    rows = rows[:, np.newaxis] + offsets[:, 0]
+    columns = columns[:, np.newaxis] + offsets[:, 1]
+    mask = kn._KEY_ORDINATE_MASK
+    inside = (rows >= 0) & (rows <= mask) & (columns >= 0) & (columns <= mask)
+
+    neighbor_keys = _pack_keys(
+        np.broadcast_to(unit_ids[:, np.newaxis], rows.shape),
+        np.where(inside, rows, 0),
+        np.where(inside, columns, 0),
+    )
+    positions = index.lookup(neighbor_keys)
+    positions[~inside] = -1
+    return positions
+
+
+def _grid_key_chunks(unit, grid_range, chunksize):
+    """
+    Generate arrays of keys of tiles of unit within an inclusive range of
+    grid rows and columns, at most chunksize keys at a time.
+    """
+    if chunksize < 1:
+        raise ValueError("chunksize must be positive")
+
+    first_row, last_row, first_column, last_column = grid_range
+    columns = last_column - first_column + 1
+    total = (last_row - first_row + 1) * columns
+    unit_id = kn._UNIT_INDEX[unit]
+
+    for start in range(0, total, chunksize):
+        index = np.arange(start, min(start + chunksize, total), dtype=np.int64)
+        yield _pack_keys(
+            np.full(index.shape, unit_id),
+            first_row + index // columns,
+            first_column + index % columns,
+        )
+
+
+def children_chunks(name, unit=None, chunksize=65536):
+    """
+    Generate keys of child tiles as arrays.
+
+    Chunked version of kvadratnet.children.
+
+    Arguments:
+        name:       Name or key of parent tile.
+        unit:       Unit of child tiles. Defaults to the next smaller unit.
+        chunksize:  Maximum number of keys in each array.
+
+    Returns:
+        Generator of uint64 arrays of tile keys.
+    """
+    key = kn._as_key(name)
+    if unit is None:
+        unit = kn._child_unit(kn.decode(key).unit)
+
+    return _grid_key_chunks(unit, kn._child_range(key, unit), chunksize)
+
+
+def tiles_in_extent_chunks(extent, unit="1km", chunksize=65536):
+    """
+    Generate keys of tiles that intersect a bounding box as arrays.
+
+    Chunked version of kvadratnet.tiles_in_extent.
+
+    Arguments:
+        extent:     Bounding box (min_easting, min_northing, max_easting, max_northing)
+        unit:       Unit of tiles. Defaults to 1km.
+        chunksize:  Maximum number of keys in each array.
+
+    Returns:
+        Generator of uint64 arrays of tile keys.
+    """
+    _check_unit(unit)
+    grid_range = kn._grid_range(extent, kn.TILE_SIZES[unit])
+
+    return _grid_key_chunks(unit, grid_range, chunksize)
+
+
+def key_chunks(tiles, chunksize=65536):
+    """
+    Convert tiles to arrays of tile keys, at most chunksize keys at a time.
+
+    Arguments:
+        tiles:      Array of tile keys or iterable of tile names, tile keys
+                    or Tiles.
+        chunksize:  Maximum number of keys in each array.
+
+    Returns:
+        Generator of uint64 arrays of tile keys.
+    """
+    if chunksize < 1:
+        raise ValueError("chunksize must be positive")
+
+    if isinstance(tiles, np.ndarray):
+        if tiles.dtype.kind in "ui":
+            keys = tiles.astype(np.uint64, copy=False).ravel()
+            for start in range(0, len(keys), chunksize):
+                yield keys[start : start + chunksize]
+            return
+        tiles = tiles.ravel()
+
+    chunk = []
+    for tile in tiles:
+        chunk.append(kn._as_key(tile))
+        if len(chunk) == chunksize:
+            yield np.array(chunk, dtype=np.uint64)
+            chunk = []
+
+    if chunk:
+        yield np.array(chunk, dtype=np.uint64)
@@ -0,0 +1,198 @@
+"""
+Export of tile footprints to common geometry formats.
+
+The writers take an iterable of tile names, tile keys or Tiles, or an array
+of tile keys, and write footprints to a file object in chunks, so
+arbitrarily many tiles can be written without holding them in memory.
+"""
+
+import json
+
+import numpy as np
+
+import kvadratnet as kn
+from kvadratnet import batch
+
+FORMATS = ["wkt", "wkb", "geojson"]
+
+# WKB polygon with one ring of five points, little endian.
+WKB_POLYGON = np.dtype(
+    [
+        ("byte_order", "u1"),
+        ("geometry_type", "<u4"),
+        ("rings", "<u4"),
+        ("points", "<u4"),
+        ("coordinates", "<f8", (10,)),
+    ]
+)
+
+_WKB_POLYGON_TYPE = 3
+
+_GEOJSON_FEATURE = (
+    '{{"type":"Feature","properties":{{"name":"{4}","unit":"{5}"}},'
+    '"geometry":{{"type":"Polygon","coordinates":'
+    "[[[{0},{1}],[{2},{1}],[{2},{3}],[{0},{3}],[{0},{1}]]]}}}}"
+)
+
+
+def _extent_chunks(tiles, chunksize):
+    """
+    Generate extents and tile keys of tiles in chunks.
+
+    Returns:
+        Generator of (TileExtent of arrays, array of tile keys)
+    """
+    for keys in batch.key_chunks(tiles, chunksize):
+        yield batch.extents_from_keys(keys), keys
+
+
+def write_wkt(tiles, fileobj, chunksize=65536):
+    """
+    Write tile footprints as WKT polygons, one per line.
+
+    The polygons are identical to the output of kvadratnet.wkt_from_name.
+
+    Arguments:
+        tiles:      Tiles to export.
+        fileobj:    Text file object to write to.
+        chunksize:  Number of tiles formatted before writing to fileobj.
+
+    Returns:
+        Number of tiles written.
+    """
+    count = 0
+    for extents, _ in _extent_chunks(tiles, chunksize):
+        lines = [
+            kn._WKT_TEMPLATE.format(*extent)
+            for extent in zip(*(ordinates.tolist() for ordinates in extents))
+        ]
+        fileobj.write("\n".join(lines) + "\n")
+        count += len(lines)
+
+    return count
+
+
+def wkb_from_keys(keys):
+    """
+    Create WKB polygons of tile footprints.
+
+    Arguments:
+        keys:       Array-like of tile keys.
+
+    Returns:
+        Structured NumPy array with dtype WKB_POLYGON. Use tobytes() to get
+        the packed WKB polygons.
+    """
+    min_easting, min_northing, max_easting, max_northing = batch.extents_from_keys(keys)
+
+    polygons = np.empty(len(min_easting), dtype=WKB_POLYGON)
+    polygons["byte_order"] = 1
+    polygons["geometry_type"] = _WKB_POLYGON_TYPE
+    polygons["rings"] = 1
+    polygons["points"] = 5
+    polygons["coordinates"] = np.stack(
+        [
+            min_easting,
+            min_northing,
+            min_easting,
+            max_northing,
+            max_easting,
+            max_northing,
+            max_easting,
+            min_northing,
+            min_easting,
+            min_northing,
+        ],
+        axis=1,
+    )
+
+    return polygons
+
+
+def write_wkb(tiles, fileobj, chunksize=65536):
+    """
+    Write tile footprints as packed WKB polygons.
+
+    Every polygon is WKB_POLYGON.itemsize bytes long, so the output can be
+    split into separate geometries without parsing it.
+
+    Arguments:
+        tiles:      Tiles to export.
+        fileobj:    Binary file object to write to.
+        chunksize:  Number of tiles converted before writing to fileobj.
+
+    Returns:
+        Number of tiles written.
+    """
+    count = 0
+    for keys in batch.key_chunks(tiles, chunksize):
+        fileobj.write(wkb_from_keys(keys).tobytes())
+        count += len(keys)
+
+    return count
+
+
+def write_geojson(tiles, fileobj, crs=None, chunksize=65536):
+    """
+    Write tile footprints as a GeoJSON FeatureCollection.
+
+    Each feature has the tile name and unit as properties. Coordinates are
+    written in the same coordinate system as the tiles.
+
+    Arguments:
+        tiles:      Tiles to export.
+        fileobj:    Text file object to write to.
+        crs:        Name of the coordinate system, e.g. "EPSG:25832". When
+                    given it is written as a (pre RFC 7946) crs member.
+        chunksize:  Number of tiles formatted before writing to fileobj.
+
+    Returns:
+        Number of tiles written.
+    """
+    header = {"type": "FeatureCollection"}
+    if crs:
+        header["crs"] = {"type": "name", "properties": {"name": crs}}
+    fileobj.write(json.dumps(header, separators=(",", ":"))[:-1])
+    fileobj.write(',"features":[\n')
+
+    count = 0
+    for extents, keys in _extent_chunks(tiles, chunksize):
+        names = batch.names_from_keys(keys).tolist()
+        units = batch.decode(keys).unit.tolist()
+        features = [
+            _GEOJSON_FEATURE.format(*feature)
+            for feature in zip(
+                *(ordinates.tolist() for ordinates in extents), names, units
+            )
+        ]
+        if count:
+            fileobj.write(",\n")
+        fileobj.write(",\n".join(features))
+        count += len(features)
+
+    fileobj.write("\n]}\n")
+
+    return count
+
+
+def write_footprints(tiles, fileobj, fmt="wkt", **kwargs):
+    """
+    Write tile footprints in one of FORMATS.
+
+    Arguments:
+        tiles:      Tiles to export.
+        fileobj:    File object to write to. Must be a binary file object
+                    for the wkb format and a text file object otherwise.
+        fmt:        Output format, one of FORMATS.
+        kwargs:     Extra arguments passed on to the writer.
+
+    Returns:
+        Number of tiles written.
+    """
+    writers = {"wkt": write_wkt, "wkb": write_wkb, "geojson": write_geojson}
+    try:
+        writer = writers[fmt]
+    except KeyError:
+        raise ValueError("Unknown format: {0}".format(fmt))
+
+    return writer(tiles, fileobj, **kwargs)
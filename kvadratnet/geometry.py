@@ -0,0 +1,276 @@
+"""
+Geometric operations on kvadratnet tiles.
+
+Polygons are read from WKT, using the same axis order as
+kvadratnet.wkt_from_name, i.e. easting before northing.
+"""
+
+import math
+import re
+
+import kvadratnet as kn
+
+_WKT_TOKENS = re.compile(r"\(|\)|,|[^\s(),]+")
+
+
+def parse_wkt(wkt):
+    """
+    Parse a WKT POLYGON or MULTIPOLYGON.
+
+    Arguments:
+        wkt:        WKT string.
+
+    Returns:
+        List of polygons. Each polygon is a list of rings and each ring
+        a list of (easting, northing) tuples.
+
+    Raises:
+        ValueError:     If wkt is not a valid POLYGON or MULTIPOLYGON.
+    """
+    tokens = _WKT_TOKENS.findall(wkt)
+    if not tokens:
+        raise ValueError("Empty WKT string")
+
+    geometry_type = tokens[0].upper()
+    if geometry_type not in ("POLYGON", "MULTIPOLYGON"):
+        raise ValueError("Unsupported geometry type: {0}".format(tokens[0]))
+    if len(tokens) == 2 and tokens[1].upper() == "EMPTY":
+        return []
+
+    stack = [[]]
+    point = []
+    try:
+        for token in tokens[1:]:
+            if token == "(":
+                stack.append([])
+            elif token in (",", ")"):
+                if point:
+                    stack[-1].append(tuple(point[:2]))
+                    point = []
+                if token == ")":
+                    finished = stack.pop()
+                    stack[-1].append(finished)
+            else:
+                point.append(float(token))
+    except (IndexError, ValueError):
+        raise ValueError("Malformed WKT: {0}".format(wkt))
+
+    if len(stack) != 1 or len(stack[0]) != 1 or point:
+        raise ValueError("Malformed WKT: {0}".format(wkt))
+
+    polygons = stack[0][0]
+    if geometry_type == "POLYGON":
+        polygons = [polygons]
+
+    for polygon in polygons:
+        for ring in polygon:
+            if len(ring) < 3 or not all(isinstance(p, tuple) for p in ring):
+                raise ValueError("Malformed WKT: {0}".format(wkt))
+
+    return polygons
+
+
+def _edges(polygons):
+    """
+    Generate all edges of the rings of polygons as ((x0, y0), (x1, y1)).
+    """
+    for polygon in polygons:
+        for ring in polygon:
+            for i, start in enumerate(ring):
+                end = ring[(i + 1) % len(ring)]
+                if start != end:
+                    yield start, end
+
+
+def _open_range(low, high, size):
+    """
+    Return inclusive range of grid cells whose interior overlaps the open
+    interval (low, high). When low == high the cell containing the value is
+    returned, unless the value is on a grid line.
+    """
+    if low == high:
+        if low % size == 0:
+            return 0, -1
+        cell = int(math.floor(low / size))
+        return cell, cell
+    return int(math.floor(low / size)), int(math.ceil(high / size)) - 1
+
+
+def _boundary_cells(edges, size):
+    """
+    Find grid cells whose interior is crossed by the polygon boundary.
+
+    Each edge is clipped to the rows it passes through, so the cost is
+    proportional to the number of boundary cells.
+
+    Returns:
+        dict with sets of columns for each row.
+    """
+    cells = {}
+    for (x0, y0), (x1, y1) in edges:
+        if y0 == y1:
+            first_row, last_row = _open_range(y0, y0, size)
+        else:
+            first_row, last_row = _open_range(min(y0, y1), max(y0, y1), size)
+
+        for row in range(first_row, last_row + 1):
+            if y0 == y1:
+                x_low, x_high = min(x0, x1), max(x0, x1)
+            else:
+                low = max(min(y0, y1), row * size)
+                high = min(max(y0, y1), (row + 1) * size)
+                x_low = x0 + (low - y0) * (x1 - x0) / (y1 - y0)
+                x_high = x0 + (high - y0) * (x1 - x0) / (y1 - y0)
+                x_low, x_high = min(x_low, x_high), max(x_low, x_high)
+
+            first_column, last_column = _open_range(x_low, x_high, size)
+            if first_column <= last_column:
+                cells.setdefault(row, set()).update(
+                    range(first_column, last_column + 1)
+                )
+
+    return cells
+
+
+def _interior_spans(edges, size, first_row, last_row):
+    """
+    Find spans of grid cells whose centres are inside the polygon.
+
+    A scanline through the centre of each row is intersected with the
+    edges that are active in that row, and pairs of crossings are turned
+    into column spans using the even-odd rule.
+
+    Returns:
+        Generator of (row, first column, last column)
+    """
+    edges = sorted(
+        ((min(y0, y1), max(y0, y1), x0, y0, x1, y1) for (x0, y0), (x1, y1) in edges),
+        key=lambda edge: edge[0],
+    )
+
+    active = []
+    next_edge = 0
+    for row in range(first_row, last_row + 1):
+        y = (row + 0.5) * size
+        while next_edge < len(edges) and edges[next_edge][0] <= y:
+            active.append(edges[next_edge])
+            next_edge += 1
+        active = [edge for edge in active if edge[1] > y]
+
+        crossings = sorted(
+            x0 + (y - y0) * (x1 - x0) / (y1 - y0)
+            for (y_min, _, x0, y0, x1, y1) in active
+            if y_min <= y and y0 != y1
+        )
+        for x_low, x_high in zip(crossings[::2], crossings[1::2]):
+            first_column = int(math.floor(x_low / size - 0.5)) + 1
+            last_column = int(math.ceil(x_high / size - 0.5)) - 1
+            if first_column <= last_column:
+                yield row, first_column, last_column
+
+
+def _aggregate(cells, unit, units):
+    """
+    Replace blocks of cells that completely cover a larger tile by that tile.
+
+    Arguments:
+        cells:      Set of (row, column) of unit to aggregate.
+        unit:       Unit of cells.
+        units:      Larger units to aggregate into.
+
+    Returns:
+        List of tile keys of the aggregated tiles. Cells that are aggregated
+        are removed from cells.
+    """
+    size = kn.TILE_SIZES[unit]
+    keys = []
+    for parent_unit in sorted(units, key=lambda u: kn.TILE_SIZES[u], reverse=True):
+        parent_size = kn.TILE_SIZES[parent_unit]
+        if parent_size <= size or parent_size % size != 0:
+            continue
+
+        factor = parent_size // size
+        counts = {}
+        for row, column in cells:
+            parent = (row // factor, column // factor)
+            counts[parent] = counts.get(parent, 0) + 1
+
+        for (parent_row, parent_column), count in counts.items():
+            if count != factor * factor:
+                continue
+            keys.append(kn._pack_key(parent_unit, parent_row, parent_column))
+            for row in range(parent_row * factor, (parent_row + 1) * factor):
+                for column in range(
+                    parent_column * factor, (parent_column + 1) * factor
+                ):
+                    cells.remove((row, column))
+
+    return keys
+
+
+def cover(wkt, unit="1km", predicate="intersects", hierarchical=False, keys=False):
+    """
+    Find tiles covering a polygon.
+
+    Tiles are found by rasterizing the polygon row by row: tiles crossed by
+    the polygon boundary are found by walking along the edges, and the
+    remaining tiles are filled in between boundary crossings. Holes and
+    multipolygons are handled with the even-odd rule.
+
+    Arguments:
+        wkt:            WKT POLYGON or MULTIPOLYGON.
+        unit:           Unit of tiles. Defaults to 1km.
+        predicate:      'intersects' returns tiles that overlap the polygon,
+                        'within' returns tiles completely inside the polygon.
+                        Tiles that only touch the polygon boundary are not
+                        considered overlapping.
+        hierarchical:   When True, tiles that together completely fill a larger
+                        tile that is inside the polygon are replaced by the
+                        larger tile. Only larger units with a tile size that
+                        is a multiple of the size of unit are used.
+        keys:           Return tile keys instead of tile names.
+
+    Returns:
+        Sorted list of tile names or keys.
+    """
+    if unit not in kn.TILE_SIZES:
+        raise ValueError("Tile unit not recognised!")
+    if predicate not in ("intersects", "within"):
+        raise ValueError("Unknown predicate: {0}".format(predicate))
+
+    size = kn.TILE_SIZES[unit]
+    edges = list(_edges(parse_wkt(wkt)))
+    if not edges:
+        return []
+
+    boundary = _boundary_cells(edges, size)
+    northings = [y for edge in edges for (_, y) in edge]
+    first_row = int(math.floor(min(northings) / size))
+    last_row = int(math.ceil(max(northings) / size)) - 1
+
+    inside = set()
+    for row, first_column, last_column in _interior_spans(
+        edges, size, first_row, last_row
+    ):
+        row_boundary = boundary.get(row, ())
+        for column in range(first_column, last_column + 1):
+            if column not in row_boundary:
+                inside.add((row, column))
+
+    tile_keys = []
+    if hierarchical:
+        larger = kn.UNITS[kn.UNITS.index(unit) + 1 :]
+        tile_keys.extend(_aggregate(inside, unit, larger))
+
+    tile_keys.extend(kn._pack_key(unit, row, column) for row, column in inside)
+    if predicate == "intersects":
+        tile_keys.extend(
+            kn._pack_key(unit, row, column)
+            for row, columns in boundary.items()
+            for column in columns
+        )
+
+    tile_keys.sort()
+    if keys:
+        return tile_keys
+    return [kn.name_from_key(key) for key in tile_keys]
@@ -0,0 +1,468 @@
+"""
+Export of tile footprints to GeoPackage files.
+
+GeoPackages are SQLite databases, so they are written with the sqlite3
+module from the standard library. Footprints are inserted in large batches
+in a single transaction. The R*Tree spatial index is bulk loaded: a packed
+tree is built from the tile extents and written directly to the tables of
+the R*Tree, which is much faster than inserting tiles one at a time and
+makes writing millions of tiles feasible.
+"""
+
+import itertools
+import re
+import sqlite3
+
+import numpy as np
+
+from kvadratnet import batch, export
+
+# "GPKG" as a 32 bit integer
+APPLICATION_ID = 0x47504B47
+USER_VERSION = 10300
+
+# GeoPackage binary header: magic, version, flags, srs id and an
+# envelope (min_x, max_x, min_y, max_y). Flags 3 means little endian with
+# an envelope of four doubles.
+GPKG_HEADER = np.dtype(
+    [
+        ("magic", "S2"),
+        ("version", "u1"),
+        ("flags", "u1"),
+        ("srs_id", "<i4"),
+        ("envelope", "<f8", (4,)),
+    ]
+)
+GPKG_POLYGON = np.dtype([("header", GPKG_HEADER), ("wkb", export.WKB_POLYGON)])
+
+_GPKG_FLAGS = 3
+
+_WGS84 = (
+    'GEOGCS["WGS 84",DATUM["WGS_1984",SPHEROID["WGS 84",6378137,298.257223563,'
+    'AUTHORITY["EPSG","7030"]],AUTHORITY["EPSG","6326"]],PRIMEM["Greenwich",0,'
+    'AUTHORITY["EPSG","8901"]],UNIT["degree",0.0174532925199433,'
+    'AUTHORITY["EPSG","9122"]],AXIS["Latitude",NORTH],AXIS["Longitude",EAST],'
+    'AUTHORITY["EPSG","4326"]]'
+)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS gpkg_spatial_ref_sys (
+    srs_name TEXT NOT NULL,
+    srs_id INTEGER PRIMARY KEY,
+    organization TEXT NOT NULL,
+    organization_coordsys_id INTEGER NOT NULL,
+    definition TEXT NOT NULL,
+    description TEXT
+);
+CREATE TABLE IF NOT EXISTS gpkg_contents (
+    table_name TEXT NOT NULL PRIMARY KEY,
+    data_type TEXT NOT NULL,
+    identifier TEXT UNIQUE,
+    description TEXT DEFAULT '',
+    last_change DATETIME NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%fZ','now')),
+    min_x DOUBLE,
+    min_y DOUBLE,
+    max_x DOUBLE,
+    max_y DOUBLE,
+    srs_id INTEGER,
+    CONSTRAINT fk_gc_r_srs_id FOREIGN KEY (srs_id)
+        REFERENCES gpkg_spatial_ref_sys(srs_id)
+);
+CREATE TABLE IF NOT EXISTS gpkg_geometry_columns (
+    table_name TEXT NOT NULL,
+    column_name TEXT NOT NULL,
+    geometry_type_name TEXT NOT NULL,
+    srs_id INTEGER NOT NULL,
+    z TINYINT NOT NULL,
+    m TINYINT NOT NULL,
+    CONSTRAINT pk_geom_cols PRIMARY KEY (table_name, column_name),
+    CONSTRAINT fk_gc_tn FOREIGN KEY (table_name) REFERENCES gpkg_contents(table_name),
+    CONSTRAINT fk_gc_srs FOREIGN KEY (srs_id) REFERENCES gpkg_spatial_ref_sys (srs_id)
+);
+CREATE TABLE IF NOT EXISTS gpkg_extensions (
+    table_name TEXT,
+    column_name TEXT,
+    extension_name TEXT NOT NULL,
+    definition TEXT NOT NULL,
+    scope TEXT NOT NULL,
+    CONSTRAINT ge_tce UNIQUE (table_name, column_name, extension_name)
+);
+INSERT OR IGNORE INTO gpkg_spatial_ref_sys VALUES (
+    'Undefined cartesian SRS', -1, 'NONE', -1, 'undefined',
+    'undefined cartesian coordinate reference system'
+);
+INSERT OR IGNORE INTO gpkg_spatial_ref_sys VALUES (
+    'Undefined geographic SRS', 0, 'NONE', 0, 'undefined',
+    'undefined geographic coordinate reference system'
+);
+"""
+
+_FEATURE_TABLE = """
+CREATE TABLE "{0}" (
+    fid INTEGER PRIMARY KEY AUTOINCREMENT,
+    geom POLYGON,
+    name TEXT NOT NULL,
+    unit TEXT NOT NULL,
+    path TEXT
+);
+CREATE VIRTUAL TABLE "rtree_{0}_geom" USING rtree(id, minx, maxx, miny, maxy);
+"""
+
+# triggers keeping the R*Tree up to date when the table is edited later,
+# e.g. in a GIS. The ST_ functions are provided by GeoPackage readers.
+_RTREE_TRIGGERS = """
+CREATE TRIGGER "rtree_{0}_geom_insert" AFTER INSERT ON "{0}"
+WHEN (new.geom NOT NULL AND NOT ST_IsEmpty(NEW.geom))
+BEGIN
+  INSERT OR REPLACE INTO "rtree_{0}_geom" VALUES (
+    NEW.fid,
+    ST_MinX(NEW.geom), ST_MaxX(NEW.geom), ST_MinY(NEW.geom), ST_MaxY(NEW.geom)
+  );
+END;
+CREATE TRIGGER "rtree_{0}_geom_update1" AFTER UPDATE OF geom ON "{0}"
+WHEN OLD.fid = NEW.fid AND (NEW.geom NOTNULL AND NOT ST_IsEmpty(NEW.geom))
+BEGIN
+  INSERT OR REPLACE INTO "rtree_{0}_geom" VALUES (
+    NEW.fid,
+    ST_MinX(NEW.geom), ST_MaxX(NEW.geom), ST_MinY(NEW.geom), ST_MaxY(NEW.geom)
+  );
+END;
+CREATE TRIGGER "rtree_{0}_geom_update2" AFTER UPDATE OF geom ON "{0}"
+WHEN OLD.fid = NEW.fid AND (NEW.geom ISNULL OR ST_IsEmpty(NEW.geom))
+BEGIN
+  DELETE FROM "rtree_{0}_geom" WHERE id = OLD.fid;
+END;
+CREATE TRIGGER "rtree_{0}_geom_update3" AFTER UPDATE ON "{0}"
+WHEN OLD.fid != NEW.fid AND (NEW.geom NOTNULL AND NOT ST_IsEmpty(NEW.geom))
+BEGIN
+  DELETE FROM "rtree_{0}_geom" WHERE id = OLD.fid;
+  INSERT OR REPLACE INTO "rtree_{0}_geom" VALUES (
+    NEW.fid,
+    ST_MinX(NEW.geom), ST_MaxX(NEW.geom), ST_MinY(NEW.geom), ST_MaxY(NEW.geom)
+  );
+END;
+CREATE TRIGGER "rtree_{0}_geom_update4" AFTER UPDATE ON "{0}"
+WHEN OLD.fid != NEW.fid AND (NEW.geom ISNULL OR ST_IsEmpty(NEW.geom))
+BEGIN
+  DELETE FROM "rtree_{0}_geom" WHERE id IN (OLD.fid, NEW.fid);
+END;
+CREATE TRIGGER "rtree_{0}_geom_delete" AFTER DELETE ON "{0}"
+WHEN old.geom NOT NULL
+BEGIN
+  DELETE FROM "rtree_{0}_geom" WHERE id = OLD.fid;
+END;
+"""
+
+_TABLE_NAME = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+_END = object()
+
+# cell of an R*Tree node: id and (min_x, max_x, min_y, max_y), big endian
+_RTREE_CELL = np.dtype([("id", ">i8"), ("envelope", ">f4", (4,))])
+
+
+def gpkg_from_keys(keys, srs_id=-1):
+    """
+    Create GeoPackage geometry blobs of tile footprints.
+
+    Arguments:
+        keys:       Array-like of tile keys.
+        srs_id:     Spatial reference system id written in the headers.
+
+    Returns:
+        Structured NumPy array with dtype GPKG_POLYGON. Each element packed
+        with tobytes() is a GeoPackage polygon.
+    """
+    wkb = export.wkb_from_keys(keys)
+    coordinates = wkb["coordinates"]
+
+    polygons = np.empty(len(wkb), dtype=GPKG_POLYGON)
+    polygons["header"]["magic"] = b"GP"
+    polygons["header"]["version"] = 0
+    polygons["header"]["flags"] = _GPKG_FLAGS
+    polygons["header"]["srs_id"] = srs_id
+    # envelope is (min_x, max_x, min_y, max_y); the ring starts in the lower
+    # left corner and its third point is the upper right corner
+    polygons["header"]["envelope"] = coordinates[:, [0, 4, 1, 5]]
+    polygons["wkb"] = wkb
+
+    return polygons
+
+
+def _add_srs(connection, srs_id, definition):
+    """
+    Add an EPSG coordinate system to gpkg_spatial_ref_sys unless it exists.
+    """
+    connection.execute(
+        "INSERT OR IGNORE INTO gpkg_spatial_ref_sys VALUES (?, ?, ?, ?, ?, ?)",
+        (
+            "EPSG:{0}".format(srs_id),
+            srs_id,
+            "EPSG",
+            srs_id,
+            definition or "undefined",
+            None,
+        ),
+    )
+
+
+def write_geopackage(
+    tiles,
+    path,
+    paths=None,
+    table="tiles",
+    srs_id=-1,
+    srs_definition=None,
+    chunksize=65536,
+):
+    """
+    Write tile footprints to a table in a GeoPackage.
+
+    The table has the columns fid, geom, name, unit and path and an R*Tree
+    spatial index. The GeoPackage is created if it does not exist.
+
+    Arguments:
+        tiles:          Tiles to export.
+        path:           Path of the GeoPackage.
+        paths:          Optional iterable with a file path for each tile.
+        table:          Name of the table. Must not exist already.
+        srs_id:         EPSG code of the coordinate system of the tiles.
+                        Defaults to -1, undefined cartesian coordinates.
+        srs_definition: WKT definition of the coordinate system, stored with
+                        the EPSG code. Without it GIS software has to look
+                        up the EPSG code.
+        chunksize:      Number of tiles inserted in each batch.
+
+    Returns:
+        Number of tiles written.
+
+    Raises:
+        ValueError:     If table is not a valid name or already exists, or
+                        the number of paths differs from the number of tiles.
+    """
+    if not _TABLE_NAME.match(table):
+        raise ValueError("Invalid table name: {0}".format(table))
+
+    connection = sqlite3.connect(path, isolation_level=None)
+    try:
+        connection.execute("PRAGMA application_id = {0}".format(APPLICATION_ID))
+        connection.execute("PRAGMA user_version = {0}".format(USER_VERSION))
+        connection.execute("PRAGMA synchronous = OFF")
+        connection.execute("BEGIN")
+        for statement in _SCHEMA.split(";"):
+            if statement.strip():
+                connection.execute(statement)
+
+        exists = connection.execute(
+            "SELECT count(*) FROM sqlite_master WHERE name = ? COLLATE NOCASE", (table,)
+        ).fetchone()[0]
+        if exists:
+            raise ValueError("Table already exists: {0}".format(table))
+        # WGS 84 is required in every GeoPackage
+        _add_srs(connection, 4326, _WGS84)
+        if srs_id > 0:
+            _add_srs(connection, srs_id, srs_definition)
+        for statement in _FEATURE_TABLE.format(table).split(";"):
+            if statement.strip():
+                connection.execute(statement)
+
+        keys = _insert_tiles(connection, table, tiles, paths, srs_id, chunksize)
+        _bulk_load_rtree(connection, "rtree_{0}_geom".format(table), keys)
+
+        bounds = (None, None, None, None)
+        if len(keys):
+            extents = batch.extents_from_keys(keys)
+            bounds = (
+                float(extents.min_easting.min()),
+                float(extents.min_northing.min()),
+                float(extents.max_easting.max()),
+                float(extents.max_northing.max()),
+            )
+        connection.execute(
+            "INSERT INTO gpkg_contents "
+            "(table_name, data_type, identifier, min_x, min_y, max_x, max_y, srs_id) "
+            "VALUES (?, 'features', ?, ?, ?, ?, ?, ?)",
+            (table, table) + bounds + (srs_id,),
+        )
+        connection.execute(
+            "INSERT INTO gpkg_geometry_columns VALUES (?, 'geom', 'POLYGON', ?, 0, 0)",
+            (table, srs_id),
+        )
+        connection.execute(
+            "INSERT INTO gpkg_extensions VALUES (?, 'geom', 'gpkg_rtree_index', "
+            "'http://www.geopackage.org/spec120/#extension_rtree', 'write-only')",
+            (table,),
+        )
+        for trigger in _RTREE_TRIGGERS.format(table).split("END;"):
+            if trigger.strip():
+                connection.execute(trigger + "END;")
+
+        connection.execute("COMMIT")
+    except BaseException:
+        if connection.in_transaction:
+            connection.execute("ROLLBACK")
+        raise
+    finally:
+        connection.close()
+
+    return len(keys)
+
+
+def _insert_tiles(connection, table, tiles, paths, srs_id, chunksize):
+    """
+    Insert tiles in the feature table in batches.
+
+    Returns:
+        uint64 array with the keys of the tiles, in the order of the fids.
+    """
+    insert = 'INSERT INTO "{0}" VALUES (?, ?, ?, ?, ?)'.format(table)
+    if paths is not None:
+        paths = iter(paths)
+
+    count = 0
+    all_keys = []
+    size = GPKG_POLYGON.itemsize
+    for keys in batch.key_chunks(tiles, chunksize):
+        blobs = gpkg_from_keys(keys, srs_id).tobytes()
+        if paths is None:
+            chunk_paths = itertools.repeat(None)
+        else:
+            chunk_paths = list(itertools.islice(paths, len(keys)))
+            if len(chunk_paths) < len(keys):
+                raise ValueError("Number of paths does not match number of tiles")
+
+        connection.executemany(
+            insert,
+            zip(
+                range(count + 1, count + len(keys) + 1),
+                (blobs[i * size : (i + 1) * size] for i in range(len(keys))),
+                batch.names_from_keys(keys).tolist(),
+                batch.decode(keys).unit.tolist(),
+                chunk_paths,
+            ),
+        )
+        all_keys.append(keys)
+        count += len(keys)
+
+    if paths is not None and next(paths, _END) is not _END:
+        raise ValueError("Number of paths does not match number of tiles")
+
+    return np.concatenate(all_keys) if all_keys else np.empty(0, dtype=np.uint64)
+
+
+def _float32_envelopes(envelopes):
+    """
+    Round (min_x, max_x, min_y, max_y) envelopes outwards to float32, like
+    the SQLite R*Tree does.
+    """
+    rounded = envelopes.astype(np.float32)
+    for column, direction in enumerate([-np.inf, np.inf, -np.inf, np.inf]):
+        values = rounded[:, column]
+        if direction < 0:
+            inexact = values > envelopes[:, column]
+        else:
+            inexact = values < envelopes[:, column]
+        values[inexact] = np.nextafter(values[inexact], np.float32(direction))
+    return rounded
+
+
+def _rtree_nodes(cells, capacity, node_size):
+    """
+    Pack R*Tree cells into node blobs, capacity cells per node.
+
+    Returns:
+        uint8 array with a row for each node.
+    """
+    count = max(1, -(-len(cells) // capacity))
+    padded = np.zeros(count * capacity, dtype=_RTREE_CELL)
+    padded[: len(cells)] = cells
+
+    nodes = np.zeros((count, node_size), dtype=np.uint8)
+    nodes[:, 4 : 4 + capacity * _RTREE_CELL.itemsize] = padded.view(np.uint8).reshape(
+        count, -1
+    )
+    cell_counts = np.full(count, capacity, dtype=">u2")
+    cell_counts[-1] = len(cells) - capacity * (count - 1)
+    nodes[:, 2:4] = cell_counts.view(np.uint8).reshape(count, 2)
+
+    return nodes
+
+
+def _bulk_load_rtree(connection, rtree, keys):
+    """
+    Fill an empty SQLite R*Tree with the envelopes of tiles.
+
+    Inserting millions of rows in an R*Tree one by one is slow, so instead a
+    packed tree is built from the tiles sorted along a Hilbert curve, and
+    written directly to the shadow tables of the R*Tree. The fids of the
+    tiles are their positions in keys plus one.
+    """
+    if not len(keys):
+        return
+
+    node_size = connection.execute(
+        'SELECT length(data) FROM "{0}_node" WHERE nodeno = 1'.format(rtree)
+    ).fetchone()[0]
+    capacity = (node_size - 4) // _RTREE_CELL.itemsize
+
+    order = batch.argsort_tiles(keys, "hilbert")
+    extents = batch.extents_from_keys(keys[order])
+    cells = np.empty(len(keys), dtype=_RTREE_CELL)
+    cells["id"] = order + 1
+    cells["envelope"] = _float32_envelopes(
+        np.stack(
+            [
+                extents.min_easting,
+                extents.max_easting,
+                extents.min_northing,
+                extents.max_northing,
+            ],
+            axis=1,
+        ).astype(np.float64)
+    )
+
+    # levels[0] are the tiles, levels[k + 1] the cells pointing to the nodes
+    # holding levels[k]. The last level fits in the root node.
+    levels = [cells]
+    while len(levels[-1]) > capacity:
+        children = levels[-1]
+        starts = np.arange(0, len(children), capacity)
+        envelopes = children["envelope"]
+        parents = np.empty(len(starts), dtype=_RTREE_CELL)
+        parents["envelope"][:, 0] = np.minimum.reduceat(envelopes[:, 0], starts)
+        parents["envelope"][:, 1] = np.maximum.reduceat(envelopes[:, 1], starts)
+        parents["envelope"][:, 2] = np.minimum.reduceat(envelopes[:, 2], starts)
+        parents["envelope"][:, 3] = np.maximum.reduceat(envelopes[:, 3], starts)
+        levels.append(parents)
+
+    # number nodes from the root (node 1) downwards
+    depth = len(levels) - 1
+    numbers = [None] * depth + [np.array([1], dtype=np.int64)]
+    first = 2
+    for level in range(depth - 1, -1, -1):
+        numbers[level] = np.arange(first, first + len(levels[level + 1]))
+        levels[level + 1]["id"] = numbers[level]
+        first += len(levels[level + 1])
+
+    insert_node = 'INSERT INTO "{0}_node" (nodeno, data) VALUES (?, ?)'
+    insert_parent = 'INSERT INTO "{0}_parent" (nodeno, parentnode) VALUES (?, ?)'
+    insert_rowid = 'INSERT INTO "{0}_rowid" (rowid, nodeno) VALUES (?, ?)'
+    for level, level_cells in enumerate(levels):
+        nodes = _rtree_nodes(level_cells, capacity, node_size)
+        if level == depth:
+            nodes[0, 0:2] = np.array([depth], dtype=">u2").view(np.uint8)
+            connection.execute(
+                'UPDATE "{0}_node" SET data = ? WHERE nodeno = 1'.format(rtree),
+                (nodes[0].tobytes(),),
+            )
+        else:
+            connection.executemany(
+                insert_node.format(rtree),
+                zip(numbers[level].tolist(), map(bytes, nodes)),
+            )
+
+        # cell i is stored in node numbers[level][i // capacity]
+        holders = np.repeat(numbers[level], capacity)[: len(level_cells)].tolist()
+        insert = insert_rowid if level == 0 else insert_parent
+        connection.executemany(
+            insert.format(rtree), zip(level_cells["id"].tolist(), holders)
+        )
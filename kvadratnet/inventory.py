@@ -0,0 +1,283 @@
+"""
+Catalog of files with kvadratnet tile names in directory trees.
+
+The catalog is a SQLite database with a row for every file that has a tile
+name, and a row for every directory that has been scanned. Directories are
+scanned by a pool of threads. When a catalog is updated only directories
+whose modification time has changed are read again; for the other
+directories the contents from the previous scan are used.
+
+Note that changing the contents of a file does not change the modification
+time of the directory, so sizes and modification times of files are only
+updated when the directory is rescanned. Use full=True to rescan everything.
+"""
+
+import os
+import sqlite3
+from collections import namedtuple
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import kvadratnet as kn
+
+CatalogEntry = namedtuple(
+    "CatalogEntry", "key, unit, northing, easting, path, size, mtime"
+)
+ScanSummary = namedtuple("ScanSummary", "directories, scanned, files")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS directories (
+    path TEXT PRIMARY KEY,
+    parent TEXT,
+    mtime_ns INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS tiles (
+    path TEXT PRIMARY KEY,
+    directory TEXT NOT NULL,
+    key INTEGER NOT NULL,
+    unit TEXT NOT NULL,
+    northing INTEGER NOT NULL,
+    easting INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS tiles_key ON tiles (key);
+CREATE INDEX IF NOT EXISTS tiles_directory ON tiles (directory);
+CREATE INDEX IF NOT EXISTS directories_parent ON directories (parent);
+"""
+
+
+class _Entry(object):
+    """
+    Minimal replacement of os.DirEntry for Python versions without os.scandir.
+    """
+
+    def __init__(self, directory, name):
+        self.name = name
+        self.path = os.path.join(directory, name)
+
+    def is_dir(self, follow_symlinks=True):
+        if follow_symlinks:
+            return os.path.isdir(self.path)
+        return os.path.isdir(self.path) and not os.path.islink(self.path)
+
+    def is_file(self):
+        return os.path.isfile(self.path)
+
+    def stat(self):
+        return os.stat(self.path)
+
+
+def _scandir(path):
+    """
+    Return the entries of a directory, using os.scandir when available.
+    """
+    if not hasattr(os, "scandir"):
+        return [_Entry(path, name) for name in os.listdir(path)]
+
+    # os.scandir is only a context manager from Python 3.6
+    iterator = os.scandir(path)
+    try:
+        return list(iterator)
+    finally:
+        if hasattr(iterator, "close"):
+            iterator.close()
+
+
+def _read_directory(path, known_mtime):
+    """
+    Read a directory unless its modification time is known_mtime.
+
+    Returns:
+        Tuple (mtime, subdirectories, tiles). subdirectories and tiles are
+        None if the directory has not changed. tiles is a list of
+        (path, key, size, mtime) for files with a tile name. Symbolic links
+        to directories and dangling links are skipped.
+    """
+    mtime = os.stat(path).st_mtime_ns
+    if mtime == known_mtime:
+        return mtime, None, None
+
+    subdirectories = []
+    tiles = []
+    for entry in _scandir(path):
+        if entry.is_dir(follow_symlinks=False):
+            subdirectories.append(entry.path)
+            continue
+        try:
+            key = kn.key_from_name(entry.name)
+        except ValueError:
+            continue
+        try:
+            if not entry.is_file():
+                continue
+            stat = entry.stat()
+        except OSError:
+            # e.g. removed since the directory was read, skip only the entry
+            continue
+        tiles.append((entry.path, key, stat.st_size, stat.st_mtime_ns))
+
+    return mtime, subdirectories, tiles
+
+
+class Catalog(object):
+    """
+    Catalog of files with tile names, stored in a SQLite database.
+
+    Example:
+        >>> with Catalog("tiles.sqlite") as catalog:
+        ...     catalog.scan("/data/dtm", jobs=8)
+        ...     for entry in catalog.entries(unit="1km"):
+        ...         print(entry.path, entry.size)
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._connection = sqlite3.connect(path)
+        self._connection.executescript(_SCHEMA)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __len__(self):
+        return self._connection.execute("SELECT count(*) FROM tiles").fetchone()[0]
+
+    def close(self):
+        """
+        Close the catalog database.
+        """
+        self._connection.close()
+
+    def _known_directories(self, root):
+        """
+        Return modification times and subdirectories of directories in the
+        catalog that are in the tree below root.
+        """
+        rows = self._connection.execute(
+            "SELECT path, parent, mtime_ns FROM directories "
+            "WHERE path = ? OR substr(path, 1, ?) = ?",
+            (root, len(root) + 1, os.path.join(root, "")),
+        )
+        mtimes = {}
+        subdirectories = {}
+        for path, parent, mtime in rows:
+            mtimes[path] = mtime
+            subdirectories.setdefault(parent, []).append(path)
+
+        return mtimes, subdirectories
+
+    def _remove_directory(self, path):
+        """
+        Remove a directory and the tiles in it from the catalog.
+        """
+        self._connection.execute("DELETE FROM tiles WHERE directory = ?", (path,))
+        self._connection.execute("DELETE FROM directories WHERE path = ?", (path,))
+
+    def _update_directory(self, path, parent, mtime, tiles):
+        """
+        Replace the tiles of a directory in the catalog.
+        """
+        self._connection.execute("DELETE FROM tiles WHERE directory = ?", (path,))
+        rows = []
+        for tile_path, key, size, tile_mtime in tiles:
+            tile = kn.decode(key)
+            rows.append(
+                (tile_path, path, key, tile.unit, tile.northing, tile.easting)
+                + (size, tile_mtime)
+            )
+        self._connection.executemany(
+            "INSERT INTO tiles VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows
+        )
+        self._connection.execute(
+            "INSERT OR REPLACE INTO directories VALUES (?, ?, ?)",
+            (path, parent, mtime),
+        )
+
+    def scan(self, root, jobs=4, full=False):
+        """
+        Scan a directory tree and update the catalog.
+
+        Arguments:
+            root:       Root of directory tree.
+            jobs:       Number of threads reading directories.
+            full:       Read all directories, even if they have not changed
+                        since the last scan.
+
+        Returns:
+            ScanSummary with the number of directories in the tree, the
+            number of directories that were read and the number of files
+            with tile names in the tree.
+        """
+        root = os.path.abspath(root)
+        known_mtimes, known_subdirectories = self._known_directories(root)
+        mtimes = {} if full else known_mtimes
+
+        visited = set()
+        scanned = 0
+        files = 0
+        with ThreadPoolExecutor(max_workers=jobs) as executor:
+
+            def submit(path, parent):
+                visited.add(path)
+                future = executor.submit(_read_directory, path, mtimes.get(path))
+                pending[future] = (path, parent)
+
+            pending = {}
+            submit(root, None)
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    path, parent = pending.pop(future)
+                    try:
+                        mtime, subdirectories, tiles = future.result()
+                    except OSError:
+                        # directory removed or unreadable since it was found
+                        visited.discard(path)
+                        continue
+
+                    if subdirectories is None:
+                        subdirectories = known_subdirectories.get(path, [])
+                        files += self._count_directory(path)
+                    else:
+                        scanned += 1
+                        files += len(tiles)
+                        self._update_directory(path, parent, mtime, tiles)
+
+                    for subdirectory in subdirectories:
+                        submit(subdirectory, path)
+
+        for path in known_mtimes.keys() - visited:
+            self._remove_directory(path)
+        self._connection.commit()
+
+        return ScanSummary(len(visited), scanned, files)
+
+    def _count_directory(self, path):
+        """
+        Return number of tiles in directory.
+        """
+        return self._connection.execute(
+            "SELECT count(*) FROM tiles WHERE directory = ?", (path,)
+        ).fetchone()[0]
+
+    def entries(self, unit=None):
+        """
+        Generate entries in the catalog, ordered by tile key and path.
+
+        Arguments:
+            unit:       Only generate entries for tiles of this unit.
+
+        Returns:
+            Generator of CatalogEntry
+        """
+        query = "SELECT key, unit, northing, easting, path, size, mtime_ns FROM tiles"
+        parameters = ()
+        if unit is not None:
+            query += " WHERE unit = ?"
+            parameters = (unit,)
+        query += " ORDER BY key, path"
+
+        for row in self._connection.execute(query, parameters):
+            yield CatalogEntry(*row)
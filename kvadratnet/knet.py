@@ -5,24 +5,159 @@ Command line utils for kvadratnet.
 import os
 import sys
 import shutil
-from collections import Counter
 
 import click
+import numpy as np
 
 import kvadratnet as kn
+from kvadratnet import batch, export, geopackage, stats, vrt
+from kvadratnet.inventory import Catalog
+from kvadratnet.plan import LINK_MODES, link_action, plan_organize, plan_rename
+from kvadratnet.tileindex import write_index
 
 
 @click.group()
-def cli():
+@click.option(
+    "--stats",
+    "show_stats",
+    is_flag=True,
+    help="Print timings, function call counts and files handled at exit",
+)
+@click.option(
+    "--stats-json",
+    type=click.Path(dir_okay=False),
+    default=None,
+    help="Write the statistics as JSON to a file at exit. Use - for stdout",
+)
+@click.pass_context
+def cli(ctx, show_stats, stats_json):
     """
     CLI for kvadratnet
     """
+    if not (show_stats or stats_json):
+        return
+
+    collected = stats.start()
+
+    def report():
+        stats.stop()
+        if show_stats:
+            click.echo(collected.summary(), err=True)
+        if stats_json:
+            with click.open_file(stats_json, "w") as fileobj:
+                collected.write_json(fileobj)
+
+    ctx.call_on_close(report)
+
+
+def _from_file_option(func):
+    """
+    Add --from-file option to a command.
+    """
+    return click.option(
+        "--from-file",
+        type=click.File("r"),
+        default=None,
+        help="Read list of files from a file, one per line. Use - for stdin",
+    )(func)
+
+
+def _input_files(files, from_file):
+    """
+    Generate files given on the command line followed by the files listed
+    in from_file. from_file is read line by line.
+    """
+    if not files and from_file is None:
+        raise click.UsageError("No files given. Use FILES or --from-file.")
+
+    for filename in files:
+        yield filename
+
+    if from_file is not None:
+        for line in from_file:
+            line = line.rstrip("\r\n")
+            if line:
+                yield line
+
+
+def _jobs_option(func):
+    """
+    Add --jobs option to a command.
+    """
+    return click.option(
+        "--jobs",
+        "-j",
+        default=1,
+        type=click.IntRange(min=1),
+        help="Number of files handled in parallel. Defaults to 1",
+    )(func)
+
+
+def _dry_run_option(func):
+    """
+    Add --dry-run option to a command.
+    """
+    return click.option(
+        "--dry-run", is_flag=True, help="Print what would be done and exit",
+    )(func)
+
+
+def _run_plan(plan, action, jobs, dry_run, verbose, message):
+    """
+    Check and execute a plan.
+
+    Files without a tile name are reported. If the plan has missing sources,
+    colliding or existing destinations, they are reported and nothing is
+    done. Files that fail to be moved are reported after the other files
+    have been moved.
+
+    Arguments:
+        plan:       Plan to execute.
+        action:     Function that moves a file from src to dst.
+        jobs:       Number of threads.
+        dry_run:    Only print the operations in the plan.
+        verbose:    Print operations as they are done.
+        message:    Function that formats an operation as a message.
+    """
+    for f in plan.skipped:
+        print("{}: No kvadratnet tile name found. Skipping.".format(f))
+
+    with stats.phase("check"):
+        errors = [
+            "ERROR: {0} does not exist".format(op.src)
+            for op in plan.missing_sources(jobs)
+        ]
+        errors.extend(
+            "ERROR: {0} is the destination of {1}".format(dst, ", ".join(srcs))
+            for dst, srcs in plan.collisions()
+        )
+        errors.extend(
+            "ERROR: {0} already exists".format(op.dst)
+            for op in plan.existing_targets(jobs)
+        )
+    if errors:
+        for error in errors:
+            print(error)
+        sys.exit(1)
+
+    if dry_run:
+        for operation in plan.operations:
+            print(message(operation))
+        return
+
+    callback = (lambda op: print(message(op))) if verbose else None
+    failed = plan.execute(action, jobs, callback)
+    if failed:
+        for operation, error in failed:
+            print("ERROR: {0}: {1}".format(message(operation), error))
+        sys.exit(1)
 
 
 @cli.command()
 @click.argument(
-    "files", nargs=-1, required=True, type=click.Path("r"),
+    "files", nargs=-1, type=click.Path("r"),
 )
+@_from_file_option
 @click.option(
     "--prefix",
     default="",
@@ -33,10 +168,12 @@ def cli():
     default="",
     help="Text after kvadratnet cell identifier, e.g. 1km_6666_444_postfix.tif",
 )
+@_jobs_option
+@_dry_run_option
 @click.option(
     "--verbose", "-v", is_flag=True, help="Be verbose",
 )
-def rename(files, prefix, postfix, verbose):
+def rename(files, from_file, prefix, postfix, jobs, dry_run, verbose):
     """
     Batch rename files with kvadranet-names in them, e.g. add a prefix
     before the cell identifier. If a pre- or postfix is not specified,
@@ -44,23 +181,17 @@ def rename(files, prefix, postfix, verbose):
 
 
     FILES is a list of files to be renamed. Can be a globbing expression,
-    e.g. 'dtm/*.tif'.
+    e.g. 'dtm/*.tif'. Use --from-file for lists too long for the command line.
     """
-    for f in files:
-        (folder, filename) = os.path.split(f)
-        (base, ext) = os.path.splitext(filename)
+    with stats.phase("plan"):
+        plan = plan_rename(_input_files(files, from_file), prefix, postfix)
 
-        try:
-            tilename = kn.tile_name(base)
-        except ValueError:
-            print("{}: No kvadratnet tile name found. Skipping.".format(f))
-            continue
+    def message(operation):
+        return "Renaming {src} to {dst}".format(
+            src=os.path.basename(operation.src), dst=os.path.basename(operation.dst)
+        )
 
-        new_filename = prefix + tilename + postfix + ext
-        dst = os.path.join(folder, new_filename)
-        if verbose:
-            print("Renaming {src} to {dst}".format(src=base + ext, dst=new_filename))
-        os.rename(f, dst)
+    _run_plan(plan, os.rename, jobs, dry_run, verbose, message)
 
 
 @cli.command()
@@ -70,101 +201,456 @@ def rename(files, prefix, postfix, verbose):
 @click.argument(
     "files", nargs=-1, type=click.Path("r"),
 )
+@_from_file_option
+@click.option(
+    "--link",
+    type=click.Choice(LINK_MODES),
+    default=None,
+    help="Link files into the folders instead of moving them. If the "
+    "filesystem does not support the link type, reflink falls back to a copy "
+    "and hard falls back to sym",
+)
+@_jobs_option
+@_dry_run_option
 @click.option(
     "--verbose", "-v", is_flag=True, help="Be verbose",
 )
-def organize(units, files, verbose):
+def organize(units, files, from_file, link, jobs, dry_run, verbose):
     """
     Organize files into subfolders according to supplied
     list of tile units.
 
     FILES is a list of files thatrepresents files to be organized. Can be a
-    globbing expression, e.g. 'dtm/*.tif'.
+    globbing expression, e.g. 'dtm/*.tif'. Use --from-file for lists too long
+    for the command line.
 
     UNITS is a list of units representing folders that files will be re-organized
     into. Allowed units are 100m, 250m, 1km, 10kmm 50km, and 100km. The list has
     to be quoted string, e.g. "100km 10km".
+
+    With --link the original files are left in place and linked into the
+    folders, which avoids copying data when moving across filesystems.
+    """
+    try:
+        with stats.phase("plan"):
+            plan = plan_organize(_input_files(files, from_file), units.split())
+    except ValueError as error:
+        print("ERROR: {0}".format(error))
+        sys.exit(1)
+
+    def message(operation):
+        return "{verb} {filename} into {folder}".format(
+            verb="Linking" if link else "Moving",
+            filename=os.path.basename(operation.src),
+            folder=os.path.dirname(operation.dst),
+        )
+
+    action = link_action(link) if link else shutil.move
+    _run_plan(plan, action, jobs, dry_run, verbose, message)
+
+
+@cli.command()
+@click.argument(
+    "files", nargs=-1, type=click.Path("r"),
+)
+@_from_file_option
+@click.option(
+    "--unique", is_flag=True, help="Only show unique parents",
+)
+@click.option(
+    "--count", is_flag=True, help="Show number of childs for each parent",
+)
+def parents(files, from_file, unique, count):
     """
+    Create a list of parent tiles from a list of inputs child tiles.
 
-    # are input units known?
-    for unit in units.split():
-        if not unit in kn.UNITS:
-            raise ValueError("Unknown unit in units list ({})".format(unit))
+    FILES is a list of files that represent child files. Can be globbing
+    expression, e.g. dtm/*.tif. Use --from-file for lists too long for the
+    command line.
+    """
+
+    files = _input_files(files, from_file)
+    keys = np.fromiter(_tile_keys(files), dtype=np.uint64)
+
+    if unique:
+        parent_keys, parent_counts = batch.count_by_parent(keys, keys=True)
+    else:
+        parent_keys = batch.parent_keys(keys)
+        _, inverse, counts = np.unique(
+            parent_keys, return_inverse=True, return_counts=True
+        )
+        parent_counts = counts[inverse]
 
-    for f in files:
-        (_, filename) = os.path.split(f)
-        (base, ext) = os.path.splitext(filename)
+    for parent, parent_count in zip(
+        batch.names_from_keys(parent_keys).tolist(), parent_counts.tolist()
+    ):
+        if count:
+            print("{:<20} {}".format(parent, parent_count))
+        else:
+            print(parent)
 
+
+def _tile_keys(files):
+    """
+    Generate tile keys of files with a kvadratnet tile name. Other files
+    are skipped.
+    """
+    for filename in files:
         try:
-            tilename = kn.tile_name(base)
+            yield kn.key_from_name(os.path.basename(filename.rstrip()))
         except ValueError:
-            print("{}: No kvadratnet tile name found. Skipping.".format(f))
             continue
 
-        sub_dirs = []
-        for unit in reversed(kn.UNITS):
-            if not unit in units:
-                continue
-            try:
-                sub_dirs.append(kn.parent_tile(tilename, unit))
-            except ValueError:
-                print("ERROR: {0} is smaller than {1}".format(unit, tilename))
-                sys.exit(1)
-
-        folder = os.path.sep.join(sub_dirs)
+
+def _tile_files(files, others=None):
+    """
+    Find the files with a kvadratnet tile name.
+
+    Arguments:
+        files:      Iterable of filenames.
+        others:     Optional list that files without a tile name are
+                    appended to, in their original order.
+
+    Returns:
+        Tuple with a uint64 array of tile keys and a list of the files
+        with a tile name, in the same order.
+    """
+    keys = []
+    filenames = []
+    for filename in files:
         try:
-            os.makedirs(folder)
-        except OSError:
-            pass
+            keys.append(kn.key_from_name(os.path.basename(filename.rstrip())))
+        except ValueError:
+            if others is not None:
+                others.append(filename)
+            continue
+        filenames.append(filename)
+    return np.array(keys, dtype=np.uint64), filenames
+
+
+@cli.command()
+@click.argument(
+    "files", nargs=-1, type=click.Path("r"),
+)
+@_from_file_option
+@click.option(
+    "--format",
+    "fmt",
+    type=click.Choice(export.FORMATS),
+    default="wkt",
+    help="Output format. Defaults to wkt",
+)
+@click.option(
+    "--output", "-o", default="-", type=click.Path(), help="Output file",
+)
+@click.option(
+    "--crs", default=None, help="Coordinate system of GeoJSON output, e.g. EPSG:25832",
+)
+def footprints(files, from_file, fmt, output, crs):
+    """
+    Write footprints of tiles as WKT, WKB or GeoJSON.
+
+    FILES is a list of files with kvadratnet tile names. Can be a globbing
+    expression, e.g. 'dtm/*.tif'. Use --from-file for lists too long for the
+    command line.
+    """
+    kwargs = {"crs": crs} if fmt == "geojson" else {}
+    mode = "wb" if fmt == "wkb" else "w"
+    with click.open_file(output, mode) as fileobj:
+        export.write_footprints(
+            _tile_keys(_input_files(files, from_file)), fileobj, fmt, **kwargs
+        )
+
 
-        dst = os.path.join(folder, filename)
-        if verbose:
+@cli.command()
+@click.argument(
+    "roots", nargs=-1, required=True, type=click.Path(exists=True, file_okay=False),
+)
+@click.option(
+    "--catalog",
+    "-c",
+    default="kvadratnet.sqlite",
+    type=click.Path(dir_okay=False),
+    help="Catalog database. Defaults to kvadratnet.sqlite",
+)
+@click.option(
+    "--jobs",
+    "-j",
+    default=4,
+    type=click.IntRange(min=1),
+    help="Number of directories read in parallel. Defaults to 4",
+)
+@click.option(
+    "--full", is_flag=True, help="Rescan directories that have not changed",
+)
+def inventory(roots, catalog, jobs, full):
+    """
+    Build or update a catalog of files with kvadratnet tile names.
+
+    ROOTS are directories that are scanned recursively. Tile, path, size and
+    modification time of every file with a tile name is stored in a SQLite
+    catalog. When the catalog already exists, only directories that have
+    changed since the last run are read again.
+    """
+    with Catalog(catalog) as tile_catalog:
+        for root in roots:
+            summary = tile_catalog.scan(root, jobs, full)
             print(
-                "Moving {filename} into {folder}".format(
-                    filename=filename, folder=folder
-                )
+                "{root}: {files} tiles in {directories} directories "
+                "({scanned} scanned)".format(root=root, **summary._asdict())
             )
-        shutil.move(f, dst)
 
 
 @cli.command()
 @click.argument(
-    "files", nargs=-1, required=True, type=click.Path("r"),
+    "files", nargs=-1, type=click.Path("r"),
 )
+@_from_file_option
 @click.option(
-    "--unique", is_flag=True, help="Only show unique parents",
+    "--extent",
+    nargs=4,
+    type=float,
+    default=None,
+    metavar="MIN_E MIN_N MAX_E MAX_N",
+    help="Area that is expected to be covered by tiles of --unit",
 )
 @click.option(
-    "--count", is_flag=True, help="Show number of childs for each parent",
+    "--reference",
+    type=click.File("r"),
+    default=None,
+    help="File with the expected tiles, one per line. Use - for stdin",
 )
-def parents(files, unique, count):
+@click.option(
+    "--unit",
+    "-u",
+    type=click.Choice(kn.UNITS),
+    default="1km",
+    help="Unit of tiles covering --extent. Defaults to 1km",
+)
+def coverage(files, from_file, extent, reference, unit):
     """
-    Create a list of parent tiles from a list of inputs child tiles.
+    Find missing, extra and duplicate tiles.
 
-    FILES is a list of files that represent child files. Can be globbing
-    expression, e.g. dtm/*.tif.
+    FILES is a list of files with kvadratnet tile names that are compared
+    with the tiles covering --extent or the tiles listed in --reference.
+    Tiles are compared regardless of prefixes and postfixes in the filenames,
+    so files that only differ in those are reported as duplicates.
+
+    Exits with status 1 if tiles are missing or duplicated.
     """
+    if (extent is None) == (reference is None):
+        raise click.UsageError("Use either --extent or --reference.")
 
-    counter = Counter()
-    parent_list = []
-    for filename in files:
-        try:
-            tilename = kn.tile_name(filename.rstrip())
-        except ValueError:
-            continue
-        parent = kn.parent_tile(tilename)
-        parent_list.append(parent)
-        counter[parent] += 1
+    others = []
+    keys, filenames = _tile_files(_input_files(files, from_file), others)
+    for filename in others:
+        print("{}: No kvadratnet tile name found. Skipping.".format(filename))
 
-    if unique:
-        for key, value in counter.items():
-            if count:
-                print("{:<20} {}".format(key, value))
-            else:
-                print(key)
+    if reference is not None:
+        expected = np.fromiter(_tile_keys(reference), dtype=np.uint64)
+        report = batch.coverage(keys, expected, keys=True)
     else:
-        for parent in parent_list:
-            if count:
-                print("{:<20} {}".format(parent, counter[parent]))
-            else:
-                print(parent)
+        report = batch.coverage(keys, extent=extent, unit=unit, keys=True)
+
+    for name in batch.names_from_keys(report.missing).tolist():
+        print("MISSING {}".format(name))
+    for name in batch.names_from_keys(report.extra).tolist():
+        print("EXTRA {}".format(name))
+
+    duplicates = {key: [] for key in report.duplicates.tolist()}
+    for key, filename in zip(keys.tolist(), filenames):
+        if key in duplicates:
+            duplicates[key].append(filename)
+    for key, duplicate_files in duplicates.items():
+        print(
+            "DUPLICATE {}: {}".format(kn.name_from_key(key), ", ".join(duplicate_files))
+        )
+
+    print(
+        "{} missing, {} extra, {} duplicate tiles".format(
+            *(len(tile_keys) for tile_keys in report)
+        )
+    )
+    if len(report.missing) or len(report.duplicates):
+        sys.exit(1)
+
+
+@cli.command("sort")
+@click.argument(
+    "files", nargs=-1, type=click.Path("r"),
+)
+@_from_file_option
+@click.option(
+    "--order",
+    type=click.Choice(kn.ORDERS),
+    default="hilbert",
+    help="Order of tiles. hilbert and morton keep neighbouring tiles close "
+    "together, row sorts tiles row by row. Defaults to hilbert",
+)
+def sort_files(files, from_file, order):
+    """
+    Sort a list of files so that neighbouring tiles are processed together.
+
+    FILES is a list of files with kvadratnet tile names. Can be a globbing
+    expression, e.g. 'dtm/*.tif'. Use --from-file for lists too long for the
+    command line. Files without a tile name are listed last, in their
+    original order.
+    """
+    others = []
+    keys, filenames = _tile_files(_input_files(files, from_file), others)
+
+    order = batch.argsort_tiles(keys, order)
+    for index in order.tolist():
+        print(filenames[index])
+    for filename in others:
+        print(filename)
+
+
+@cli.command("index")
+@click.argument("output", type=click.Path(dir_okay=False))
+@click.argument(
+    "files", nargs=-1, type=click.Path("r"),
+)
+@_from_file_option
+@click.option(
+    "--no-paths", is_flag=True, help="Only store tiles, not the paths of the files",
+)
+def index_files(output, files, from_file, no_paths):
+    """
+    Write a tile index file for fast lookups of tiles.
+
+    OUTPUT is the index file. It can be read with kvadratnet.tileindex.TileIndex.
+    FILES is a list of files with kvadratnet tile names. Can be a globbing
+    expression, e.g. 'dtm/*.tif'. Use --from-file for lists too long for the
+    command line. The absolute path of each file is stored with its tile,
+    unless --no-paths is given. For duplicate tiles the first file is used.
+    """
+    keys, filenames = _tile_files(_input_files(files, from_file))
+    paths = None
+    if not no_paths:
+        paths = [os.path.abspath(filename) for filename in filenames]
+
+    count = write_index(output, keys, paths)
+    print("Wrote {0} tiles to {1}".format(count, output))
+
+
+@cli.command("vrt")
+@click.argument("output", type=click.Path(dir_okay=False, allow_dash=True))
+@click.argument(
+    "files", nargs=-1, type=click.Path("r"),
+)
+@_from_file_option
+@click.option(
+    "--resolution", "-r", type=float, required=True, help="Pixel size in meters",
+)
+@click.option(
+    "--bands", "-b", type=int, default=1, help="Number of bands. Defaults to 1",
+)
+@click.option(
+    "--type",
+    "data_type",
+    type=click.Choice(vrt.DATA_TYPES),
+    default="Float32",
+    help="Data type of the rasters. Defaults to Float32",
+)
+@click.option(
+    "--nodata", type=float, default=None, help="No data value of the rasters",
+)
+@click.option(
+    "--srs", default=None, help="Coordinate system of the rasters, e.g. EPSG:25832",
+)
+def vrt_files(output, files, from_file, resolution, bands, data_type, nodata, srs):
+    """
+    Write a GDAL VRT mosaic of raster tiles without opening the rasters.
+
+    OUTPUT is the VRT file, use - for stdout. FILES is a list of raster
+    files with kvadratnet tile names. Can be a globbing expression, e.g.
+    'dtm/*.tif'. Use --from-file for lists too long for the command line.
+    Files without a tile name are skipped.
+
+    The extent of each raster is given by its tile name, so all rasters
+    must cover their tile exactly and have the same resolution, number of
+    bands and data type.
+    """
+    keys, paths = _tile_files(_input_files(files, from_file))
+    if not paths:
+        raise click.UsageError("No files with tile names given.")
+
+    relative_to = None
+    if output != "-":
+        relative_to = os.path.dirname(os.path.abspath(output))
+
+    try:
+        with click.open_file(output, "w", atomic=output != "-") as fileobj:
+            count = vrt.write_vrt(
+                paths,
+                fileobj,
+                resolution,
+                bands=bands,
+                data_type=data_type,
+                nodata=nodata,
+                srs=srs,
+                relative_to=relative_to,
+                keys=keys,
+            )
+    except ValueError as error:
+        raise click.UsageError(str(error))
+
+    if output != "-":
+        print("Wrote {0} tiles to {1}".format(count, output))
+
+
+def _parse_srs_id(srs):
+    """
+    Return the EPSG code of a coordinate system given as "EPSG:code" or code.
+    """
+    if srs is None:
+        return -1
+    code = srs.upper()
+    if code.startswith("EPSG:"):
+        code = code[5:]
+    try:
+        return int(code)
+    except ValueError:
+        raise click.BadParameter("Expected EPSG:code, got {0}".format(srs))
+
+
+@cli.command("export")
+@click.argument("output", type=click.Path(dir_okay=False))
+@click.argument(
+    "files", nargs=-1, type=click.Path("r"),
+)
+@_from_file_option
+@click.option(
+    "--table", default="tiles", help="Name of the table. Defaults to tiles",
+)
+@click.option(
+    "--srs", default=None, help="Coordinate system of the tiles, e.g. EPSG:25832",
+)
+def export_files(output, files, from_file, table, srs):
+    """
+    Export footprints of tiles to a GeoPackage.
+
+    OUTPUT is the GeoPackage, which is created if it does not exist. FILES
+    is a list of files with kvadratnet tile names. Can be a globbing
+    expression, e.g. 'dtm/*.tif'. Use --from-file for lists too long for
+    the command line. Files without a tile name are skipped.
+
+    The table gets a row for each file with the footprint, tile name, unit
+    and path of the file, and an R*Tree spatial index.
+    """
+    srs_id = _parse_srs_id(srs)
+    keys, paths = _tile_files(_input_files(files, from_file))
+
+    try:
+        count = geopackage.write_geopackage(
+            keys,
+            output,
+            paths=paths,
+            table=table,
+            srs_id=srs_id,
+        )
+    except ValueError as error:
+        raise click.UsageError(str(error))
+
+    print("Wrote {0} tiles to {1}".format(count, output))
@@ -0,0 +1,348 @@
+"""
+Plans for moving and renaming files with kvadratnet tile names.
+
+Reorganizing large amounts of files is done in two phases. First a plan is
+computed in memory: the directories that are needed and the source and
+destination of every file. Collisions between destinations are found
+before anything is touched on disk. Then the plan is executed, optionally
+by a pool of threads, which helps keeping network filesystems busy.
+"""
+
+import errno
+import os
+import shutil
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+import kvadratnet as kn
+from kvadratnet import stats
+
+Operation = namedtuple("Operation", "src, dst")
+
+LINK_MODES = ["hard", "sym", "reflink"]
+
+# ioctl request for cloning a file on Linux, see ioctl_ficlone(2)
+_FICLONE = 0x40049409
+
+
+class Plan(object):
+    """
+    A set of directories to create and files to move.
+
+    Attributes:
+        directories:    Directories to create, in the order they were added.
+        operations:     List of Operations.
+        skipped:        Files that were skipped since they have no tile name.
+    """
+
+    def __init__(self):
+        self.directories = []
+        self.operations = []
+        self.skipped = []
+        self._directories = set()
+        self._sources = {}  # destination -> list of sources
+
+    def __len__(self):
+        return len(self.operations)
+
+    def add_directory(self, directory):
+        """
+        Add a directory to be created.
+        """
+        if directory and directory not in self._directories:
+            self._directories.add(directory)
+            self.directories.append(directory)
+
+    def add(self, src, dst):
+        """
+        Add a file to be moved from src to dst.
+        """
+        self.operations.append(Operation(src, dst))
+        self._sources.setdefault(os.path.normpath(dst), []).append(src)
+
+    def collisions(self):
+        """
+        Find destinations that more than one file is moved to.
+
+        Returns:
+            List of (destination, list of sources)
+        """
+        return [(dst, srcs) for dst, srcs in self._sources.items() if len(srcs) > 1]
+
+    def existing_targets(self, jobs=1):
+        """
+        Find destinations that already exist on disk.
+
+        Arguments:
+            jobs:       Number of threads used to check destinations.
+
+        Returns:
+            List of Operations with an existing destination.
+        """
+        operations = [op for op in self.operations if op.src != op.dst]
+        with ThreadPoolExecutor(max_workers=jobs) as executor:
+            exists = list(executor.map(os.path.lexists, (op.dst for op in operations)))
+
+        return [op for op, exist in zip(operations, exists) if exist]
+
+    def missing_sources(self, jobs=1):
+        """
+        Find sources that do not exist on disk.
+
+        Arguments:
+            jobs:       Number of threads used to check sources.
+
+        Returns:
+            List of Operations with a missing source.
+        """
+        with ThreadPoolExecutor(max_workers=jobs) as executor:
+            exists = list(
+                executor.map(os.path.lexists, (op.src for op in self.operations))
+            )
+
+        return [op for op, exist in zip(self.operations, exists) if not exist]
+
+    def execute(self, action=shutil.move, jobs=1, callback=None):
+        """
+        Create directories and move files.
+
+        A file that cannot be moved does not stop the other files from being
+        moved. The failed operations are returned instead.
+
+        Arguments:
+            action:     Function called with src and dst of each operation.
+                        Defaults to shutil.move.
+            jobs:       Number of threads used.
+            callback:   Function called with each Operation once it is done.
+                        Called from the calling thread, in plan order.
+
+        Returns:
+            List of (Operation, OSError) for operations that failed.
+        """
+
+        def makedirs(directory):
+            os.makedirs(directory, exist_ok=True)
+
+        collector = stats.active()
+
+        def run(operation):
+            try:
+                size = os.lstat(operation.src).st_size
+                action(operation.src, operation.dst)
+            except OSError as error:
+                return error
+            if collector is not None:
+                collector.add_file(size)
+            return None
+
+        failed = []
+        with ThreadPoolExecutor(max_workers=jobs) as executor:
+            # directories are created first so that files can be moved in any order
+            with stats.phase("makedirs"):
+                list(executor.map(makedirs, self.directories))
+
+            with stats.phase("move"):
+                for operation, error in zip(
+                    self.operations, executor.map(run, self.operations)
+                ):
+                    if error is not None:
+                        failed.append((operation, error))
+                    elif callback:
+                        callback(operation)
+
+        return failed
+
+
+def symlink(src, dst):
+    """
+    Create a symbolic link at dst pointing to src. The link is relative, so
+    it stays valid if the whole directory tree is moved.
+
+    Raises:
+        FileNotFoundError:  If src does not exist.
+    """
+    if not os.path.lexists(src):
+        raise FileNotFoundError(errno.ENOENT, os.strerror(errno.ENOENT), src)
+    os.symlink(os.path.relpath(src, os.path.dirname(dst) or os.curdir), dst)
+
+
+def reflink(src, dst):
+    """
+    Create dst as a copy-on-write clone of src.
+
+    Raises:
+        OSError:    If the platform or filesystem does not support cloning.
+    """
+    if fcntl is None:
+        raise OSError(
+            errno.EOPNOTSUPP, "Reflinks are not supported on this platform", src
+        )
+
+    with open(src, "rb") as src_file:
+        with open(dst, "xb") as dst_file:
+            try:
+                fcntl.ioctl(dst_file.fileno(), _FICLONE, src_file.fileno())
+            except OSError:
+                dst_file.close()
+                os.remove(dst)
+                raise
+
+
+def copy(src, dst):
+    """
+    Copy src to dst, including permissions and modification time.
+
+    Raises:
+        FileExistsError:    If dst already exists.
+    """
+    with open(src, "rb") as src_file:
+        with open(dst, "xb") as dst_file:
+            shutil.copyfileobj(src_file, dst_file)
+    shutil.copystat(src, dst)
+
+
+_LINK_FUNCTIONS = {"hard": os.link, "sym": symlink, "reflink": reflink, "copy": copy}
+
+# link functions tried when a mode is not supported by the filesystem. A
+# reflink falls back to a copy, never to a hard link, since changes to a
+# hard link would change the original file.
+_LINK_FALLBACKS = {
+    "reflink": ["reflink", "copy"],
+    "hard": ["hard", "sym"],
+    "sym": ["sym"],
+}
+
+# errors meaning that the filesystem or platform does not support a type of
+# link. Other errors, e.g. a missing source, are raised.
+_UNSUPPORTED_ERRNOS = {
+    errno.EXDEV,
+    errno.EPERM,
+    errno.EOPNOTSUPP,
+    errno.ENOTSUP,
+    errno.EINVAL,
+    errno.ENOTTY,
+}
+
+
+def link_action(mode):
+    """
+    Return a function that links src to dst with one of LINK_MODES.
+
+    If the filesystem does not support the requested link type, e.g. hard
+    links across filesystems, hard links fall back to symbolic links. If
+    the filesystem cannot clone files, reflinks fall back to copying the
+    file. Other errors, e.g. a missing source, are raised.
+
+    Arguments:
+        mode:       One of LINK_MODES.
+
+    Returns:
+        Function with arguments src and dst.
+    """
+    if mode not in LINK_MODES:
+        raise ValueError("Unknown link mode: {0}".format(mode))
+    functions = [_LINK_FUNCTIONS[fallback] for fallback in _LINK_FALLBACKS[mode]]
+
+    def link(src, dst):
+        for function in functions[:-1]:
+            try:
+                return function(src, dst)
+            except OSError as error:
+                if error.errno not in _UNSUPPORTED_ERRNOS:
+                    raise
+        return functions[-1](src, dst)
+
+    return link
+
+
+def _split_name(path):
+    """
+    Split path in folder, filename and the tile name of the file.
+
+    Raises:
+        ValueError:     If the filename does not contain a tile name.
+    """
+    folder, filename = os.path.split(path)
+    base, _ = os.path.splitext(filename)
+
+    return folder, filename, kn.tile_name(base)
+
+
+def plan_rename(files, prefix="", postfix=""):
+    """
+    Plan renaming of files so only the tile name, prefix and postfix is left.
+
+    Arguments:
+        files:      Iterable of paths.
+        prefix:     Text before tile name.
+        postfix:    Text after tile name.
+
+    Returns:
+        Plan
+    """
+    plan = Plan()
+    for path in files:
+        try:
+            folder, filename, tilename = _split_name(path)
+        except ValueError:
+            plan.skipped.append(path)
+            continue
+
+        ext = os.path.splitext(filename)[1]
+        dst = os.path.join(folder, prefix + tilename + postfix + ext)
+        if dst != path:
+            plan.add(path, dst)
+
+    return plan
+
+
+def plan_organize(files, units):
+    """
+    Plan moving files into subfolders named after their parent tiles.
+
+    Arguments:
+        files:      Iterable of paths.
+        units:      List of units. The folder hierarchy is created from
+                    the largest to the smallest unit.
+
+    Returns:
+        Plan
+
+    Raises:
+        ValueError:     If a unit is unknown or not larger than the unit of
+                        a file.
+    """
+    for unit in units:
+        if unit not in kn.UNITS:
+            raise ValueError("Unknown unit in units list ({})".format(unit))
+    units = [unit for unit in reversed(kn.UNITS) if unit in units]
+
+    plan = Plan()
+    folders = {}  # tile key -> folder
+    for path in files:
+        try:
+            _, filename, tilename = _split_name(path)
+        except ValueError:
+            plan.skipped.append(path)
+            continue
+
+        key = kn.key_from_name(tilename)
+        if key not in folders:
+            sub_dirs = []
+            for unit in units:
+                try:
+                    sub_dirs.append(kn.name_from_key(kn.parent_key(key, unit)))
+                except ValueError:
+                    raise ValueError("{0} is smaller than {1}".format(unit, tilename))
+            folders[key] = os.path.sep.join(sub_dirs)
+
+        folder = folders[key]
+        plan.add_directory(folder)
+        plan.add(path, os.path.join(folder, filename))
+
+    return plan
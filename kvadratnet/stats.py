@@ -0,0 +1,244 @@
+"""
+Runtime statistics for kvadratnet operations.
+
+Statistics are only collected while a Stats object is active. When none is
+active the instrumented code does a single check for each phase and the
+counted functions are not wrapped at all, so the overhead is negligible.
+
+Example:
+    >>> from kvadratnet import stats
+    >>> with stats.collect() as collected:
+    ...     plan = plan_organize(files, ["10km"])
+    ...     plan.execute()
+    >>> print(collected.summary())
+"""
+
+import contextlib
+import functools
+import json
+import threading
+import time
+from collections import OrderedDict
+
+import kvadratnet as kn
+
+# functions in the kvadratnet module that calls are counted for
+COUNTED_FUNCTIONS = [
+    "tile_name",
+    "parent_tile",
+    "validate_name",
+    "key_from_name",
+    "name_from_key",
+    "parent_key",
+]
+
+_active = None
+
+
+class Stats(object):
+    """
+    Timings, call counts and file counts collected during an operation.
+
+    Attributes:
+        phases:     Seconds spent in each phase, in the order the phases
+                    were first entered.
+        calls:      Number of calls of each of the counted functions.
+        files:      Number of files handled.
+        bytes:      Number of bytes in the files handled.
+    """
+
+    def __init__(self):
+        self.phases = OrderedDict()
+        self.calls = OrderedDict((name, 0) for name in COUNTED_FUNCTIONS)
+        self.files = 0
+        self.bytes = 0
+        self._start = time.perf_counter()
+        self._end = None
+        self._lock = threading.Lock()
+
+    @property
+    def elapsed(self):
+        """
+        Seconds since the statistics were started, or until they were stopped.
+        """
+        end = self._end if self._end is not None else time.perf_counter()
+        return end - self._start
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        """
+        Context manager that adds the time spent in it to phase name.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            with self._lock:
+                self.phases[name] = (
+                    self.phases.get(name, 0.0) + time.perf_counter() - start
+                )
+
+    def count(self, name):
+        """
+        Count a call of function name.
+        """
+        with self._lock:
+            self.calls[name] = self.calls.get(name, 0) + 1
+
+    def add_file(self, size):
+        """
+        Count a file of size bytes as handled.
+        """
+        with self._lock:
+            self.files += 1
+            self.bytes += size
+
+    def stop(self):
+        """
+        Stop the clock for the total elapsed time.
+        """
+        if self._end is None:
+            self._end = time.perf_counter()
+
+    def as_dict(self):
+        """
+        Return the statistics as a dict that can be serialized as JSON.
+        """
+        elapsed = self.elapsed
+        return {
+            "elapsed": elapsed,
+            "phases": dict(self.phases),
+            "calls": dict(self.calls),
+            "files": self.files,
+            "bytes": self.bytes,
+            "files_per_second": self.files / elapsed if elapsed > 0 else 0.0,
+        }
+
+    def write_json(self, fileobj):
+        """
+        Write the statistics as JSON to fileobj.
+        """
+        json.dump(self.as_dict(), fileobj, indent=2, sort_keys=True)
+        fileobj.write("\n")
+
+    def summary(self):
+        """
+        Return a human readable summary of the statistics.
+        """
+        values = self.as_dict()
+        lines = ["{:<20} {:>12}".format("Phase", "Seconds")]
+        for name, seconds in self.phases.items():
+            lines.append("{:<20} {:>12.3f}".format(name, seconds))
+        lines.append("{:<20} {:>12.3f}".format("total", values["elapsed"]))
+        lines.append("")
+        lines.append("{:<20} {:>12}".format("Function", "Calls"))
+        for name, calls in self.calls.items():
+            lines.append("{:<20} {:>12}".format(name, calls))
+        lines.append("")
+        lines.append("{:<20} {:>12}".format("files", self.files))
+        lines.append("{:<20} {:>12.1f}".format("files/s", values["files_per_second"]))
+        lines.append("{:<20} {:>12}".format("bytes", self.bytes))
+        return "\n".join(lines)
+
+
+class _NoPhase(object):
+    """
+    Context manager that does nothing, used when no statistics are collected.
+    """
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+
+_NO_PHASE = _NoPhase()
+
+
+def active():
+    """
+    Return the active Stats object, or None when no statistics are collected.
+    """
+    return _active
+
+
+def phase(name):
+    """
+    Return a context manager timing phase name of the active Stats object.
+    """
+    if _active is None:
+        return _NO_PHASE
+    return _active.phase(name)
+
+
+def _counting(name, function):
+    """
+    Wrap function so calls are counted in the active Stats object.
+    """
+
+    @functools.wraps(function)
+    def counted(*args, **kwargs):
+        if _active is not None:
+            _active.count(name)
+        return function(*args, **kwargs)
+
+    counted.__wrapped_by_stats__ = True
+    return counted
+
+
+def start():
+    """
+    Start collecting statistics.
+
+    The functions in COUNTED_FUNCTIONS are replaced in the kvadratnet module
+    by wrappers that count calls, until stop is called.
+
+    Returns:
+        Stats
+
+    Raises:
+        ValueError:     If statistics are already being collected.
+    """
+    global _active
+    if _active is not None:
+        raise ValueError("Statistics are already being collected")
+
+    for name in COUNTED_FUNCTIONS:
+        setattr(kn, name, _counting(name, getattr(kn, name)))
+    _active = Stats()
+    return _active
+
+
+def stop():
+    """
+    Stop collecting statistics and restore the counted functions.
+
+    Returns:
+        The Stats object that was active, or None.
+    """
+    global _active
+    collected, _active = _active, None
+    for name in COUNTED_FUNCTIONS:
+        function = getattr(kn, name)
+        if getattr(function, "__wrapped_by_stats__", False):
+            setattr(kn, name, function.__wrapped__)
+
+    if collected is not None:
+        collected.stop()
+    return collected
+
+
+@contextlib.contextmanager
+def collect():
+    """
+    Context manager collecting statistics while it is active.
+
+    Returns:
+        Stats
+    """
+    collected = start()
+    try:
+        yield collected
+    finally:
+        stop()
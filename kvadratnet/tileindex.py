@@ -0,0 +1,285 @@
+"""
+Compact on-disk index of tiles for fast membership and bounding box queries.
+
+An index file contains the sorted tile keys of a set of tiles, grouped by
+unit, and optionally a payload for each tile, e.g. the path of the file
+with the tile. Readers memory map the file, so processes reading the same
+index share one copy in the page cache, and opening an index takes the same
+short time regardless of the number of tiles.
+
+File layout, all integers are little endian:
+
+    header          magic "KNETIDX1", version (uint32), flags (uint32),
+                    number of keys (uint64), number of units (uint64)
+    unit table      for each unit: name (16 bytes, NUL padded), unit id,
+                    position of the first key and number of keys (uint64)
+    keys            sorted tile keys (uint64)
+    offsets         if flags has HAS_PAYLOAD: number of keys + 1 offsets
+                    into the payload data (uint64)
+    payload data    payloads of all tiles, concatenated
+"""
+
+import os
+import struct
+
+import numpy as np
+
+import kvadratnet as kn
+from kvadratnet import batch
+
+MAGIC = b"KNETIDX1"
+VERSION = 1
+HAS_PAYLOAD = 1
+
+_HEADER = struct.Struct("<8sIIQQ")
+_UNIT = struct.Struct("<16sQQQ")
+_KEY_DTYPE = np.dtype("<u8")
+
+
+def write_index(path, tiles, payloads=None):
+    """
+    Write an index file.
+
+    The file is written to a temporary file first and then moved in place,
+    so readers that have the old index open are not affected.
+
+    Arguments:
+        path:       Path of the index file.
+        tiles:      Array of tile keys or iterable of tile names, tile keys
+                    or Tiles. Duplicate tiles are only stored once.
+        payloads:   Optional sequence of bytes or strings, one for each tile
+                    in tiles. Strings are stored UTF-8 encoded.
+
+    Returns:
+        Number of tiles in the index.
+
+    Raises:
+        ValueError:     If the number of payloads does not match the number
+                        of tiles.
+    """
+    keys = batch._as_keys(tiles)
+    if payloads is not None:
+        payloads = list(payloads)
+        if len(payloads) != len(keys):
+            raise ValueError("Number of payloads does not match number of tiles")
+
+    keys, first = np.unique(keys, return_index=True)
+    unit_ids = (keys >> np.uint64(kn._KEY_UNIT_SHIFT)).astype(np.int64)
+    present, starts, counts = np.unique(unit_ids, return_index=True, return_counts=True)
+    flags = HAS_PAYLOAD if payloads is not None else 0
+
+    tmp_path = "{0}.tmp{1}".format(path, os.getpid())
+    with open(tmp_path, "wb") as fileobj:
+        fileobj.write(_HEADER.pack(MAGIC, VERSION, flags, len(keys), len(present)))
+        for unit_id, start, count in zip(present, starts, counts):
+            name = kn._KEY_UNITS[unit_id].encode("ascii")
+            fileobj.write(_UNIT.pack(name, int(unit_id), int(start), int(count)))
+        fileobj.write(keys.astype(_KEY_DTYPE).tobytes())
+
+        if payloads is not None:
+            data = [payloads[i] for i in first.tolist()]
+            data = [p.encode("utf-8") if isinstance(p, str) else p for p in data]
+            offsets = np.zeros(len(data) + 1, dtype=_KEY_DTYPE)
+            np.cumsum([len(p) for p in data], out=offsets[1:])
+            fileobj.write(offsets.tobytes())
+            fileobj.write(b"".join(data))
+    os.replace(tmp_path, path)
+
+    return len(keys)
+
+
+def _map_array(path, offset, count, dtype=_KEY_DTYPE):
+    """
+    Memory map count values of dtype starting at byte offset in file path.
+    """
+    if count == 0:
+        return np.empty(0, dtype=dtype)
+    return np.memmap(path, dtype=dtype, mode="r", offset=offset, shape=(count,))
+
+
+class TileIndex(object):
+    """
+    Read-only index of tiles in a file written by write_index.
+
+    The keys are memory mapped, so opening an index only reads the header
+    and lookups only touch the pages needed by the binary searches.
+
+    Example:
+        >>> write_index("tiles.knidx", names, payloads=paths)
+        >>> index = TileIndex("tiles.knidx")
+        >>> "1km_6223_575" in index
+        True
+        >>> index.payload("1km_6223_575")
+        b'/data/dtm/1km_6223_575.tif'
+
+    Attributes:
+        keys:       Memory mapped array of the sorted tile keys.
+        units:      Dict with (first position, number of keys) of each unit
+                    in the index.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as fileobj:
+            header = fileobj.read(_HEADER.size)
+            if len(header) < _HEADER.size or header[:8] != MAGIC:
+                raise ValueError("Not a tile index: {0}".format(path))
+            _, version, flags, key_count, unit_count = _HEADER.unpack(header)
+            if version != VERSION:
+                raise ValueError("Unsupported tile index version: {0}".format(version))
+            unit_table = fileobj.read(_UNIT.size * unit_count)
+
+        self.units = {}
+        for i in range(unit_count):
+            name, unit_id, start, count = _UNIT.unpack_from(unit_table, i * _UNIT.size)
+            name = name.rstrip(b"\0").decode("ascii")
+            if kn._UNIT_INDEX.get(name) != unit_id:
+                raise ValueError(
+                    "Unit {0} in tile index is not registered with the same id".format(
+                        name
+                    )
+                )
+            self.units[name] = (start, count)
+
+        offset = _HEADER.size + _UNIT.size * unit_count
+        self.keys = _map_array(path, offset, key_count)
+
+        self._offsets = None
+        if flags & HAS_PAYLOAD:
+            offset += 8 * key_count
+            self._offsets = _map_array(path, offset, key_count + 1)
+            self._data = _map_array(
+                path,
+                offset + 8 * (key_count + 1),
+                int(self._offsets[-1]) if key_count else 0,
+                np.uint8,
+            )
+
+    def __len__(self):
+        return len(self.keys)
+
+    def __contains__(self, tile):
+        return self.position(tile) >= 0
+
+    @property
+    def has_payload(self):
+        """
+        True if the index has a payload for each tile.
+        """
+        return self._offsets is not None
+
+    def position(self, tile):
+        """
+        Return position of a tile in the index, -1 if it is not in the index.
+
+        Arguments:
+            tile:       Tile name, tile key or Tile.
+        """
+        key = kn._as_key(tile)
+        position = int(np.searchsorted(self.keys, np.uint64(key)))
+        if position < len(self.keys) and int(self.keys[position]) == key:
+            return position
+        return -1
+
+    def lookup(self, keys):
+        """
+        Find keys in the index.
+
+        Arguments:
+            keys:       Array-like of tile keys.
+
+        Returns:
+            int64 array with the position of each key in the index, -1 for
+            keys that are not in the index.
+        """
+        keys = np.asarray(keys, dtype=np.uint64)
+        if not len(self.keys):
+            return np.full(keys.shape, -1, dtype=np.int64)
+
+        positions = np.minimum(np.searchsorted(self.keys, keys), len(self.keys) - 1)
+        return np.where(self.keys[positions] == keys, positions, -1)
+
+    def contains(self, keys):
+        """
+        Return a boolean array telling which keys are in the index.
+        """
+        return self.lookup(keys) >= 0
+
+    def query(self, extent, unit="1km"):
+        """
+        Find tiles in the index that intersect a bounding box.
+
+        Each grid row of the bounding box is a contiguous range of keys, so
+        the tiles are found with two binary searches per row.
+
+        Arguments:
+            extent:     Bounding box (min_easting, min_northing, max_easting, max_northing)
+            unit:       Unit of tiles.
+
+        Returns:
+            int64 array with the positions of the tiles in the index, sorted.
+        """
+        batch._check_unit(unit)
+        first_row, last_row, first_column, last_column = kn._grid_range(
+            extent, kn.TILE_SIZES[unit]
+        )
+        if unit not in self.units or first_row > kn._KEY_ORDINATE_MASK:
+            return np.empty(0, dtype=np.int64)
+
+        last_row = min(last_row, kn._KEY_ORDINATE_MASK)
+        first_column = min(first_column, kn._KEY_ORDINATE_MASK)
+        last_column = min(last_column, kn._KEY_ORDINATE_MASK)
+        rows = np.arange(first_row, last_row + 1, dtype=np.int64)
+        unit_ids = np.full(rows.shape, kn._UNIT_INDEX[unit])
+        lows = batch._pack_keys(unit_ids, rows, np.full(rows.shape, first_column))
+        highs = batch._pack_keys(unit_ids, rows, np.full(rows.shape, last_column))
+
+        start, count = self.units[unit]
+        keys = self.keys[start : start + count]
+        begins = np.searchsorted(keys, lows, side="left")
+        ends = np.searchsorted(keys, highs, side="right")
+        lengths = ends - begins
+        if not lengths.sum():
+            return np.empty(0, dtype=np.int64)
+
+        # expand the ranges [begin, end) into positions without a Python loop
+        steps = np.ones(lengths.sum(), dtype=np.int64)
+        nonempty = lengths > 0
+        range_starts = np.cumsum(lengths)[nonempty] - lengths[nonempty]
+        steps[range_starts] = begins[nonempty]
+        steps[range_starts[1:]] -= ends[nonempty][:-1] - 1
+        return start + np.cumsum(steps)
+
+    def payload(self, tile):
+        """
+        Return the payload of a tile.
+
+        Arguments:
+            tile:       Tile name, tile key or Tile.
+
+        Returns:
+            bytes, or None if the tile is not in the index.
+
+        Raises:
+            ValueError:     If the index has no payloads.
+        """
+        position = self.position(tile)
+        if position < 0:
+            if not self.has_payload:
+                raise ValueError("Tile index has no payloads")
+            return None
+        return self.payload_at(position)
+
+    def payload_at(self, position):
+        """
+        Return the payload of the tile at a position in the index.
+
+        Raises:
+            ValueError:     If the index has no payloads.
+        """
+        if not self.has_payload:
+            raise ValueError("Tile index has no payloads")
+
+        begin = int(self._offsets[position])
+        end = int(self._offsets[position + 1])
+        return self._data[begin:end].tobytes()
@@ -0,0 +1,183 @@
+"""
+GDAL virtual raster (VRT) mosaics of tiled rasters.
+
+The extent of a tile is given by its name, so a VRT mosaic of a set of
+tiles can be written without opening any of the rasters, as long as all
+rasters have the same resolution, number of bands and data type. This is
+a lot faster than gdalbuildvrt for large numbers of tiles, which has to
+open every file to read its extent.
+"""
+
+import os
+from xml.sax.saxutils import escape
+
+import numpy as np
+
+import kvadratnet as kn
+from kvadratnet import batch
+
+DATA_TYPES = [
+    "Byte",
+    "Int8",
+    "UInt16",
+    "Int16",
+    "UInt32",
+    "Int32",
+    "UInt64",
+    "Int64",
+    "Float32",
+    "Float64",
+]
+
+_SOURCE = (
+    "    <{0}>\n"
+    '      <SourceFilename relativeToVRT="{1}">{2}</SourceFilename>\n'
+    "      <SourceBand>{3}</SourceBand>\n"
+    "      <SourceProperties {4} />\n"
+    '      <SrcRect xOff="0" yOff="0" xSize="{5}" ySize="{6}" />\n'
+    '      <DstRect xOff="{7}" yOff="{8}" xSize="{5}" ySize="{6}" />\n'
+    "{9}"
+    "    </{0}>\n"
+)
+
+
+def _source_filename(path, relative_to):
+    """
+    Return (relativeToVRT, escaped filename) of a source raster.
+    """
+    if relative_to is None:
+        return 0, escape(path)
+
+    path = os.path.relpath(os.path.abspath(path), relative_to)
+    return 1, escape(path.replace(os.sep, "/"))
+
+
+def write_vrt(
+    files,
+    fileobj,
+    resolution,
+    bands=1,
+    data_type="Float32",
+    nodata=None,
+    srs=None,
+    block_size=None,
+    relative_to=None,
+    chunksize=65536,
+    keys=None,
+):
+    """
+    Write a VRT mosaic of raster files with kvadratnet tile names.
+
+    No rasters are opened. All rasters are assumed to cover exactly their
+    tile and to have the given resolution, number of bands and data type.
+
+    Arguments:
+        files:      Iterable of paths of raster files. The file names must
+                    contain a tile name.
+        fileobj:    Text file object to write to.
+        resolution: Pixel size in meters. Must divide the tile sizes.
+        bands:      Number of bands in the rasters.
+        data_type:  GDAL data type of the rasters, one of DATA_TYPES.
+        nodata:     No data value of the rasters, a number.
+        srs:        Coordinate system of the rasters, e.g. "EPSG:25832".
+        block_size: Optional (width, height) of the blocks of the rasters,
+                    helps GDAL cache blocks efficiently.
+        relative_to: Directory that paths are written relative to, usually
+                    the directory of the VRT file. When None paths are
+                    written as given.
+        chunksize:  Number of sources formatted before writing to fileobj.
+        keys:       Optional array of the tile keys of files, in the same
+                    order. Parsed from the file names when None.
+
+    Returns:
+        Number of rasters in the mosaic.
+
+    Raises:
+        ValueError:     If a file name does not contain a tile name, or the
+                        arguments are invalid.
+    """
+    if data_type not in DATA_TYPES:
+        raise ValueError("Unknown data type: {0}".format(data_type))
+    if bands < 1:
+        raise ValueError("bands must be at least 1")
+    if nodata is not None:
+        try:
+            nodata = repr(float(nodata))
+        except (TypeError, ValueError):
+            raise ValueError("nodata must be a number, got {0!r}".format(nodata))
+
+    paths = list(files)
+    if keys is None:
+        keys = [kn.key_from_name(os.path.basename(path)) for path in paths]
+    keys = np.asarray(keys, dtype=np.uint64)
+    if len(keys) != len(paths):
+        raise ValueError("Number of keys does not match number of files")
+    layout = batch.mosaic_layout(keys, resolution)
+
+    height, width = layout.shape
+    fileobj.write(
+        '<VRTDataset rasterXSize="{0}" rasterYSize="{1}">\n'.format(width, height)
+    )
+    if srs:
+        fileobj.write("  <SRS>{0}</SRS>\n".format(escape(srs)))
+    fileobj.write(
+        "  <GeoTransform>{0}</GeoTransform>\n".format(
+            ", ".join(repr(float(value)) for value in layout.geotransform)
+        )
+    )
+
+    if relative_to is not None:
+        relative_to = os.path.abspath(relative_to)
+    filenames = [_source_filename(path, relative_to) for path in paths]
+
+    properties = 'RasterXSize="{0}" RasterYSize="{1}" DataType="{2}"'
+    if block_size is not None:
+        properties += ' BlockXSize="{0}" BlockYSize="{1}"'.format(*block_size)
+
+    source_type = "SimpleSource"
+    source_nodata = ""
+    if nodata is not None:
+        source_type = "ComplexSource"
+        source_nodata = "      <NODATA>{0}</NODATA>\n".format(nodata)
+
+    windows = zip(
+        layout.columns.tolist(),
+        layout.rows.tolist(),
+        layout.widths.tolist(),
+        layout.heights.tolist(),
+    )
+    windows = [
+        (
+            properties.format(window_width, window_height, data_type),
+            window_width,
+            window_height,
+            column,
+            row,
+        )
+        for column, row, window_width, window_height in windows
+    ]
+
+    for band in range(1, bands + 1):
+        fileobj.write(
+            '  <VRTRasterBand dataType="{0}" band="{1}">\n'.format(data_type, band)
+        )
+        if nodata is not None:
+            fileobj.write("    <NoDataValue>{0}</NoDataValue>\n".format(nodata))
+
+        for start in range(0, len(paths), chunksize):
+            sources = [
+                _SOURCE.format(
+                    source_type, relative, filename, band, *window, source_nodata
+                )
+                for (relative, filename), window in zip(
+                    filenames[start : start + chunksize],
+                    windows[start : start + chunksize],
+                )
+            ]
+            fileobj.write("".join(sources))
+
+        fileobj.write("  </VRTRasterBand>\n")
+
+    fileobj.write("</VRTDataset>\n")
+
+    return len(paths)
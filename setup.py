@@ -37,7 +37,7 @@ setup(
     author_email="kristianevers@gmail.com",
     license="ISC",
     packages=["kvadratnet", "tests"],
-    install_requires=["click"],
+    install_requires=["click", "numpy"],
     test_suite="tests/",
     tests_require=["pytest"],
 )
@@ -0,0 +1,39 @@
+"""
+Fixtures shared by the test suite.
+"""
+
+import pytest
+
+import kvadratnet as kn
+
+# pylint: disable=protected-access
+
+
+@pytest.fixture
+def custom_units():
+    """Register 500m, 2km, 5km and 20km and remove them again afterwards."""
+    tables = [
+        kn.UNITS,
+        kn._KEY_UNITS,
+        kn.TILE_SIZES,
+        kn.TILE_FACTORS,
+        kn.REGEX,
+        kn.NAME_WIDTHS,
+        kn._UNIT_INFO,
+        kn._UNIT_INDEX,
+    ]
+    saved = [table.copy() for table in tables]
+    lengths = (kn._MIN_UNIT_LENGTH, kn._MAX_UNIT_LENGTH)
+
+    for name, size in [("500m", 500), ("2km", 2000), ("5km", 5000), ("20km", 20000)]:
+        kn.register_unit(name, size)
+    yield
+
+    for table, copy in zip(tables, saved):
+        if isinstance(table, list):
+            table[:] = copy
+        else:
+            table.clear()
+            table.update(copy)
+    kn._MIN_UNIT_LENGTH, kn._MAX_UNIT_LENGTH = lengths
+    kn.clear_cache()
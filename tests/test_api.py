@@ -174,3 +174,386 @@ def test_tile_to_index():
     idy, idx = kn.tile_to_index(name, 6223750, 575500)
     print(name, idy, idx)
     assert (idy, idx) == (0, 0)
+
+
+def test_parse_names():
+    """kvadratnet.parse_names"""
+    names = ["dtm_1km_6223_575.tif", "not_a_tile_name", "250m_622375_57550"]
+    tiles = list(kn.parse_names(names))
+
+    assert tiles[0] == (6223000, 575000, 1000, "1km")
+    assert tiles[1] is None
+    assert tiles[2] == (6223750, 575500, 250, "250m")
+
+    # the smallest unit is preferred when a string contains several tile names
+    assert kn.tile_name("10km_622_57_1km_6223_575") == "1km_6223_575"
+
+
+def test_validate_names():
+    """kvadratnet.validate_names"""
+    names = ["1km_6223_575", "DTM_1km_6223_575.tif", "10km_622_57", "1km_622_575"]
+
+    assert kn.validate_names(names) == [True, False, True, False]
+    assert kn.validate_names(names, units="1km") == [True, False, False, False]
+    assert kn.validate_names(["1km_6223_575.tif"], strict=True) == [False]
+    assert kn.validate_names([]) == []
+
+    with pytest.raises(ValueError):
+        kn.validate_names(names, units="2km")
+
+
+def test_tile_keys():
+    """kvadratnet.encode, kvadratnet.decode"""
+    for unit in kn.UNITS:
+        name = kn.name_from_point(6223777, 575617, unit)
+        key = kn.encode(6223777, 575617, unit)
+        assert kn.key_from_name(name) == key
+        assert kn.name_from_key(key) == name
+        assert kn.decode(key) == kn._parse_name(name)
+
+    # keys sort by unit, then northing and easting
+    assert kn.encode(6223000, 575000, "1km") < kn.encode(6223000, 576000, "1km")
+    assert kn.encode(6223000, 999000, "1km") < kn.encode(6224000, 0, "1km")
+    assert kn.encode(9999999, 999999, "100m") < kn.encode(0, 0, "250m")
+
+    with pytest.raises(ValueError):
+        kn.encode(-1, 0)
+    with pytest.raises(ValueError):
+        kn.encode(0, 0, "2km")
+    with pytest.raises(ValueError):
+        kn.decode(255 << 56)
+    with pytest.raises(ValueError):
+        kn.decode(-1)
+    with pytest.raises(ValueError):
+        kn.name_from_key(-(1 << 56))
+    with pytest.raises(ValueError):
+        kn.decode(1 << 64)
+
+
+def test_key_functions():
+    """kvadratnet.extent_from_key, parent_key, key_to_index"""
+    key = kn.key_from_name("1km_6223_575")
+    assert kn.extent_from_key(key) == kn.extent_from_name("1km_6223_575")
+
+    assert kn.name_from_key(kn.parent_key(key)) == "10km_622_57"
+    key = kn.key_from_name("100m_62237_5756")
+    assert kn.name_from_key(kn.parent_key(key, "250m")) == "250m_622350_57550"
+    with pytest.raises(ValueError):
+        kn.parent_key(kn.key_from_name("100km_62_5"))
+    with pytest.raises(ValueError):
+        kn.parent_key(kn.key_from_name("10km_423_23"), "1km")
+
+    key = kn.key_from_name("1km_6232_623")
+    assert kn.key_to_index(key, 6200000, 600000) == (-32, 23)
+    key = kn.key_from_name("250m_622375_57550")
+    assert kn.key_to_index(key, 6223750, 575500) == (0, 0)
+
+
+def test_tile():
+    """kvadratnet.Tile"""
+    tile = kn.Tile("dtm_1km_6223_575.tif")
+
+    assert tile.name == "1km_6223_575"
+    assert tile.unit == "1km"
+    assert tile.size == 1000
+    assert (tile.northing, tile.easting) == (6223000, 575000)
+    assert tile.key == kn.key_from_name("1km_6223_575")
+    assert tile.extent == kn.extent_from_name("1km_6223_575")
+    assert tile.wkt == kn.wkt_from_name("1km_6223_575")
+    assert repr(tile) == "Tile('1km_6223_575')"
+
+    assert tile.parent == kn.Tile("10km_622_57")
+    assert tile.parent.parent == kn.Tile("50km_620_55")
+    assert kn.Tile("100km_62_5").parent is None
+
+    assert len(tile.children) == 16
+    assert tile.children[0] == kn.Tile("250m_622300_57500")
+    assert all(child.parent == tile for child in tile.children)
+    assert len(kn.Tile("250m_622300_57500").children) == 9
+    assert kn.Tile("100m_62237_5756").children == ()
+
+    assert tile == kn.Tile.from_point(6223777, 575617)
+    assert tile == kn.Tile.from_key(tile.key)
+    assert tile < kn.Tile("1km_6223_576") < kn.Tile("1km_6224_500")
+    assert len({tile, kn.Tile("1km_6223_575")}) == 1
+
+    with pytest.raises(AttributeError):
+        tile.key = 0
+    with pytest.raises(ValueError):
+        kn.Tile("BadName")
+
+
+def test_tile_interning():
+    """kvadratnet.Tile interning"""
+    tile = kn.Tile("1km_6223_575", intern=True)
+
+    assert kn.Tile("1km_6223_575", intern=True) is tile
+    assert kn.Tile("1km_6223_575") is not tile
+    assert tile.children[0].parent is tile
+    assert kn.Tile("10km_622_57", intern=True) is tile.parent
+
+
+def test_tileset():
+    """kvadratnet.TileSet"""
+    names = ["1km_6223_576", "1km_6223_575", "10km_622_57", "1km_6100_500"]
+    tiles = kn.TileSet(names)
+
+    assert len(tiles) == 4
+    assert "1km_6223_575" in tiles
+    assert kn.key_from_name("10km_622_57") in tiles
+    assert kn.Tile("1km_6100_500") in tiles
+    assert "1km_6223_577" not in tiles
+    assert "BadName" not in tiles
+
+    assert tiles.counts() == {"1km": 3, "10km": 1}
+    assert tiles.units() == ["1km", "10km"]
+    assert list(tiles.names()) == [
+        "1km_6100_500",
+        "1km_6223_575",
+        "1km_6223_576",
+        "10km_622_57",
+    ]
+    assert list(tiles) == sorted(kn.key_from_name(name) for name in names)
+
+    bbox = (575500, 6223500, 576500, 6223600)
+    assert [kn.name_from_key(k) for k in tiles.query(bbox, "1km")] == [
+        "1km_6223_575",
+        "1km_6223_576",
+    ]
+    assert [kn.name_from_key(k) for k in tiles.query(bbox)] == [
+        "1km_6223_575",
+        "1km_6223_576",
+        "10km_622_57",
+    ]
+    assert list(tiles.query((576000, 6224000, 577000, 6225000), "1km")) == []
+    assert list(tiles.query(bbox, "100m")) == []
+
+    tiles.add("1km_6223_577")
+    tiles.discard("1km_6223_575")
+    tiles.discard("1km_6223_575")
+    assert len(tiles) == 4
+    assert [kn.name_from_key(k) for k in tiles.query(bbox, "1km")] == ["1km_6223_576"]
+
+    with pytest.raises(ValueError):
+        list(tiles.query(bbox, "2km"))
+    with pytest.raises(ValueError):
+        list(tiles.query((1, 1, 0, 0)))
+
+
+def test_tileset_key_array():
+    """kvadratnet.TileSet with an array of tile keys"""
+    np = pytest.importorskip("numpy")
+    names = ["1km_6223_576", "1km_6223_575", "10km_622_57", "1km_6100_500"]
+    keys = np.array([kn.key_from_name(name) for name in names], dtype=np.uint64)
+
+    tiles = kn.TileSet(keys[:2])
+    tiles.add("1km_6100_500")
+    tiles.update(np.concatenate((keys, keys[:1])))
+    assert len(tiles) == 4
+    assert list(tiles) == list(kn.TileSet(names))
+    assert tiles.counts() == {"1km": 3, "10km": 1}
+    assert all(type(key) is int for key in tiles)
+
+    tiles.update(np.array([], dtype=np.uint64))
+    assert len(tiles) == 4
+    with pytest.raises(ValueError):
+        kn.TileSet(np.array([255 << 56], dtype=np.uint64))
+
+
+def test_children():
+    """kvadratnet.children"""
+    assert list(kn.children("10km_622_57", "1km"))[:3] == [
+        "1km_6220_570",
+        "1km_6220_571",
+        "1km_6220_572",
+    ]
+    assert len(list(kn.children("1km_6223_575"))) == 16
+
+    for child in kn.children("250m_622300_57500", "100m"):
+        assert kn.parent_tile(child, "250m") == "250m_622300_57500"
+
+    keys = list(kn.children("1km_6223_575", "250m", keys=True))
+    assert keys == sorted(keys)
+    assert kn.name_from_key(keys[-1]) == "250m_622375_57575"
+
+    with pytest.raises(ValueError):
+        kn.children("1km_6223_575", "10km")
+    with pytest.raises(ValueError):
+        kn.children("100m_62237_5756")
+
+
+def test_tiles_in_extent():
+    """kvadratnet.tiles_in_extent"""
+    extent = (575500, 6223500, 577000, 6224000)
+    assert list(kn.tiles_in_extent(extent)) == ["1km_6223_575", "1km_6223_576"]
+    assert list(kn.tiles_in_extent(extent, "10km")) == ["10km_622_57"]
+    assert len(list(kn.tiles_in_extent(extent, "100m", keys=True))) == 75
+
+    # tiles touching the extent at a point are included
+    assert list(kn.tiles_in_extent((575500, 6223500, 575500, 6223500))) == [
+        "1km_6223_575"
+    ]
+
+    with pytest.raises(ValueError):
+        kn.tiles_in_extent(extent, "2km")
+
+
+def test_cache():
+    """kvadratnet.enable_cache"""
+    names = ["dtm_1km_6223_575.tif", "1km_6224_575", "250m_622375_57550"]
+
+    def results():
+        return [
+            (
+                kn.tile_name(name),
+                kn.parent_tile(name, "100km"),
+                kn.key_from_name(name),
+                kn.extent_from_name(kn.tile_name(name)),
+                kn.wkt_from_name(kn.tile_name(name)),
+            )
+            for name in names
+        ]
+
+    expected = results()
+    assert kn.cache_info() == {}
+
+    kn.enable_cache(maxsize=2)
+    try:
+        assert results() == expected
+        hits = kn.cache_info()["tile_name"].hits
+        assert kn.tile_name(names[-1]) == expected[-1][0]
+        info = kn.cache_info()
+        assert set(info) == set(kn.CACHED_FUNCTIONS)
+        assert info["tile_name"].maxsize == 2
+        assert info["tile_name"].currsize == 2
+        assert info["tile_name"].hits == hits + 1
+
+        # errors are not cached
+        for _ in range(2):
+            with pytest.raises(ValueError):
+                kn.tile_name("1km_6223")
+
+        kn.clear_cache()
+        assert kn.cache_info()["tile_name"].currsize == 0
+        assert results() == expected
+    finally:
+        kn.disable_cache()
+
+    assert kn.cache_info() == {}
+    assert results() == expected
+
+    with pytest.raises(ValueError):
+        kn.enable_cache(maxsize=0)
+
+
+def test_register_unit(custom_units):
+    """kvadratnet.register_unit"""
+    assert kn.UNITS == [
+        "100m",
+        "250m",
+        "500m",
+        "1km",
+        "2km",
+        "5km",
+        "10km",
+        "20km",
+        "50km",
+        "100km",
+    ]
+    assert kn.TILE_FACTORS["500m"] == 100
+    assert kn.TILE_FACTORS["20km"] == 10000
+    assert kn.NAME_WIDTHS["2km"] == (4, 3)
+    assert kn.REGEX["500m"] == "500m_[0-9]{5}_[0-9]{4}"
+
+    assert kn.name_from_point(6223777, 575617, "500m") == "500m_62235_5755"
+    assert kn.name_from_point(6223777, 575617, "2km") == "2km_6222_574"
+    assert kn.name_from_point(6223777, 575617, "5km") == "5km_6220_575"
+    assert kn.name_from_point(6223777, 575617, "20km") == "20km_622_56"
+    assert kn.tile_name("dtm_20km_622_56.tif") == "20km_622_56"
+    assert kn.validate_name("500m_62235_5755", units=["500m"])
+    assert kn.extent_from_name("2km_6222_574") == (574000, 6222000, 576000, 6224000)
+
+    # units in between the builtin units become the default parents
+    assert kn.parent_tile("1km_6223_575") == "2km_6222_574"
+    assert kn.parent_tile("2km_6222_574", "10km") == "10km_622_57"
+    assert list(kn.children("1km_6223_575")) == [
+        "500m_62230_5750",
+        "500m_62230_5755",
+        "500m_62235_5750",
+        "500m_62235_5755",
+    ]
+
+    # keys of the builtin units are unchanged
+    assert kn._UNIT_INDEX["100km"] == 5
+    key = kn.key_from_name("500m_62235_5755")
+    assert kn.name_from_key(key) == "500m_62235_5755"
+    assert kn.Tile.from_key(key).unit == "500m"
+
+    with pytest.raises(ValueError):
+        kn.register_unit("500m", 500)
+    with pytest.raises(ValueError):
+        kn.register_unit("0km", 3000)
+    with pytest.raises(ValueError):
+        kn.register_unit("3km", 2000)
+    with pytest.raises(ValueError):
+        kn.register_unit("3km", 3000, factor=2000)
+    with pytest.raises(ValueError):
+        kn.register_unit("3km_", 3000)
+
+
+def test_sort_tiles():
+    """kvadratnet.sort_tiles"""
+    names = list(kn.tiles_in_extent((576000, 6224000, 584000, 6232000)))
+
+    for order in ("hilbert", "morton"):
+        tiles = kn.sort_tiles(names, order)
+        assert sorted(tiles) == sorted(names)
+        # each 2x2 block of tiles is visited before moving on
+        assert set(tiles[:4]) == {
+            "1km_6224_576",
+            "1km_6224_577",
+            "1km_6225_576",
+            "1km_6225_577",
+        }
+
+    # consecutive tiles along the Hilbert curve are neighbours
+    tiles = [kn.Tile(name) for name in kn.sort_tiles(names)]
+    for tile, next_tile in zip(tiles, tiles[1:]):
+        distance = abs(tile.northing - next_tile.northing) + abs(
+            tile.easting - next_tile.easting
+        )
+        assert distance == 1000
+
+    assert kn.sort_tiles(names, "row") == names
+    assert kn.sort_tiles([kn.key_from_name(name) for name in names[:3]], "row") == [
+        kn.key_from_name(name) for name in names[:3]
+    ]
+    assert kn.morton_key("1km_6225_577") - kn.morton_key("1km_6224_576") == 3
+    assert kn.hilbert_key("100m_00000_0000") < kn.hilbert_key("1km_0000_000")
+
+    with pytest.raises(ValueError):
+        kn.sort_tiles(names, "random")
+
+
+def test_neighbors():
+    """kvadratnet.neighbors"""
+    assert kn.neighbors("1km_6223_575") == [
+        "1km_6222_574",
+        "1km_6222_575",
+        "1km_6222_576",
+        "1km_6223_574",
+        "1km_6223_576",
+        "1km_6224_574",
+        "1km_6224_575",
+        "1km_6224_576",
+    ]
+
+    tiles = kn.neighbors(kn.Tile("250m_622375_57550"), ring=2, keys=True)
+    assert len(tiles) == 24
+    assert kn.name_from_key(tiles[0]) == "250m_622325_57500"
+
+    # tiles outside the grid are left out
+    assert len(kn.neighbors(kn.encode(0, 0, "1km"))) == 3
+
+    with pytest.raises(ValueError):
+        kn.neighbors("1km_6223_575", ring=0)
@@ -0,0 +1,377 @@
+"""
+Test suite for the kvadratnet.batch module.
+"""
+
+import numpy as np
+import pytest
+
+import kvadratnet as kn
+from kvadratnet import batch
+
+
+def test_reduced_from_points():
+    """kvadratnet.batch.reduced_from_points"""
+
+    northings = np.array([6223777, 6223750, 6200000])
+    eastings = np.array([575617, 575500, 600000])
+
+    rn, re_ = batch.reduced_from_points(northings, eastings, "250m")
+    assert rn.tolist() == [622375, 622375, 620000]
+    assert re_.tolist() == [57550, 57550, 60000]
+
+    rn, re_ = batch.reduced_from_points(northings, eastings, "50km")
+    assert rn.tolist() == [620, 620, 620]
+    assert re_.tolist() == [55, 55, 60]
+
+    rn, re_ = batch.reduced_from_points([6223777.9], [575999.99], "1km")
+    assert rn.tolist() == [6223]
+    assert re_.tolist() == [575]
+
+    with pytest.raises(ValueError):
+        batch.reduced_from_points([1, 2], [3, 4], "300m")
+
+    with pytest.raises(ValueError):
+        batch.reduced_from_points([1, -2], [3, 4], "1km")
+
+
+def test_names_from_points():
+    """kvadratnet.batch.names_from_points"""
+
+    rng = np.random.default_rng(42)
+    northings = rng.uniform(6000000, 6400000, 1000)
+    eastings = rng.uniform(400000, 900000, 1000)
+
+    for unit in kn.UNITS:
+        names = batch.names_from_points(northings, eastings, unit)
+        truth = [kn.name_from_point(n, e, unit) for n, e in zip(northings, eastings)]
+        assert names.tolist() == truth
+
+    names = batch.names_from_points([6223777], [575617], unit="100m")
+    assert names.tolist() == ["100m_62237_5756"]
+
+
+def test_encode_decode():
+    """kvadratnet.batch.encode, kvadratnet.batch.decode"""
+
+    rng = np.random.default_rng(42)
+    northings = rng.integers(6000000, 6400000, 1000)
+    eastings = rng.integers(400000, 900000, 1000)
+
+    for unit in kn.UNITS:
+        keys = batch.encode(northings, eastings, unit)
+        assert keys.dtype == np.uint64
+        truth = [kn.encode(int(n), int(e), unit) for n, e in zip(northings, eastings)]
+        assert keys.tolist() == truth
+
+        tiles = batch.decode(keys)
+        assert tiles.unit.tolist() == [unit] * len(keys)
+        for i in (0, 500, 999):
+            assert (
+                tiles.northing[i],
+                tiles.easting[i],
+                tiles.size[i],
+                tiles.unit[i],
+            ) == kn.decode(truth[i])
+
+    with pytest.raises(ValueError):
+        batch.decode([255 << 56])
+
+
+def test_names_and_keys():
+    """kvadratnet.batch.keys_from_names, kvadratnet.batch.names_from_keys"""
+
+    names = ["1km_6223_575", "250m_622375_57550", "50km_620_55", "100m_62237_5756"]
+    keys = batch.keys_from_names(names)
+    assert keys.tolist() == [kn.key_from_name(name) for name in names]
+    assert batch.names_from_keys(keys).tolist() == names
+
+    with pytest.raises(ValueError):
+        batch.keys_from_names(["1km_6223_575", "BadName"])
+
+
+def test_key_functions():
+    """kvadratnet.batch.extents_from_keys, parent_keys, keys_to_index"""
+
+    names = ["1km_6223_575", "250m_622375_57550", "100m_62237_5756"]
+    keys = batch.keys_from_names(names)
+
+    extents = batch.extents_from_keys(keys)
+    for i, name in enumerate(names):
+        assert tuple(e[i] for e in extents) == kn.extent_from_name(name)
+
+    parents = batch.parent_keys(keys, "10km")
+    assert batch.names_from_keys(parents).tolist() == ["10km_622_57"] * 3
+    parents = batch.parent_keys(keys[1:], "1km")
+    assert batch.names_from_keys(parents).tolist() == ["1km_6223_575"] * 2
+    with pytest.raises(ValueError):
+        batch.parent_keys(keys, "250m")
+
+    idy, idx = batch.keys_to_index(
+        batch.keys_from_names(["1km_6232_623"]), 6200000, 600000
+    )
+    assert (idy[0], idx[0]) == (-32, 23)
+
+
+def test_children_chunks():
+    """kvadratnet.batch.children_chunks"""
+
+    chunks = list(batch.children_chunks("100km_62_5", "100m", chunksize=300000))
+    assert [len(chunk) for chunk in chunks] == [300000, 300000, 300000, 100000]
+
+    keys = np.concatenate(chunks)
+    assert np.all(np.diff(keys.astype(np.int64)) > 0)
+    assert batch.names_from_keys(keys[[0, -1]]).tolist() == [
+        "100m_62000_5000",
+        "100m_62999_5999",
+    ]
+
+    keys = np.concatenate(list(batch.children_chunks("1km_6223_575")))
+    assert keys.tolist() == list(kn.children("1km_6223_575", keys=True))
+
+
+def test_tiles_in_extent_chunks():
+    """kvadratnet.batch.tiles_in_extent_chunks"""
+
+    extent = (575500, 6223500, 577000, 6224300)
+    chunks = list(batch.tiles_in_extent_chunks(extent, "100m", chunksize=7))
+    keys = np.concatenate(chunks).tolist()
+    assert keys == list(kn.tiles_in_extent(extent, "100m", keys=True))
+
+    with pytest.raises(ValueError):
+        list(batch.tiles_in_extent_chunks(extent, "100m", chunksize=0))
+
+
+def test_parents():
+    """kvadratnet.batch.parents"""
+
+    names = ["1km_6223_575", "250m_622375_57550", "100m_62237_5756"]
+    assert batch.parents(names).tolist() == [kn.parent_tile(name) for name in names]
+    assert batch.parents(names, "10km").tolist() == ["10km_622_57"] * 3
+
+    keys = batch.parents(batch.keys_from_names(names), "50km", keys=True)
+    assert keys.tolist() == [kn.key_from_name("50km_620_55")] * 3
+
+    with pytest.raises(ValueError):
+        batch.parents(["100km_62_5"])
+    with pytest.raises(ValueError):
+        batch.parents(names, "250m")
+
+
+def test_count_by_parent():
+    """kvadratnet.batch.count_by_parent"""
+
+    names = ["1km_6223_575", "1km_6100_575", "1km_6223_576", "1km_6224_575"]
+    parents, counts = batch.count_by_parent(names)
+    assert parents.tolist() == ["10km_610_57", "10km_622_57"]
+    assert counts.tolist() == [1, 3]
+
+    parents, counts = batch.count_by_parent(names, "100km", keys=True)
+    assert parents.tolist() == [
+        kn.key_from_name("100km_61_5"),
+        kn.key_from_name("100km_62_5"),
+    ]
+    assert counts.tolist() == [1, 3]
+
+    parents, counts = batch.count_by_parent([])
+    assert len(parents) == len(counts) == 0
+
+
+def test_coverage():
+    """kvadratnet.batch.coverage"""
+
+    files = [
+        "dtm_1km_6090_600.tif",
+        "1km_6091_600.tif",
+        "x_1km_6090_600",
+        "1km_6100_600",
+    ]
+    extent = (600000, 6090000, 602000, 6092000)
+    report = batch.coverage(files, extent=extent)
+    assert report.missing.tolist() == ["1km_6090_601", "1km_6091_601"]
+    assert report.extra.tolist() == ["1km_6100_600"]
+    assert report.duplicates.tolist() == ["1km_6090_600"]
+
+    expected = ["1km_6090_600", "1km_6091_600", "1km_6092_600"]
+    report = batch.coverage(files, expected, keys=True)
+    assert report.missing.tolist() == [kn.key_from_name("1km_6092_600")]
+    assert report.extra.tolist() == [kn.key_from_name("1km_6100_600")]
+    assert report.duplicates.tolist() == [kn.key_from_name("1km_6090_600")]
+
+    report = batch.coverage([], expected)
+    assert report.missing.tolist() == expected
+    assert len(report.extra) == len(report.duplicates) == 0
+
+    with pytest.raises(ValueError):
+        batch.coverage(files)
+    with pytest.raises(ValueError):
+        batch.coverage(files, expected, extent)
+    with pytest.raises(ValueError):
+        batch.coverage(files, extent=extent, unit="2km")
+
+
+def test_custom_units(custom_units):
+    """kvadratnet.batch with units registered at runtime"""
+
+    keys = batch.encode([6223777, 6300000], [575617, 900000], "20km")
+    assert batch.names_from_keys(keys).tolist() == ["20km_622_56", "20km_630_90"]
+    assert batch.decode(keys).unit.tolist() == ["20km", "20km"]
+    assert batch.names_from_points([6223777], [575617], "500m").tolist() == [
+        "500m_62235_5755"
+    ]
+
+    parents = batch.parents(["10km_622_57", "20km_622_56", "1km_6223_575"])
+    assert parents.tolist() == ["20km_622_56", "50km_620_55", "2km_6222_574"]
+
+
+def test_morton_and_hilbert_keys():
+    """kvadratnet.batch.morton_keys, hilbert_keys and argsort_tiles"""
+
+    names = list(kn.tiles_in_extent((570000, 6220000, 590000, 6230000), "1km"))
+    names += ["100m_62237_5756", "250m_622375_57550", "100km_62_5"]
+    keys = batch.keys_from_names(names)
+
+    assert batch.morton_keys(keys).tolist() == [kn.morton_key(k) for k in names]
+    assert batch.hilbert_keys(names).tolist() == [kn.hilbert_key(k) for k in names]
+
+    for order in kn.ORDERS:
+        index = batch.argsort_tiles(keys, order)
+        assert [names[i] for i in index.tolist()] == kn.sort_tiles(names, order)
+
+    with pytest.raises(ValueError):
+        batch.argsort_tiles(keys, "random")
+
+
+def test_key_index():
+    """kvadratnet.batch.KeyIndex"""
+
+    names = ["1km_6223_575", "1km_6223_576", "1km_6223_575", "10km_622_57"]
+    index = batch.KeyIndex(names)
+    assert len(index) == 4
+
+    keys = batch.keys_from_names(["10km_622_57", "1km_6223_575", "1km_6224_575"])
+    assert index.lookup(keys).tolist() == [3, 0, -1]
+    assert index.contains(keys).tolist() == [True, True, False]
+
+    assert batch.KeyIndex([]).lookup(keys).tolist() == [-1, -1, -1]
+
+
+def test_halo():
+    """kvadratnet.batch.halo"""
+
+    names = list(kn.tiles_in_extent((575000, 6223000, 578000, 6226000)))
+    names.append("1km_6300_600")
+    positions = batch.halo(names)
+
+    offsets = batch.neighbor_offsets(1)
+    assert offsets.shape == (8, 2)
+    assert positions.shape == (len(names), 8)
+    for name, row in zip(names, positions.tolist()):
+        expected = [
+            names.index(neighbor) if neighbor in names else -1
+            for neighbor in kn.neighbors(name)
+        ]
+        assert row == expected
+
+    # the centre tile of the 3x3 block has all neighbours, the lone tile none
+    assert (positions[4] >= 0).all()
+    assert (positions[-1] == -1).all()
+
+    index = batch.KeyIndex(names[:1])
+    positions = batch.halo(names[1:2], ring=2, available=index)
+    assert positions.shape == (1, 24)
+    assert sorted(positions.ravel().tolist())[-2:] == [-1, 0]
+
+    # tiles at the edge of the grid
+    assert (batch.halo([kn.encode(0, 0)]) == -1).all()
+
+    with pytest.raises(ValueError):
+        batch.halo(names, ring=0)
+
+
+def test_bin_points():
+    """kvadratnet.batch.bin_points"""
+
+    northings = np.array([6223500, 6224500, 6223100, 6223999, 6224000])
+    eastings = np.array([575500, 575500, 576100, 575000, 575999])
+    bins = batch.bin_points(northings, eastings)
+
+    assert batch.names_from_keys(bins.keys).tolist() == [
+        "1km_6223_575",
+        "1km_6223_576",
+        "1km_6224_575",
+    ]
+    assert bins.counts.tolist() == [2, 1, 2]
+    assert bins.offsets.tolist() == [0, 2, 3, 5]
+    assert bins.order.tolist() == [0, 3, 2, 1, 4]
+
+    for i, key in enumerate(bins.keys.tolist()):
+        points = bins.order[bins.offsets[i] : bins.offsets[i + 1]]
+        assert (batch.encode(northings[points], eastings[points]) == key).all()
+
+    bins = batch.bin_points([], [])
+    assert len(bins.keys) == len(bins.counts) == len(bins.order) == 0
+    assert bins.offsets.tolist() == [0]
+
+
+def test_bin_points_chunks():
+    """kvadratnet.batch.bin_points_chunks and count_points"""
+
+    rng = np.random.RandomState(0)
+    northings = rng.uniform(6220000, 6230000, 1000)
+    eastings = rng.uniform(570000, 580000, 1000)
+    chunks = [
+        (northings[i : i + 300], eastings[i : i + 300]) for i in (0, 300, 600, 900)
+    ]
+
+    binned = list(batch.bin_points_chunks(chunks))
+    assert len(binned) == 4
+    assert binned[1].order.min() == 300
+    order = np.concatenate([bins.order for bins in binned])
+    assert sorted(order.tolist()) == list(range(1000))
+
+    keys, counts = batch.count_points(chunks)
+    bins = batch.bin_points(northings, eastings)
+    assert keys.tolist() == bins.keys.tolist()
+    assert counts.tolist() == bins.counts.tolist()
+    assert counts.sum() == 1000
+
+
+def test_tiles_to_index():
+    """kvadratnet.batch.tiles_to_index"""
+
+    names = ["1km_6232_623", "1km_6199_599", "10km_622_57"]
+    idy, idx = batch.tiles_to_index(names, 6200000, 600000)
+    assert idy.dtype == np.int64
+    for i, name in enumerate(names):
+        assert (idy[i], idx[i]) == kn.tile_to_index(name, 6200000, 600000)
+
+
+def test_mosaic_layout():
+    """kvadratnet.batch.mosaic_layout"""
+
+    names = ["1km_6224_576", "1km_6223_575", "250m_622375_57575"]
+    layout = batch.mosaic_layout(names, 0.5)
+
+    assert layout.keys.tolist() == batch.keys_from_names(names).tolist()
+    assert layout.geotransform == (575000, 0.5, 0.0, 6225000, 0.0, -0.5)
+    assert layout.shape == (4000, 4000)
+    assert layout.rows.tolist() == [0, 2000, 2000]
+    assert layout.columns.tolist() == [2000, 0, 1500]
+    assert layout.heights.tolist() == [2000, 2000, 500]
+    assert layout.widths.tolist() == layout.heights.tolist()
+
+    # windows agree with the extents of the tiles
+    extents = batch.extents_from_keys(layout.keys)
+    origin_easting, res, _, origin_northing, _, _ = layout.geotransform
+    np.testing.assert_array_equal(
+        origin_easting + layout.columns * res, extents.min_easting
+    )
+    np.testing.assert_array_equal(
+        origin_northing - (layout.rows + layout.heights) * res, extents.min_northing
+    )
+
+    assert batch.mosaic_layout(["1km_6223_575"], 0.4).shape == (2500, 2500)
+    with pytest.raises(ValueError):
+        batch.mosaic_layout(names, 3)
+    with pytest.raises(ValueError):
+        batch.mosaic_layout([], 1)
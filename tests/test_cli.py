@@ -1,8 +1,13 @@
+import json
+import os
+import sqlite3
 from pathlib import Path
 
 from click.testing import CliRunner
 
+import kvadratnet as kn
 from kvadratnet import knet
+from kvadratnet.tileindex import TileIndex
 
 def _create_empty_files(files):
     """
@@ -102,3 +107,356 @@ def test_rename_postfix():
 
 
 
+
+
+def test_footprints():
+    """
+    Test 'knet footprints' command
+    """
+    runner = CliRunner()
+    files = ['dtm_1km_6090_600.tif', 'dtm_1km_6090_601.tif', 'notatile.tif']
+    with runner.isolated_filesystem():
+        _create_empty_files(files)
+        result = runner.invoke(knet.footprints, files)
+        assert result.exit_code == 0
+        assert result.output.splitlines() == [
+            kn.wkt_from_name('1km_6090_600'),
+            kn.wkt_from_name('1km_6090_601'),
+        ]
+
+        args = ['--format', 'geojson', '--output', 'out.json'] + files
+        result = runner.invoke(knet.footprints, args)
+        assert result.exit_code == 0
+        with open('out.json') as fileobj:
+            assert len(json.load(fileobj)['features']) == 2
+
+        args = ['--format', 'wkb', '--output', 'out.wkb'] + files
+        result = runner.invoke(knet.footprints, args)
+        assert result.exit_code == 0
+        assert os.path.getsize('out.wkb') == 2 * 93
+
+
+def test_parents():
+    """
+    Test 'knet parents' command
+    """
+    runner = CliRunner()
+    files = ['dtm_1km_6090_600.tif', 'dtm_1km_6090_601.tif',
+             'dtm_1km_6100_600.tif', 'notatile.tif']
+    with runner.isolated_filesystem():
+        _create_empty_files(files)
+        result = runner.invoke(knet.parents, files)
+        assert result.exit_code == 0
+        assert result.output.split() == ['10km_609_60', '10km_609_60', '10km_610_60']
+
+        result = runner.invoke(knet.parents, ['--unique', '--count'] + files)
+        assert result.exit_code == 0
+        assert result.output.splitlines() == [
+            '{:<20} {}'.format('10km_609_60', 2),
+            '{:<20} {}'.format('10km_610_60', 1),
+        ]
+
+        result = runner.invoke(knet.parents, ['--count'] + files)
+        assert result.exit_code == 0
+        assert result.output.split() == [
+            '10km_609_60', '2', '10km_609_60', '2', '10km_610_60', '1'
+        ]
+
+
+def test_from_file():
+    """
+    Test --from-file option
+    """
+    runner = CliRunner()
+    files = ['dtm_1km_6090_600.tif', 'dtm_1km_6090_601.tif',
+             'dtm_1km_6100_600.tif']
+    with runner.isolated_filesystem():
+        _create_empty_files(files)
+        with open('files.txt', 'w') as fileobj:
+            fileobj.write("\n".join(files[1:]) + "\n")
+
+        args = ['--from-file', 'files.txt', files[0]]
+        result = runner.invoke(knet.parents, args)
+        assert result.exit_code == 0
+        assert result.output.split() == ['10km_609_60', '10km_609_60', '10km_610_60']
+
+        args = ['--unique', '--from-file', '-']
+        result = runner.invoke(knet.parents, args, input="\n".join(files))
+        assert result.exit_code == 0
+        assert result.output.split() == ['10km_609_60', '10km_610_60']
+
+        args = ['--prefix', 'new_', '--from-file', '-']
+        result = runner.invoke(knet.rename, args, input="\n".join(files))
+        assert result.exit_code == 0
+        assert sorted(str(p) for p in Path('.').glob("new_*")) == [
+            'new_1km_6090_600.tif', 'new_1km_6090_601.tif', 'new_1km_6100_600.tif'
+        ]
+
+        result = runner.invoke(knet.parents, [])
+        assert result.exit_code != 0
+
+
+def test_from_file_missing():
+    """
+    Test that missing files from --from-file stop organize before anything is moved
+    """
+    runner = CliRunner()
+    files = ['dtm_1km_6090_600.tif', 'dtm_1km_6090_601.tif']
+    with runner.isolated_filesystem():
+        _create_empty_files(files[:1])
+
+        args = ['10km', '--from-file', '-']
+        result = runner.invoke(knet.organize, args, input="\n".join(files))
+        assert result.exit_code == 1
+        assert result.output == 'ERROR: dtm_1km_6090_601.tif does not exist\n'
+        assert os.path.exists(files[0])
+        assert not os.path.exists('10km_609_60')
+
+
+def test_organize():
+    """
+    Test 'knet organize' command
+    """
+    runner = CliRunner()
+    files = ['dtm_1km_6090_600.tif', 'dtm_1km_6190_601.tif', 'notatile.tif']
+    with runner.isolated_filesystem():
+        _create_empty_files(files)
+
+        args = ['--dry-run', '100km 10km'] + files
+        result = runner.invoke(knet.organize, args)
+        assert result.exit_code == 0
+        assert result.output.splitlines()[1:] == [
+            'Moving dtm_1km_6090_600.tif into ' + os.path.join('100km_60_6', '10km_609_60'),
+            'Moving dtm_1km_6190_601.tif into ' + os.path.join('100km_61_6', '10km_619_60'),
+        ]
+        assert os.path.exists(files[0])
+
+        args = ['--jobs', '2', '100km 10km'] + files
+        result = runner.invoke(knet.organize, args)
+        assert result.exit_code == 0
+        assert os.path.exists(os.path.join('100km_60_6', '10km_609_60', files[0]))
+        assert os.path.exists(os.path.join('100km_61_6', '10km_619_60', files[1]))
+
+        result = runner.invoke(knet.organize, ['250m', 'notatile.tif'])
+        assert result.exit_code == 0
+
+        _create_empty_files(files[:1])
+        result = runner.invoke(knet.organize, ['100km 10km', files[0]])
+        assert result.exit_code == 1
+        assert 'already exists' in result.output
+        assert os.path.exists(files[0])
+
+
+def test_rename_collision():
+    """
+    Test 'knet rename' with files that would be renamed to the same name
+    """
+    runner = CliRunner()
+    files = ['a_1km_6090_600.tif', 'b_1km_6090_600.tif']
+    with runner.isolated_filesystem():
+        _create_empty_files(files)
+        result = runner.invoke(knet.rename, files)
+        assert result.exit_code == 1
+        assert result.output.startswith('ERROR: 1km_6090_600.tif is the destination')
+        assert all(os.path.exists(f) for f in files)
+
+
+def test_organize_link():
+    """
+    Test 'knet organize --link' command
+    """
+    runner = CliRunner()
+    files = ['dtm_1km_6090_600.tif', 'dtm_1km_6190_601.tif']
+    with runner.isolated_filesystem():
+        _create_empty_files(files)
+
+        args = ['--link', 'sym', '--verbose', '10km'] + files
+        result = runner.invoke(knet.organize, args)
+        assert result.exit_code == 0
+        assert result.output.splitlines()[0] == 'Linking dtm_1km_6090_600.tif into 10km_609_60'
+        assert all(os.path.exists(f) for f in files)
+        assert os.path.islink(os.path.join('10km_609_60', files[0]))
+        assert os.path.islink(os.path.join('10km_619_60', files[1]))
+
+
+def test_inventory():
+    """
+    Test 'knet inventory' command
+    """
+    runner = CliRunner()
+    files = ['dtm_1km_6090_600.tif', 'dtm_1km_6190_601.tif', 'readme.txt']
+    with runner.isolated_filesystem():
+        os.mkdir('data')
+        _create_empty_files([os.path.join('data', f) for f in files])
+
+        result = runner.invoke(knet.inventory, ['data'])
+        assert result.exit_code == 0
+        assert result.output == 'data: 2 tiles in 1 directories (1 scanned)\n'
+
+        result = runner.invoke(knet.inventory, ['--catalog', 'kvadratnet.sqlite', 'data'])
+        assert result.exit_code == 0
+        assert result.output == 'data: 2 tiles in 1 directories (0 scanned)\n'
+
+
+def test_coverage():
+    """
+    Test 'knet coverage' command
+    """
+    runner = CliRunner()
+    files = ['dtm_1km_6090_600.tif', 'dtm_1km_6091_600.tif', 'x_dtm_1km_6090_600.tif']
+    with runner.isolated_filesystem():
+        _create_empty_files(files)
+        args = ['--extent', '600000', '6090000', '601000', '6093000'] + files
+        result = runner.invoke(knet.coverage, args)
+        assert result.exit_code == 1
+        assert result.output.splitlines() == [
+            'MISSING 1km_6092_600',
+            'DUPLICATE 1km_6090_600: dtm_1km_6090_600.tif, x_dtm_1km_6090_600.tif',
+            '1 missing, 0 extra, 1 duplicate tiles',
+        ]
+
+        with open('reference.txt', 'w') as reference:
+            reference.write('1km_6090_600\n')
+        args = ['--reference', 'reference.txt'] + files[:2]
+        result = runner.invoke(knet.coverage, args)
+        assert result.exit_code == 0
+        assert result.output.splitlines() == [
+            'EXTRA 1km_6091_600',
+            '0 missing, 1 extra, 0 duplicate tiles',
+        ]
+
+        result = runner.invoke(knet.coverage, files)
+        assert result.exit_code == 2
+
+
+def test_stats():
+    """
+    Test 'knet --stats' and 'knet --stats-json' options
+    """
+    runner = CliRunner()
+    files = ['dtm_1km_6090_600.tif', 'dtm_1km_6190_601.tif']
+    with runner.isolated_filesystem():
+        _create_empty_files(files)
+
+        args = ['--stats-json', 'stats.json', 'organize', '10km'] + files
+        result = runner.invoke(knet.cli, args)
+        assert result.exit_code == 0
+        with open('stats.json') as fileobj:
+            stats = json.load(fileobj)
+        assert stats['files'] == 2
+        assert stats['calls']['tile_name'] == 2
+        assert list(sorted(stats['phases'])) == ['check', 'makedirs', 'move', 'plan']
+
+        args = ['--stats', 'rename'] + [os.path.join('10km_609_60', files[0])]
+        result = runner.invoke(knet.cli, args)
+        assert result.exit_code == 0
+        assert 'files/s' in result.output
+
+
+def test_sort():
+    """
+    Test 'knet sort' command
+    """
+    runner = CliRunner()
+    files = [
+        'dtm_1km_6225_577.tif',
+        'readme.txt',
+        'dtm_1km_6224_576.tif',
+        'dtm_1km_6224_577.tif',
+        'dtm_1km_6225_576.tif',
+    ]
+    with runner.isolated_filesystem():
+        _create_empty_files(files)
+
+        result = runner.invoke(knet.sort_files, files)
+        assert result.exit_code == 0
+        assert result.output.splitlines() == [
+            'dtm_1km_6224_576.tif',
+            'dtm_1km_6225_576.tif',
+            'dtm_1km_6225_577.tif',
+            'dtm_1km_6224_577.tif',
+            'readme.txt',
+        ]
+
+        result = runner.invoke(knet.sort_files, ['--order', 'row'] + files)
+        assert result.output.splitlines()[:2] == [
+            'dtm_1km_6224_576.tif',
+            'dtm_1km_6224_577.tif',
+        ]
+
+
+def test_index():
+    """
+    Test 'knet index' command
+    """
+    runner = CliRunner()
+    files = ['dtm_1km_6224_576.tif', 'dtm_1km_6224_577.tif', 'readme.txt']
+    with runner.isolated_filesystem():
+        _create_empty_files(files)
+
+        result = runner.invoke(knet.index_files, ['tiles.knidx'] + files)
+        assert result.exit_code == 0
+        assert result.output == 'Wrote 2 tiles to tiles.knidx\n'
+
+        index = TileIndex('tiles.knidx')
+        assert index.payload('1km_6224_577') == os.path.abspath(files[1]).encode()
+
+
+def test_vrt():
+    """
+    Test 'knet vrt' command
+    """
+    runner = CliRunner()
+    files = ['dtm_1km_6224_576.tif', 'dtm_1km_6224_577.tif', 'readme.txt']
+    with runner.isolated_filesystem():
+        _create_empty_files(files)
+
+        result = runner.invoke(
+            knet.vrt_files, ['-r', '0.4', '--srs', 'EPSG:25832', 'dtm.vrt'] + files
+        )
+        assert result.exit_code == 0
+        assert result.output == 'Wrote 2 tiles to dtm.vrt\n'
+        with open('dtm.vrt') as fileobj:
+            content = fileobj.read()
+        assert '<VRTDataset rasterXSize="5000" rasterYSize="2500">' in content
+        assert '<SourceFilename relativeToVRT="1">dtm_1km_6224_577.tif<' in content
+
+        result = runner.invoke(knet.vrt_files, ['-r', '3', '-'] + files)
+        assert result.exit_code == 2
+
+        result = runner.invoke(knet.vrt_files, ['-r', '1', '--nodata', '-9999', '-'] + files)
+        assert result.exit_code == 0
+        assert '<NoDataValue>-9999.0</NoDataValue>' in result.output
+
+        result = runner.invoke(knet.vrt_files, ['-r', '1', '--nodata', '<', '-'] + files)
+        assert result.exit_code == 2
+
+
+def test_export():
+    """
+    Test 'knet export' command
+    """
+    runner = CliRunner()
+    files = ['dtm_1km_6224_576.tif', 'dtm_1km_6224_577.tif', 'readme.txt']
+    with runner.isolated_filesystem():
+        _create_empty_files(files)
+
+        result = runner.invoke(
+            knet.export_files, ['--srs', 'EPSG:25832', 'tiles.gpkg'] + files
+        )
+        assert result.exit_code == 0
+        assert result.output == 'Wrote 2 tiles to tiles.gpkg\n'
+
+        connection = sqlite3.connect('tiles.gpkg')
+        rows = connection.execute('SELECT name, path FROM tiles').fetchall()
+        connection.close()
+        assert rows == [
+            ('1km_6224_576', 'dtm_1km_6224_576.tif'),
+            ('1km_6224_577', 'dtm_1km_6224_577.tif'),
+        ]
+
+        result = runner.invoke(knet.export_files, ['tiles.gpkg'] + files)
+        assert result.exit_code == 2
+
+        result = runner.invoke(knet.export_files, ['--srs', 'utm', 'x.gpkg'] + files)
+        assert result.exit_code == 2
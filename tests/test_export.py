@@ -0,0 +1,101 @@
+"""
+Test suite for the kvadratnet.export module.
+"""
+
+import io
+import json
+import struct
+
+import numpy as np
+import pytest
+
+import kvadratnet as kn
+from kvadratnet import batch, export
+
+NAMES = ["1km_6223_575", "250m_622375_57550", "10km_622_57"]
+
+
+def test_write_wkt():
+    """kvadratnet.export.write_wkt"""
+
+    fileobj = io.StringIO()
+    assert export.write_wkt(NAMES, fileobj, chunksize=2) == 3
+    assert fileobj.getvalue().splitlines() == [kn.wkt_from_name(n) for n in NAMES]
+
+    fileobj = io.StringIO()
+    export.write_wkt(batch.keys_from_names(NAMES), fileobj)
+    assert fileobj.getvalue().splitlines() == [kn.wkt_from_name(n) for n in NAMES]
+
+    # arrays of tile names, e.g. from names_from_points, are converted too
+    fileobj = io.StringIO()
+    export.write_wkt(np.array(NAMES), fileobj, chunksize=2)
+    assert fileobj.getvalue().splitlines() == [kn.wkt_from_name(n) for n in NAMES]
+
+    fileobj = io.StringIO()
+    export.write_wkt(batch.names_from_points([6223500.0], [575500.0], "1km"), fileobj)
+    assert fileobj.getvalue() == kn.wkt_from_name("1km_6223_575") + "\n"
+
+
+def test_write_wkb():
+    """kvadratnet.export.write_wkb"""
+
+    fileobj = io.BytesIO()
+    assert export.write_wkb(NAMES, fileobj, chunksize=1) == 3
+
+    data = fileobj.getvalue()
+    assert len(data) == 3 * export.WKB_POLYGON.itemsize == 3 * 93
+
+    header = struct.unpack("<BIII", data[:13])
+    assert header == (1, 3, 1, 5)
+    coordinates = struct.unpack("<10d", data[13:93])
+    assert coordinates == (
+        575000,
+        6223000,
+        575000,
+        6224000,
+        576000,
+        6224000,
+        576000,
+        6223000,
+        575000,
+        6223000,
+    )
+
+
+def test_write_geojson():
+    """kvadratnet.export.write_geojson"""
+
+    fileobj = io.StringIO()
+    assert export.write_geojson(NAMES, fileobj, crs="EPSG:25832", chunksize=2) == 3
+
+    collection = json.loads(fileobj.getvalue())
+    assert collection["crs"]["properties"]["name"] == "EPSG:25832"
+    features = collection["features"]
+    assert [f["properties"]["name"] for f in features] == NAMES
+    assert [f["properties"]["unit"] for f in features] == ["1km", "250m", "10km"]
+    assert features[0]["geometry"]["coordinates"] == [
+        [
+            [575000, 6223000],
+            [576000, 6223000],
+            [576000, 6224000],
+            [575000, 6224000],
+            [575000, 6223000],
+        ]
+    ]
+
+    fileobj = io.StringIO()
+    assert export.write_geojson([], fileobj) == 0
+    assert json.loads(fileobj.getvalue()) == {
+        "type": "FeatureCollection",
+        "features": [],
+    }
+
+
+def test_write_footprints():
+    """kvadratnet.export.write_footprints"""
+
+    fileobj = io.StringIO()
+    assert export.write_footprints(np.array([], dtype=np.uint64), fileobj) == 0
+
+    with pytest.raises(ValueError):
+        export.write_footprints(NAMES, fileobj, "shp")
@@ -0,0 +1,95 @@
+"""
+Test suite for the kvadratnet.geometry module.
+"""
+
+import pytest
+
+import kvadratnet as kn
+from kvadratnet import geometry
+
+
+def test_parse_wkt():
+    """kvadratnet.geometry.parse_wkt"""
+
+    polygons = geometry.parse_wkt(kn.wkt_from_name("1km_6223_575"))
+    assert polygons == [
+        [
+            [
+                (575000, 6223000),
+                (575000, 6224000),
+                (576000, 6224000),
+                (576000, 6223000),
+                (575000, 6223000),
+            ]
+        ]
+    ]
+
+    wkt = "MULTIPOLYGON(((0 0,0 10,10 10,0 0)),((20 20,20 30,30 30,20 20),(21 22,21 23,22 23,21 22)))"
+    polygons = geometry.parse_wkt(wkt)
+    assert len(polygons) == 2
+    assert len(polygons[1]) == 2
+
+    assert geometry.parse_wkt("POLYGON EMPTY") == []
+
+    with pytest.raises(ValueError):
+        geometry.parse_wkt("POINT(1 2)")
+    with pytest.raises(ValueError):
+        geometry.parse_wkt("POLYGON((0 0,1 1,0 0)")
+    with pytest.raises(ValueError):
+        geometry.parse_wkt("POLYGON((0 0,1 a,1 0,0 0))")
+
+
+def test_cover():
+    """kvadratnet.geometry.cover"""
+
+    # a polygon identical to a tile only covers that tile
+    wkt = kn.wkt_from_name("1km_6223_575")
+    assert geometry.cover(wkt, "1km") == ["1km_6223_575"]
+    assert geometry.cover(wkt, "1km", "within") == ["1km_6223_575"]
+    assert len(geometry.cover(wkt, "250m")) == 16
+    assert geometry.cover(wkt, "10km") == ["10km_622_57"]
+    assert geometry.cover(wkt, "10km", "within") == []
+
+    # triangle with the hypotenuse running diagonally through 1km tiles
+    wkt = "POLYGON((575000 6223000,578000 6223000,575000 6226000,575000 6223000))"
+    intersecting = geometry.cover(wkt, "1km")
+    within = geometry.cover(wkt, "1km", "within")
+    assert within == ["1km_6223_575", "1km_6223_576", "1km_6224_575"]
+    assert intersecting == [
+        "1km_6223_575",
+        "1km_6223_576",
+        "1km_6223_577",
+        "1km_6224_575",
+        "1km_6224_576",
+        "1km_6225_575",
+    ]
+    keys = geometry.cover(wkt, "1km", keys=True)
+    assert keys == [kn.key_from_name(name) for name in intersecting]
+
+    # holes are excluded
+    wkt = (
+        "POLYGON((570000 6220000,573000 6220000,573000 6223000,570000 6223000,"
+        "570000 6220000),(571000 6221000,572000 6221000,572000 6222000,"
+        "571000 6222000,571000 6221000))"
+    )
+    tiles = geometry.cover(wkt, "1km")
+    assert len(tiles) == 8
+    assert "1km_6221_571" not in tiles
+
+    with pytest.raises(ValueError):
+        geometry.cover(wkt, "2km")
+    with pytest.raises(ValueError):
+        geometry.cover(wkt, "1km", "touches")
+
+
+def test_cover_hierarchical():
+    """kvadratnet.geometry.cover(hierarchical=True)"""
+
+    wkt = "POLYGON((500000 6200000,520500 6200000,520500 6210000,500000 6210000,500000 6200000))"
+    tiles = geometry.cover(wkt, "1km", hierarchical=True)
+    assert tiles[-2:] == ["10km_620_50", "10km_620_51"]
+    assert len(tiles) == 2 + 10
+    assert all(tile.startswith("1km_") for tile in tiles[:-2])
+
+    tiles = geometry.cover(wkt, "1km", "within", hierarchical=True)
+    assert tiles == ["10km_620_50", "10km_620_51"]
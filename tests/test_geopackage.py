@@ -0,0 +1,148 @@
+"""
+Test suite for the kvadratnet.geopackage module.
+"""
+
+import sqlite3
+import struct
+
+import numpy as np
+import pytest
+
+import kvadratnet as kn
+from kvadratnet import batch, export, geopackage
+
+NAMES = ["1km_6223_575", "10km_622_57", "250m_622375_57550"]
+
+
+def test_gpkg_from_keys():
+    """kvadratnet.geopackage.gpkg_from_keys"""
+    keys = batch.keys_from_names(NAMES)
+    polygons = geopackage.gpkg_from_keys(keys, 25832)
+    assert polygons.dtype.itemsize == 40 + export.WKB_POLYGON.itemsize
+
+    for name, polygon in zip(NAMES, polygons):
+        blob = polygon.tobytes()
+        magic, version, flags, srs_id = struct.unpack("<2sBBi", blob[:8])
+        assert (magic, version, flags, srs_id) == (b"GP", 0, 3, 25832)
+        min_x, max_x, min_y, max_y = struct.unpack("<4d", blob[8:40])
+        assert (min_x, min_y, max_x, max_y) == kn.extent_from_name(name)
+        assert blob[40:] == export.wkb_from_keys([kn.key_from_name(name)]).tobytes()
+
+
+def test_write_geopackage(tmp_path):
+    """kvadratnet.geopackage.write_geopackage"""
+    path = str(tmp_path / "tiles.gpkg")
+    paths = ["a.tif", "b.tif", "c.tif"]
+    count = geopackage.write_geopackage(
+        NAMES, path, paths=paths, srs_id=25832, chunksize=2
+    )
+    assert count == 3
+
+    connection = sqlite3.connect(path)
+    assert connection.execute("PRAGMA application_id").fetchone()[0] == 0x47504B47
+    assert connection.execute("PRAGMA user_version").fetchone()[0] == 10300
+
+    rows = connection.execute("SELECT fid, name, unit, path FROM tiles ORDER BY fid")
+    assert rows.fetchall() == [
+        (1, "1km_6223_575", "1km", "a.tif"),
+        (2, "10km_622_57", "10km", "b.tif"),
+        (3, "250m_622375_57550", "250m", "c.tif"),
+    ]
+
+    contents = connection.execute(
+        "SELECT data_type, min_x, min_y, max_x, max_y, srs_id FROM gpkg_contents"
+    ).fetchone()
+    assert contents == ("features", 570000, 6220000, 580000, 6230000, 25832)
+    srs = connection.execute(
+        "SELECT srs_id, organization FROM gpkg_spatial_ref_sys ORDER BY srs_id"
+    ).fetchall()
+    assert srs == [(-1, "NONE"), (0, "NONE"), (4326, "EPSG"), (25832, "EPSG")]
+    assert connection.execute("SELECT * FROM gpkg_geometry_columns").fetchone() == (
+        "tiles",
+        "geom",
+        "POLYGON",
+        25832,
+        0,
+        0,
+    )
+
+    # the spatial index finds the tiles intersecting a bounding box
+    found = connection.execute(
+        "SELECT id FROM rtree_tiles_geom "
+        "WHERE maxx > 575600 AND minx < 575700 AND maxy > 6223800 AND miny < 6223900"
+    )
+    assert sorted(row[0] for row in found) == [1, 2, 3]
+    found = connection.execute(
+        "SELECT id FROM rtree_tiles_geom "
+        "WHERE maxx > 571000 AND minx < 572000 AND maxy > 6225000 AND miny < 6226000"
+    )
+    assert [row[0] for row in found] == [2]
+    triggers = connection.execute(
+        "SELECT count(*) FROM sqlite_master WHERE type = 'trigger'"
+    ).fetchone()[0]
+    assert triggers == 6
+    connection.close()
+
+    # more tables can be added to an existing GeoPackage
+    assert geopackage.write_geopackage(NAMES[:1], path, table="more") == 1
+    with pytest.raises(ValueError):
+        geopackage.write_geopackage(NAMES, path, table="TILES")
+
+
+def test_write_geopackage_errors(tmp_path):
+    """kvadratnet.geopackage.write_geopackage errors"""
+    path = str(tmp_path / "tiles.gpkg")
+    with pytest.raises(ValueError):
+        geopackage.write_geopackage(NAMES, path, table="bad name")
+    with pytest.raises(ValueError):
+        geopackage.write_geopackage(NAMES, path, paths=["a.tif"])
+    with pytest.raises(ValueError):
+        geopackage.write_geopackage(NAMES, path, paths=["a", "b", "c", "d"])
+
+    # failed writes leave no table behind
+    connection = sqlite3.connect(path)
+    tables = connection.execute(
+        "SELECT count(*) FROM sqlite_master WHERE name = 'tiles'"
+    ).fetchone()[0]
+    assert tables == 0
+    connection.close()
+
+
+def test_rtree_bulk_load(tmp_path):
+    """kvadratnet.geopackage.write_geopackage with a multi-level R*Tree"""
+    path = str(tmp_path / "tiles.gpkg")
+    extent = (570000, 6220000, 580000, 6230000)
+    keys = np.concatenate(list(batch.tiles_in_extent_chunks(extent, "100m")))
+    np.random.default_rng(42).shuffle(keys)
+    geopackage.write_geopackage(keys, path, chunksize=3000)
+
+    connection = sqlite3.connect(path)
+    assert connection.execute("SELECT rtreecheck('rtree_tiles_geom')").fetchone() == (
+        "ok",
+    )
+    depth = connection.execute(
+        "SELECT rtreedepth(data) FROM rtree_tiles_geom_node WHERE nodeno = 1"
+    ).fetchone()[0]
+    assert depth >= 2
+
+    extents = batch.extents_from_keys(keys)
+    found = connection.execute(
+        "SELECT id FROM rtree_tiles_geom "
+        "WHERE maxx >= 575123 AND minx <= 576555 "
+        "AND maxy >= 6224000 AND miny <= 6225678"
+    )
+    expected = np.nonzero(
+        (extents.max_easting >= 575123)
+        & (extents.min_easting <= 576555)
+        & (extents.max_northing >= 6224000)
+        & (extents.min_northing <= 6225678)
+    )[0]
+    assert sorted(row[0] for row in found) == (expected + 1).tolist()
+
+    # the tree can still be edited by SQLite
+    connection.execute("DELETE FROM rtree_tiles_geom WHERE id = 1")
+    connection.execute("INSERT INTO rtree_tiles_geom VALUES (10001, 0, 1, 0, 1)")
+    assert connection.execute("SELECT rtreecheck('rtree_tiles_geom')").fetchone() == (
+        "ok",
+    )
+    connection.close()
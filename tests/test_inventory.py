@@ -0,0 +1,114 @@
+"""
+Test suite for the kvadratnet.inventory module.
+"""
+
+import os
+
+import kvadratnet as kn
+from kvadratnet.inventory import Catalog
+
+
+def _create_files(root, files):
+    """
+    Create files below root, including the folders they are in.
+    """
+    for filename in files:
+        path = os.path.join(str(root), filename)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as fileobj:
+            fileobj.write(filename)
+
+
+def test_catalog(tmp_path):
+    """kvadratnet.inventory.Catalog"""
+
+    root = tmp_path / "data"
+    _create_files(
+        root,
+        [
+            "10km_609_60/dtm_1km_6090_600.tif",
+            "10km_609_60/dtm_1km_6091_600.tif",
+            "10km_609_60/readme.txt",
+            "10km_610_60/250m/dtm_250m_610000_60000.tif",
+            "dtm_10km_609_60.tif",
+        ],
+    )
+
+    with Catalog(str(tmp_path / "catalog.sqlite")) as catalog:
+        summary = catalog.scan(str(root), jobs=2)
+        assert summary == (4, 4, 4)
+        assert len(catalog) == 4
+
+        entries = list(catalog.entries())
+        assert [entry.key for entry in entries] == sorted(
+            kn.key_from_name(entry.path) for entry in entries
+        )
+        entry = entries[0]
+        assert entry.unit == "250m"
+        assert (entry.northing, entry.easting) == (6100000, 600000)
+        assert entry.path == str(root / "10km_610_60/250m/dtm_250m_610000_60000.tif")
+        assert entry.size == len("10km_610_60/250m/dtm_250m_610000_60000.tif")
+
+        assert [e.unit for e in catalog.entries(unit="1km")] == ["1km", "1km"]
+
+    # only changed directories are scanned again
+    os.remove(str(root / "10km_609_60/dtm_1km_6091_600.tif"))
+    with Catalog(str(tmp_path / "catalog.sqlite")) as catalog:
+        summary = catalog.scan(str(root))
+        assert summary == (4, 1, 3)
+        assert len(catalog) == 3
+
+        summary = catalog.scan(str(root), full=True)
+        assert summary == (4, 4, 3)
+
+    # removed directories are removed from the catalog
+    os.remove(str(root / "10km_610_60/250m/dtm_250m_610000_60000.tif"))
+    os.rmdir(str(root / "10km_610_60/250m"))
+    with Catalog(str(tmp_path / "catalog.sqlite")) as catalog:
+        summary = catalog.scan(str(root))
+        assert summary == (3, 1, 2)
+        assert len(catalog) == 2
+
+
+def test_catalog_broken_symlink(tmp_path):
+    """kvadratnet.inventory.Catalog with a dangling symlink"""
+
+    root = tmp_path / "data"
+    _create_files(root, ["dtm_1km_6090_600.tif", "10km_609_60/dtm_1km_6091_600.tif"])
+
+    with Catalog(str(tmp_path / "catalog.sqlite")) as catalog:
+        assert catalog.scan(str(root)) == (2, 2, 2)
+
+        # the broken link is skipped, the rest of the tree is kept
+        os.symlink(str(tmp_path / "nonexistent"), str(root / "1km_6000_500.tif"))
+        assert catalog.scan(str(root)) == (2, 1, 2)
+        assert len(catalog) == 2
+        assert catalog.scan(str(root), full=True) == (2, 2, 2)
+
+
+def test_catalog_symlinked_directory(tmp_path):
+    """kvadratnet.inventory.Catalog with a symlink to a directory"""
+
+    root = tmp_path / "data"
+    _create_files(root, ["dtm_1km_6090_600.tif", "10km_609_60/dtm_1km_6091_600.tif"])
+    os.symlink(str(root / "10km_609_60"), str(root / "10km_610_60"))
+
+    with Catalog(str(tmp_path / "catalog.sqlite")) as catalog:
+        assert catalog.scan(str(root)) == (2, 2, 2)
+        assert sorted(os.path.basename(e.path) for e in catalog.entries()) == [
+            "dtm_1km_6090_600.tif",
+            "dtm_1km_6091_600.tif",
+        ]
+
+
+def test_catalog_without_scandir(tmp_path, monkeypatch):
+    """kvadratnet.inventory.Catalog on Python versions without os.scandir"""
+
+    root = tmp_path / "data"
+    _create_files(root, ["dtm_1km_6090_600.tif", "10km_609_60/dtm_1km_6091_600.tif"])
+    os.symlink(str(root / "10km_609_60"), str(root / "10km_610_60"))
+    os.symlink(str(tmp_path / "nonexistent"), str(root / "1km_6000_500.tif"))
+
+    monkeypatch.delattr(os, "scandir")
+    with Catalog(str(tmp_path / "catalog.sqlite")) as catalog:
+        assert catalog.scan(str(root)) == (2, 2, 2)
@@ -0,0 +1,145 @@
+"""
+Test suite for the kvadratnet.plan module.
+"""
+
+import errno
+import os
+
+import pytest
+
+from kvadratnet import plan
+
+
+def test_plan_rename():
+    """kvadratnet.plan.plan_rename"""
+
+    files = ["a/pre_1km_6090_600.tif", "1km_6090_601.tif", "notatile.tif"]
+    result = plan.plan_rename(files, prefix="dtm_")
+
+    assert result.operations == [
+        (files[0], os.path.join("a", "dtm_1km_6090_600.tif")),
+        (files[1], "dtm_1km_6090_601.tif"),
+    ]
+    assert result.skipped == ["notatile.tif"]
+    assert result.collisions() == []
+
+    # files that already have the right name are left alone
+    assert len(plan.plan_rename(["1km_6090_601.tif"])) == 0
+
+    result = plan.plan_rename(["a_1km_6090_600.tif", "b_1km_6090_600.tif"])
+    assert result.collisions() == [
+        ("1km_6090_600.tif", ["a_1km_6090_600.tif", "b_1km_6090_600.tif"])
+    ]
+
+
+def test_plan_organize():
+    """kvadratnet.plan.plan_organize"""
+
+    files = ["dtm_1km_6090_600.tif", "dtm_1km_6090_600.laz", "dtm_1km_6190_600.tif"]
+    result = plan.plan_organize(files, ["10km", "100km"])
+
+    assert result.directories == [
+        os.path.join("100km_60_6", "10km_609_60"),
+        os.path.join("100km_61_6", "10km_619_60"),
+    ]
+    assert [op.dst for op in result.operations] == [
+        os.path.join("100km_60_6", "10km_609_60", files[0]),
+        os.path.join("100km_60_6", "10km_609_60", files[1]),
+        os.path.join("100km_61_6", "10km_619_60", files[2]),
+    ]
+
+    with pytest.raises(ValueError):
+        plan.plan_organize(files, ["2km"])
+    with pytest.raises(ValueError):
+        plan.plan_organize(files, ["250m"])
+
+
+def test_execute(tmp_path, monkeypatch):
+    """kvadratnet.plan.Plan.execute"""
+
+    files = [str(tmp_path / "dtm_1km_6090_{0}.tif".format(i)) for i in range(600, 650)]
+    for filename in files:
+        open(filename, "w").close()
+
+    monkeypatch.chdir(str(tmp_path))
+    result = plan.plan_organize(files, ["10km"])
+    assert result.existing_targets() == []
+
+    done = []
+    result.execute(jobs=4, callback=done.append)
+    assert done == result.operations
+    for operation in result.operations:
+        assert os.path.exists(operation.dst)
+        assert not os.path.exists(operation.src)
+
+    # moving the files again would overwrite the files moved above
+    result = plan.plan_organize([os.path.basename(f) for f in files[:2]], ["10km"])
+    assert result.existing_targets(jobs=2) == result.operations
+
+
+def test_execute_errors(tmp_path, monkeypatch):
+    """kvadratnet.plan.Plan.execute with failing operations"""
+
+    monkeypatch.chdir(str(tmp_path))
+    files = ["dtm_1km_6090_600.tif", "dtm_1km_6090_601.tif", "dtm_1km_6090_602.tif"]
+    for filename in files[::2]:
+        open(filename, "w").close()
+
+    result = plan.plan_organize(files, ["10km"])
+    assert result.missing_sources(jobs=2) == [result.operations[1]]
+
+    # the other files are moved, the failed operation is returned
+    done = []
+    failed = result.execute(jobs=2, callback=done.append)
+    assert done == result.operations[::2]
+    assert [operation for operation, _ in failed] == [result.operations[1]]
+    assert isinstance(failed[0][1], FileNotFoundError)
+
+
+def test_link_action(tmp_path, monkeypatch):
+    """kvadratnet.plan.link_action"""
+
+    monkeypatch.chdir(str(tmp_path))
+    with open("1km_6090_600.tif", "w") as fileobj:
+        fileobj.write("data")
+    os.mkdir("links")
+
+    plan.link_action("hard")("1km_6090_600.tif", os.path.join("links", "hard.tif"))
+    assert os.path.samefile("1km_6090_600.tif", os.path.join("links", "hard.tif"))
+
+    plan.link_action("sym")("1km_6090_600.tif", os.path.join("links", "sym.tif"))
+    assert os.path.islink(os.path.join("links", "sym.tif"))
+    assert os.readlink(os.path.join("links", "sym.tif")) == os.path.join(
+        os.pardir, "1km_6090_600.tif"
+    )
+
+    # falls back to a copy, never a hard link, if the filesystem cannot clone
+    def unsupported(src, dst):
+        raise OSError(errno.EOPNOTSUPP, "Operation not supported")
+
+    with monkeypatch.context() as patch:
+        patch.setitem(plan._LINK_FUNCTIONS, "reflink", unsupported)
+        link = plan.link_action("reflink")
+    link("1km_6090_600.tif", os.path.join("links", "ref.tif"))
+    with open(os.path.join("links", "ref.tif")) as fileobj:
+        assert fileobj.read() == "data"
+    assert not os.path.islink(os.path.join("links", "ref.tif"))
+    assert not os.path.samefile("1km_6090_600.tif", os.path.join("links", "ref.tif"))
+
+    def cross_device(src, dst):
+        raise OSError(18, "Invalid cross-device link")
+
+    monkeypatch.setitem(plan._LINK_FUNCTIONS, "hard", cross_device)
+    plan.link_action("hard")("1km_6090_600.tif", os.path.join("links", "fall.tif"))
+    assert os.path.islink(os.path.join("links", "fall.tif"))
+
+    with pytest.raises(FileExistsError):
+        plan.link_action("hard")("1km_6090_600.tif", os.path.join("links", "sym.tif"))
+
+    # other errors are raised instead of falling back to another link type
+    for mode in plan.LINK_MODES:
+        with pytest.raises(FileNotFoundError):
+            plan.link_action(mode)("missing.tif", os.path.join("links", mode))
+        assert not os.path.lexists(os.path.join("links", mode))
+    with pytest.raises(ValueError):
+        plan.link_action("copy")
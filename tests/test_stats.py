@@ -0,0 +1,68 @@
+"""
+Test suite for the kvadratnet.stats module.
+"""
+
+import io
+import json
+
+import pytest
+
+import kvadratnet as kn
+from kvadratnet import stats
+from kvadratnet.plan import plan_organize
+
+
+def test_collect(tmp_path, monkeypatch):
+    """kvadratnet.stats.collect"""
+
+    monkeypatch.chdir(str(tmp_path))
+    files = ["dtm_1km_6090_600.tif", "dtm_1km_6091_600.tif"]
+    for filename in files:
+        with open(filename, "w") as fileobj:
+            fileobj.write("12345")
+
+    tile_name = kn.tile_name
+    with stats.collect() as collected:
+        assert stats.active() is collected
+        assert kn.tile_name is not tile_name
+        with pytest.raises(ValueError):
+            stats.start()
+
+        with stats.phase("plan"):
+            plan = plan_organize(files, ["10km"])
+        plan.execute()
+        kn.validate_name("1km_6090_600")
+
+    assert stats.active() is None
+    assert kn.tile_name is tile_name
+    assert list(collected.phases) == ["plan", "makedirs", "move"]
+    assert collected.calls["tile_name"] == 2
+    assert collected.calls["validate_name"] == 1
+    assert collected.calls["parent_tile"] == 0
+    assert (collected.files, collected.bytes) == (2, 10)
+
+    # nothing is counted once collection has stopped
+    kn.tile_name("1km_6090_600")
+    assert collected.calls["tile_name"] == 2
+    assert stats.stop() is None
+
+    fileobj = io.StringIO()
+    collected.write_json(fileobj)
+    values = json.loads(fileobj.getvalue())
+    assert values["files"] == 2
+    assert values["calls"]["tile_name"] == 2
+    assert set(values["phases"]) == {"plan", "makedirs", "move"}
+    assert values["files_per_second"] > 0
+
+    summary = collected.summary().splitlines()
+    assert summary[0].split() == ["Phase", "Seconds"]
+    assert "bytes" in summary[-1]
+
+
+def test_phase_disabled():
+    """kvadratnet.stats.phase when no statistics are collected"""
+
+    assert stats.active() is None
+    with stats.phase("plan"):
+        pass
+    assert stats.phase("plan") is stats.phase("move")
@@ -0,0 +1,91 @@
+"""
+Test suite for the kvadratnet.tileindex module.
+"""
+
+import numpy as np
+import pytest
+
+import kvadratnet as kn
+from kvadratnet import batch
+from kvadratnet.tileindex import TileIndex, write_index
+
+
+def test_write_and_read(tmp_path):
+    """kvadratnet.tileindex.write_index and TileIndex"""
+    path = str(tmp_path / "tiles.knidx")
+    names = ["1km_6224_577", "10km_622_57", "1km_6223_575", "1km_6224_577"]
+    paths = ["a.tif", "b.tif", "c.tif", "d.tif"]
+
+    assert write_index(path, names, payloads=paths) == 3
+
+    index = TileIndex(path)
+    assert len(index) == 3
+    assert index.has_payload
+    assert sorted(index.units) == ["10km", "1km"]
+    assert index.units["10km"] == (2, 1)
+    assert list(index.keys) == sorted(set(kn.key_from_name(n) for n in names))
+
+    assert "1km_6223_575" in index
+    assert kn.key_from_name("10km_622_57") in index
+    assert "1km_6223_576" not in index
+
+    # first payload is used for duplicate tiles
+    assert index.payload("1km_6224_577") == b"a.tif"
+    assert index.payload("10km_622_57") == b"b.tif"
+    assert index.payload("1km_6223_576") is None
+
+    keys = batch.keys_from_names(["1km_6223_575", "1km_6223_576", "10km_622_57"])
+    np.testing.assert_array_equal(index.lookup(keys), [0, -1, 2])
+    np.testing.assert_array_equal(index.contains(keys), [True, False, True])
+
+
+def test_query(tmp_path):
+    """kvadratnet.tileindex.TileIndex.query"""
+    path = str(tmp_path / "tiles.knidx")
+    extent = (570000, 6220000, 580000, 6230000)
+    keys = np.concatenate(list(batch.tiles_in_extent_chunks(extent, "1km")))[::3]
+    parent = batch.keys_from_names(["10km_622_57"])
+    write_index(path, np.concatenate([keys, parent]))
+    index = TileIndex(path)
+    assert not index.has_payload
+
+    for bbox in [
+        (572500, 6221500, 575500, 6224500),
+        (570000, 6220000, 580000, 6230000),
+        (560000, 6210000, 590000, 6240000),
+        (575100, 6225100, 575200, 6225200),
+    ]:
+        expected = np.concatenate(list(batch.tiles_in_extent_chunks(bbox, "1km")))
+        expected = np.intersect1d(expected, keys)
+        np.testing.assert_array_equal(index.keys[index.query(bbox)], expected)
+
+    assert len(index.query((0, 0, 1000, 1000))) == 0
+    assert len(index.query(extent, "100km")) == 0
+    np.testing.assert_array_equal(index.keys[index.query(extent, "10km")], parent)
+
+
+def test_empty_index(tmp_path):
+    """kvadratnet.tileindex.TileIndex with no tiles"""
+    path = str(tmp_path / "tiles.knidx")
+    write_index(path, [], payloads=[])
+    index = TileIndex(path)
+
+    assert len(index) == 0
+    assert "1km_6223_575" not in index
+    assert len(index.query((570000, 6220000, 580000, 6230000))) == 0
+
+
+def test_errors(tmp_path):
+    """kvadratnet.tileindex errors"""
+    path = str(tmp_path / "tiles.knidx")
+    with pytest.raises(ValueError):
+        write_index(path, ["1km_6223_575"], payloads=[])
+
+    write_index(path, ["1km_6223_575"])
+    with pytest.raises(ValueError):
+        TileIndex(path).payload("1km_6223_575")
+
+    other = tmp_path / "other.knidx"
+    other.write_bytes(b"not an index")
+    with pytest.raises(ValueError):
+        TileIndex(str(other))
@@ -0,0 +1,107 @@
+"""
+Test suite for the kvadratnet.vrt module.
+"""
+
+import io
+import os
+import xml.etree.ElementTree as ET
+
+import pytest
+
+import kvadratnet as kn
+from kvadratnet import vrt
+
+FILES = [
+    "dtm/dtm_1km_6224_576.tif",
+    "dtm/dtm_1km_6223_575.tif",
+    "dtm/dtm_1km_6223_576.tif",
+]
+
+
+def test_write_vrt():
+    """kvadratnet.vrt.write_vrt"""
+    fileobj = io.StringIO()
+    count = vrt.write_vrt(
+        FILES, fileobj, 0.5, bands=2, data_type="Int16", nodata=-9999, chunksize=2
+    )
+    assert count == 3
+
+    root = ET.fromstring(fileobj.getvalue())
+    assert root.get("rasterXSize") == "4000"
+    assert root.get("rasterYSize") == "4000"
+    assert root.find("SRS") is None
+    geotransform = [float(v) for v in root.find("GeoTransform").text.split(",")]
+    assert geotransform == [575000, 0.5, 0, 6225000, 0, -0.5]
+
+    bands = root.findall("VRTRasterBand")
+    assert [band.get("band") for band in bands] == ["1", "2"]
+    for band in bands:
+        assert band.get("dataType") == "Int16"
+        assert band.find("NoDataValue").text == "-9999.0"
+        sources = band.findall("ComplexSource")
+        assert [s.find("SourceFilename").text for s in sources] == FILES
+        assert {s.find("SourceBand").text for s in sources} == {band.get("band")}
+
+        windows = [s.find("DstRect").attrib for s in sources]
+        assert [(w["xOff"], w["yOff"]) for w in windows] == [
+            ("2000", "0"),
+            ("0", "2000"),
+            ("2000", "2000"),
+        ]
+        assert {(w["xSize"], w["ySize"]) for w in windows} == {("2000", "2000")}
+        properties = sources[0].find("SourceProperties").attrib
+        assert properties == {
+            "RasterXSize": "2000",
+            "RasterYSize": "2000",
+            "DataType": "Int16",
+        }
+
+
+def test_write_vrt_options():
+    """kvadratnet.vrt.write_vrt with srs, block size and relative paths"""
+    fileobj = io.StringIO()
+    vrt.write_vrt(
+        FILES[:1],
+        fileobj,
+        1,
+        srs="EPSG:25832",
+        block_size=(256, 256),
+        relative_to="dtm",
+    )
+
+    root = ET.fromstring(fileobj.getvalue())
+    assert root.find("SRS").text == "EPSG:25832"
+    source = root.find("VRTRasterBand/SimpleSource")
+    filename = source.find("SourceFilename")
+    assert filename.get("relativeToVRT") == "1"
+    assert filename.text == os.path.basename(FILES[0])
+    assert source.find("SourceProperties").get("BlockXSize") == "256"
+    assert source.find("NODATA") is None
+
+
+def test_write_vrt_keys():
+    """kvadratnet.vrt.write_vrt with precomputed tile keys"""
+    keys = [kn.key_from_name(os.path.basename(path)) for path in FILES]
+    paths = ["a.tif", "b.tif", "c.tif"]
+    fileobj = io.StringIO()
+    assert vrt.write_vrt(paths, fileobj, 1, keys=keys) == 3
+
+    root = ET.fromstring(fileobj.getvalue())
+    sources = root.findall("VRTRasterBand/SimpleSource")
+    assert [s.find("SourceFilename").text for s in sources] == paths
+    assert sources[0].find("DstRect").get("xOff") == "1000"
+
+    with pytest.raises(ValueError):
+        vrt.write_vrt(paths, io.StringIO(), 1, keys=keys[:2])
+
+
+def test_write_vrt_errors():
+    """kvadratnet.vrt.write_vrt errors"""
+    with pytest.raises(ValueError):
+        vrt.write_vrt(["readme.txt"], io.StringIO(), 1)
+    with pytest.raises(ValueError):
+        vrt.write_vrt(FILES, io.StringIO(), 3)
+    with pytest.raises(ValueError):
+        vrt.write_vrt(FILES, io.StringIO(), 1, data_type="Float16")
+    with pytest.raises(ValueError):
+        vrt.write_vrt(FILES, io.StringIO(), 1, nodata="0</NODATA>")